@@ -87,6 +87,9 @@ const MessageChat = ({ ticketId, ticket, initialMessages = [] }) => {
             messages={messages.messages}
             loadingMessages={messages.loadingMessages}
             currentUserId={user?.id}
+            hasOlderMessages={messages.hasOlderMessages}
+            loadingOlderMessages={messages.loadingOlderMessages}
+            onLoadOlder={messages.loadOlderMessages}
           />
         </div>
 
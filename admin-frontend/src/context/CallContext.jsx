@@ -35,7 +35,7 @@ export const CallProvider = ({ children }) => {
   const getSocketUrl = useCallback(() => {
     const ticketId = currentCall?.ticketId || listeningTicketId;
     if (!ticketId || !token) return null;
-    return `ws://localhost:8000/calls/ws/${ticketId}?token=${token}`;
+    return `ws://localhost:8000/calls/ws/${ticketId}?token=${token}&batch_ice=1`;
   }, [currentCall, listeningTicketId, token]);
 
   // WebSocket for signaling
@@ -543,6 +543,20 @@ export const CallProvider = ({ children }) => {
             }
             break;
 
+          case 'ice-candidates':
+            // Candidates batched by the server (we connect with batch_ice=1)
+            for (const candidate of message.candidates || []) {
+              if (!candidate) continue;
+              if (peerConnectionRef.current && peerConnectionRef.current.remoteDescription) {
+                await peerConnectionRef.current.addIceCandidate(
+                  new RTCIceCandidate(candidate)
+                );
+              } else {
+                pendingCandidatesRef.current.push(candidate);
+              }
+            }
+            break;
+
           case 'error':
             console.error('Signaling error:', message.message);
             toast.error(message.message);
@@ -2,10 +2,15 @@ import { useState, useCallback, useEffect } from 'react';
 import { messageService } from '../services';
 import { toast } from 'react-hot-toast';
 
+// Matches the backend's default MESSAGE_PAGE_SIZE
+const MESSAGE_PAGE_SIZE = 50;
+
 export const useMessages = (ticketId, websocket) => {
   const [messages, setMessages] = useState([]);
   const [loadingMessages, setLoadingMessages] = useState(false);
   const [messagesLoaded, setMessagesLoaded] = useState(false);
+  const [hasOlderMessages, setHasOlderMessages] = useState(false);
+  const [loadingOlderMessages, setLoadingOlderMessages] = useState(false);
   const [refreshing, setRefreshing] = useState(false);
 
   const loadInitialMessages = useCallback(async () => {
@@ -13,8 +18,9 @@ export const useMessages = (ticketId, websocket) => {
     
     try {
       setLoadingMessages(true);
-      const allMessages = await messageService.getMessages(ticketId);
-      setMessages(allMessages);
+      const latestMessages = await messageService.getMessages(ticketId, { limit: MESSAGE_PAGE_SIZE });
+      setMessages(latestMessages);
+      setHasOlderMessages(latestMessages.length >= MESSAGE_PAGE_SIZE);
       setMessagesLoaded(true);
     } catch (error) {
       console.error('Error loading initial messages:', error);
@@ -25,6 +31,27 @@ export const useMessages = (ticketId, websocket) => {
     }
   }, [ticketId]);
 
+  // Fetch the page before the oldest message shown
+  const loadOlderMessages = useCallback(async () => {
+    const oldest = messages.find(msg => !msg.id.toString().startsWith('temp-'));
+    if (!ticketId || !oldest || loadingOlderMessages) return;
+
+    try {
+      setLoadingOlderMessages(true);
+      const olderMessages = await messageService.getMessages(ticketId, {
+        before_id: oldest.id,
+        limit: MESSAGE_PAGE_SIZE
+      });
+      setMessages(prev => [...olderMessages, ...prev]);
+      setHasOlderMessages(olderMessages.length >= MESSAGE_PAGE_SIZE);
+    } catch (error) {
+      console.error('Error loading older messages:', error);
+      toast.error('Failed to load older messages');
+    } finally {
+      setLoadingOlderMessages(false);
+    }
+  }, [ticketId, messages, loadingOlderMessages]);
+
   const refreshMessages = useCallback(async () => {
     try {
       setRefreshing(true);
@@ -105,6 +132,7 @@ export const useMessages = (ticketId, websocket) => {
     setMessages([]);
     setMessagesLoaded(false);
     setLoadingMessages(false);
+    setHasOlderMessages(false);
     setRefreshing(false);
   }, [ticketId]);
 
@@ -114,6 +142,9 @@ export const useMessages = (ticketId, websocket) => {
     refreshing,
     loadInitialMessages,
     refreshMessages,
+    hasOlderMessages,
+    loadingOlderMessages,
+    loadOlderMessages,
     addMessage,
     addOptimisticMessage
   };
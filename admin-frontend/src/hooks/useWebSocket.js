@@ -8,6 +8,8 @@ export const useWebSocket = (ticketId, user, token, ticket) => {
   const reconnectTimeoutRef = useRef(null);
   const intentionalDisconnect = useRef(false);
   const lastConnectionAttempt = useRef(0);
+  // Backoff hint sent by the server before a restart
+  const reconnectAfterMs = useRef(null);
 
   const MAX_RECONNECT_ATTEMPTS = 3;
   const RECONNECT_DELAY = 2000;
@@ -50,6 +52,10 @@ export const useWebSocket = (ticketId, user, token, ticket) => {
       wsRef.current.onmessage = (event) => {
         try {
           const data = JSON.parse(event.data);
+          if (data.type === 'reconnect') {
+            reconnectAfterMs.current = data.reconnect_after_ms;
+            return;
+          }
           // Notify all listeners
           messageListeners.current.forEach(listener => {
             listener(data);
@@ -67,6 +73,16 @@ export const useWebSocket = (ticketId, user, token, ticket) => {
           return;
         }
 
+        // Server restart: come back after the server's randomized hint
+        if (event.code === 1012) {
+          const delay = reconnectAfterMs.current ?? RECONNECT_DELAY;
+          reconnectAfterMs.current = null;
+          reconnectTimeoutRef.current = setTimeout(() => {
+            connect();
+          }, delay);
+          return;
+        }
+
         const shouldReconnect = event.code !== 1000 && 
                                event.code !== 1001 && 
                                event.code !== 1008 && 
@@ -10,6 +10,7 @@ load_dotenv()
 
 sys.path.append(os.path.join(sys.path[0], 'app'))  # Add app folder to path
 from app.database import Base  # import your declarative base
+import app.models  # noqa: F401  register every model on Base.metadata for autogenerate
 
 config = context.config
 fileConfig(config.config_file_name)
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.database import get_db   # ✅ instead of SessionLocal
-from app.core.security import create_access_token, verify_password, get_password_hash
+from datetime import datetime
+from app.core.security import create_access_token, decode_access_token, verify_password, get_password_hash, password_needs_rehash
 from app.models.user import User
 from app.schemas.user import UserCreate, UserOut, ChangePassword
-from app.dependencies import get_current_user
+from app.dependencies import get_current_user, oauth2_scheme
+from app.operations.auth import revoke_token, revoke_user_tokens
+from app.core.principal_cache import principal_cache
 from fastapi.security import OAuth2PasswordRequestForm
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -31,9 +34,26 @@ def login(
             detail="Invalid email or password"
         )
 
+    # Transparently upgrade hashes made with an old BCRYPT_ROUNDS setting
+    if password_needs_rehash(user.password_hash):
+        user.password_hash = get_password_hash(form_data.password)
+        db.commit()
+
     access_token = create_access_token({"sub": str(user.id)})
     return {"access_token": access_token, "token_type": "bearer", "role":user.role}
 
+@router.post("/logout")
+def logout(
+    token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Revoke the token used for this request"""
+    payload = decode_access_token(token)
+    if payload and payload.get("jti"):
+        revoke_token(db, payload["jti"], current_user.id, datetime.utcfromtimestamp(payload["exp"]))
+    return {"message": "Logged out successfully"}
+
 @router.get("/me", response_model=UserOut)
 def get_current_user_profile(current_user: User = Depends(get_current_user)):
     """Get current authenticated user's profile"""
@@ -73,8 +93,16 @@ def change_password(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    # current_user is a cached principal; load the row we are going to change
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
     # Verify current password
-    if not verify_password(password_data.current_password, current_user.password_hash):
+    if not verify_password(password_data.current_password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
@@ -82,8 +110,12 @@ def change_password(
     
     # Hash new password and update
     new_password_hash = get_password_hash(password_data.new_password)
-    current_user.password_hash = new_password_hash
+    user.password_hash = new_password_hash
     
-    db.commit()
+    # Tokens issued with the old password stop working; this commits the new hash too
+    revoked_at = revoke_user_tokens(db, user.id)
+    principal_cache.invalidate(user.id)
     
-    return {"message": "Password changed successfully"}
+    # The caller's own token was revoked as well, so hand out a new one
+    access_token = create_access_token({"sub": str(user.id)}, issued_after=revoked_at)
+    return {"message": "Password changed successfully", "access_token": access_token, "token_type": "bearer"}
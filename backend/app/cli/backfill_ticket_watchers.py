@@ -0,0 +1,16 @@
+import click
+from app.database import SessionLocal
+from app.operations.ticket_watcher import backfill_watchers
+
+@click.command()
+def backfill():
+    """Make the creator and assignee of every existing ticket its watchers. Safe to run repeatedly."""
+    db = SessionLocal()
+    try:
+        inserted = backfill_watchers(db)
+    finally:
+        db.close()
+    print(f"Backfilled ticket watchers: {inserted} new rows")
+
+if __name__ == "__main__":
+    backfill()
@@ -0,0 +1,11 @@
+import click
+from app.core.seed_category import seed_categories
+
+@click.command()
+def seed():
+    """Insert the default ticket categories. Safe to run repeatedly."""
+    inserted = seed_categories()
+    print(f"Seeded categories: {inserted} new rows")
+
+if __name__ == "__main__":
+    seed()
@@ -0,0 +1,298 @@
+"""
+Pub/sub backplane for state that has to reach every worker.
+
+Handlers subscribe to a channel name and are called on the event loop with
+each published message (a JSON-serialisable dict). Publishing never blocks:
+subscribers on this worker are called immediately, other workers get the
+message through the backplane.
+
+BACKPLANE selects the implementation:
+  * "memory"   - in-process only (single worker, the default)
+  * "postgres" - PostgreSQL LISTEN/NOTIFY on the application database, no new
+                 infrastructure. Outgoing messages are batched for
+                 BACKPLANE_FLUSH_MS into as few NOTIFY payloads as fit under
+                 PostgreSQL's 8000 byte limit; an oversized message is
+                 zlib-compressed, and dropped with a warning if it still
+                 doesn't fit.
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import select
+import threading
+import time
+import uuid
+import zlib
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.constants import (
+    BACKPLANE,
+    BACKPLANE_FLUSH_MS,
+    BACKPLANE_PG_CHANNEL,
+)
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict], None]
+
+# NOTIFY payloads must be shorter than 8000 bytes
+MAX_PAYLOAD_BYTES = 7900
+
+
+class Backplane:
+    """In-process backplane. Also the base class: subclasses forward messages to other workers."""
+
+    def __init__(self):
+        self.node_id = uuid.uuid4().hex
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self.published = 0
+        self.received = 0
+
+    def subscribe(self, channel: str, handler: Handler):
+        """Call handler(message) on the event loop for every message published on channel"""
+        self._handlers[channel].append(handler)
+
+    def publish(self, channel: str, message: dict):
+        """Deliver to local subscribers now and to other workers as soon as possible"""
+        self.published += 1
+        self._dispatch(channel, message)
+
+    def _dispatch(self, channel: str, message: dict):
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(message)
+            except Exception as e:
+                logger.exception(f"Backplane handler for {channel!r} failed: {e}")
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "node_id": self.node_id,
+            "published": self.published,
+            "received": self.received,
+        }
+
+
+class PostgresBackplane(Backplane):
+    def __init__(self, dsn: str, pg_channel: str = BACKPLANE_PG_CHANNEL, flush_ms: float = BACKPLANE_FLUSH_MS):
+        super().__init__()
+        self.dsn = dsn
+        self.pg_channel = pg_channel
+        self.flush_seconds = flush_ms / 1000
+        self._outbox: List[Tuple[str, dict]] = []
+        self._outbox_ready: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._listener: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._send_conn = None
+        self._send_lock = threading.Lock()
+        self.notifies_sent = 0
+        self.compressed = 0
+        self.dropped = 0
+
+    def publish(self, channel: str, message: dict):
+        super().publish(channel, message)
+        if self._loop is None:
+            return
+        self._outbox.append((channel, message))
+        self._outbox_ready.set()
+
+    # Outgoing
+
+    async def _flush_loop(self):
+        while True:
+            await self._outbox_ready.wait()
+            # Collect whatever else is published during the batching window
+            await asyncio.sleep(self.flush_seconds)
+            self._outbox_ready.clear()
+            batch, self._outbox = self._outbox, []
+            payloads = self._encode(batch)
+            if not payloads:
+                continue
+            try:
+                await asyncio.to_thread(self._notify, payloads)
+                self.notifies_sent += len(payloads)
+            except Exception as e:
+                self.dropped += len(batch)
+                logger.warning(f"Backplane NOTIFY failed, {len(batch)} messages not forwarded: {e}")
+                self._close_send_conn()
+
+    def _encode(self, batch: List[Tuple[str, dict]]) -> List[str]:
+        """Pack messages into as few payloads as fit under the NOTIFY size limit"""
+        payloads = []
+        current: List[list] = []
+        current_size = 0
+        envelope_size = len(json.dumps({"o": self.node_id, "m": []}))
+
+        for channel, message in batch:
+            item = [channel, message]
+            item_size = len(json.dumps(item, default=str).encode("utf-8")) + 1
+            if envelope_size + item_size > MAX_PAYLOAD_BYTES:
+                payload = self._compress(item)
+                if payload is not None:
+                    payloads.append(payload)
+                continue
+            if current_size + item_size + envelope_size > MAX_PAYLOAD_BYTES:
+                payloads.append("j" + json.dumps({"o": self.node_id, "m": current}, default=str))
+                current, current_size = [], 0
+            current.append(item)
+            current_size += item_size
+
+        if current:
+            payloads.append("j" + json.dumps({"o": self.node_id, "m": current}, default=str))
+        return payloads
+
+    def _compress(self, item: list) -> Optional[str]:
+        raw = json.dumps({"o": self.node_id, "m": [item]}, default=str).encode("utf-8")
+        payload = "z" + base64.b64encode(zlib.compress(raw, 6)).decode("ascii")
+        if len(payload) > MAX_PAYLOAD_BYTES:
+            self.dropped += 1
+            logger.warning(f"Backplane message on {item[0]!r} is too large to forward ({len(raw)} bytes)")
+            return None
+        self.compressed += 1
+        return payload
+
+    def _notify(self, payloads: List[str]):
+        import psycopg2
+
+        with self._send_lock:
+            if self._send_conn is None or self._send_conn.closed:
+                self._send_conn = psycopg2.connect(self.dsn)
+            with self._send_conn.cursor() as cursor:
+                for payload in payloads:
+                    cursor.execute("SELECT pg_notify(%s, %s)", (self.pg_channel, payload))
+            # Notifications are delivered when the transaction commits
+            self._send_conn.commit()
+
+    def _close_send_conn(self):
+        with self._send_lock:
+            if self._send_conn is not None:
+                try:
+                    self._send_conn.close()
+                except Exception:
+                    pass
+                self._send_conn = None
+
+    # Incoming
+
+    def _listen(self):
+        """Dedicated LISTEN connection, run in a background thread"""
+        import psycopg2
+        import psycopg2.extensions
+
+        backoff = 1
+        while not self._stopping.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(self.dsn)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.pg_channel}")
+                logger.info(f"Backplane listening on PostgreSQL channel {self.pg_channel!r}")
+                backoff = 1
+                while not self._stopping.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        self._loop.call_soon_threadsafe(self._receive, notify.payload)
+            except Exception as e:
+                if self._stopping.is_set():
+                    break
+                logger.warning(f"Backplane listener connection lost, retrying in {backoff}s: {e}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def _receive(self, payload: str):
+        try:
+            if payload.startswith("z"):
+                payload = zlib.decompress(base64.b64decode(payload[1:])).decode("utf-8")
+            else:
+                payload = payload[1:]
+            envelope = json.loads(payload)
+        except Exception as e:
+            logger.warning(f"Ignoring malformed backplane payload: {e}")
+            return
+        # Our own messages were already dispatched locally when published
+        if envelope.get("o") == self.node_id:
+            return
+        for channel, message in envelope.get("m", ()):
+            self.received += 1
+            self._dispatch(channel, message)
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._outbox_ready = asyncio.Event()
+        self._stopping.clear()
+        self._flusher = self._loop.create_task(self._flush_loop())
+        self._listener = threading.Thread(target=self._listen, name="backplane-listener", daemon=True)
+        self._listener.start()
+
+    async def stop(self):
+        self._stopping.set()
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        # Give pending messages (e.g. the shutdown presence update) one last chance to go out
+        if self._outbox:
+            payloads = self._encode(self._outbox)
+            self._outbox = []
+            try:
+                await asyncio.to_thread(self._notify, payloads)
+            except Exception as e:
+                logger.warning(f"Backplane final flush failed: {e}")
+        if self._listener is not None:
+            await asyncio.to_thread(self._listener.join, 5)
+            self._listener = None
+        self._close_send_conn()
+        self._loop = None
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "backend": "postgres",
+            "pg_channel": self.pg_channel,
+            "flush_ms": self.flush_seconds * 1000,
+            "pending": len(self._outbox),
+            "notifies_sent": self.notifies_sent,
+            "compressed": self.compressed,
+            "dropped": self.dropped,
+        }
+
+
+def create_backplane() -> Backplane:
+    if BACKPLANE == "postgres":
+        from sqlalchemy.engine import make_url
+        from app.database import DATABASE_URL
+
+        # psycopg2 wants a plain libpq URL, without SQLAlchemy's "+driver" suffix
+        dsn = make_url(DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        return PostgresBackplane(dsn)
+    if BACKPLANE != "memory":
+        raise ValueError(f"Unknown BACKPLANE {BACKPLANE!r}, expected 'memory' or 'postgres'")
+    return Backplane()
+
+
+# Global backplane, started and stopped by the lifespan in main.py
+backplane = create_backplane()
@@ -0,0 +1,359 @@
+"""
+Call signaling state shared by all workers.
+
+The user and the agent of a call may be connected to different workers, so
+who is in which call lives in a table every worker keeps a copy of, updated
+over the backplane, and signaling messages are relayed through the
+backplane to whichever worker owns the peer's socket.
+
+Each worker re-announces its own participants every
+CALL_SESSION_HEARTBEAT_SECONDS. Entries that are not refreshed within
+CALL_SESSION_TTL_SECONDS (e.g. because their worker crashed) are ignored
+and purged, so they can't leave ghost calls behind.
+
+Trickle-ICE candidates from one peer are held for CALL_ICE_BATCH_MS and
+relayed together. Peers that connected with batch_ice=1 get them as a
+single "ice-candidates" frame; other peers still get one "ice-candidate"
+frame per candidate.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from app.core.backplane import Backplane, backplane
+from app.core.constants import (
+    CALL_ICE_BATCH_MS,
+    CALL_SESSION_HEARTBEAT_SECONDS,
+    CALL_SESSION_TTL_SECONDS,
+    WS_SEND_TIMEOUT_SECONDS,
+)
+from app.core.shutdown import shutdown, close_for_restart
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class CallParticipant:
+    """One side of a call, as every worker sees it"""
+    conn_id: str
+    node: str
+    user_id: int
+    user_name: str
+    expires_at: float
+    batch_ice: bool = False
+
+
+@dataclass(slots=True, eq=False)
+class LocalParticipant:
+    """A call socket owned by this worker. Frames go out in order through one writer task."""
+    conn_id: str
+    websocket: Any
+    ticket_id: int
+    role: str
+    user_id: int
+    user_name: str
+    queue: asyncio.Queue
+    batch_ice: bool = False
+    writer: Optional[asyncio.Task] = None
+    # ICE candidates waiting for the batching window to close
+    pending_candidates: List[dict] = field(default_factory=list)
+    flush_handle: Optional[asyncio.TimerHandle] = None
+
+
+class CallSessionStore:
+    def __init__(
+        self,
+        backplane: Backplane,
+        ttl_seconds: float = CALL_SESSION_TTL_SECONDS,
+        heartbeat_seconds: float = CALL_SESSION_HEARTBEAT_SECONDS,
+        ice_batch_ms: float = CALL_ICE_BATCH_MS,
+        send_timeout: float = WS_SEND_TIMEOUT_SECONDS,
+    ):
+        self.backplane = backplane
+        self.ttl_seconds = ttl_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.ice_batch_seconds = ice_batch_ms / 1000
+        self.send_timeout = send_timeout
+        # ticket_id -> role ("user" / "agent") -> participant, on any worker
+        self.sessions: Dict[int, Dict[str, CallParticipant]] = {}
+        # conn_id -> socket owned by this worker
+        self.local: Dict[str, LocalParticipant] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.relayed = 0
+        self.delivered = 0
+        self.expired = 0
+        # Signaling metrics: messages received per type, candidate frames relayed, undeliverable signals
+        self.signals: Counter = Counter()
+        self.candidate_frames = 0
+        self.failures = 0
+        backplane.subscribe("call.presence", self._on_presence)
+        backplane.subscribe("call.signal", self._on_signal)
+
+    # Session table
+
+    def _record(self, ticket_id: int, role: str, participant: CallParticipant):
+        self.sessions.setdefault(ticket_id, {})[role] = participant
+
+    def _forget(self, ticket_id: int, role: str, conn_id: str) -> bool:
+        """Remove a participant, unless the role has since been taken by another connection"""
+        call = self.sessions.get(ticket_id)
+        if not call or role not in call or call[role].conn_id != conn_id:
+            return False
+        del call[role]
+        if not call:
+            del self.sessions[ticket_id]
+        return True
+
+    def peer(self, ticket_id: int, role: str) -> Optional[CallParticipant]:
+        """The live participant in a role, or None"""
+        participant = self.sessions.get(ticket_id, {}).get(role)
+        if participant is None or participant.expires_at < time.monotonic():
+            return None
+        return participant
+
+    def participants(self, ticket_id: int) -> List[str]:
+        """Roles currently connected to a ticket's call"""
+        return [role for role in ("user", "agent") if self.peer(ticket_id, role) is not None]
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        for ticket_id in list(self.sessions):
+            call = self.sessions[ticket_id]
+            for role in [role for role, participant in call.items() if participant.expires_at < now]:
+                del call[role]
+                self.expired += 1
+            if not call:
+                del self.sessions[ticket_id]
+
+    # Local sockets
+
+    async def join(
+        self, websocket, ticket_id: int, role: str, user_id: int, user_name: str, batch_ice: bool = False
+    ) -> str:
+        """Register a socket owned by this worker and announce it to the others"""
+        conn_id = uuid.uuid4().hex
+        local = LocalParticipant(conn_id, websocket, ticket_id, role, user_id, user_name, asyncio.Queue(), batch_ice)
+        local.writer = asyncio.create_task(self._write_loop(local))
+        self.local[conn_id] = local
+        self._record(ticket_id, role, self._participant(local))
+        self._announce("join", local)
+        return conn_id
+
+    def leave(self, conn_id: str) -> bool:
+        """Drop a local socket. True if it was still the call's participant for its role."""
+        local = self.local.pop(conn_id, None)
+        if local is None:
+            return False
+        if local.writer is not None:
+            local.writer.cancel()
+        if local.flush_handle is not None:
+            local.flush_handle.cancel()
+        current = self._forget(local.ticket_id, local.role, conn_id)
+        if current:
+            self._announce("leave", local)
+        return current
+
+    def reply(self, conn_id: str, message: dict):
+        """Queue a frame for a socket owned by this worker"""
+        local = self.local.get(conn_id)
+        if local is not None:
+            local.queue.put_nowait(message)
+
+    def send(self, ticket_id: int, role: str, message: dict) -> bool:
+        """Relay a frame to whoever holds a role in a call, on any worker. False if nobody does."""
+        participant = self.peer(ticket_id, role)
+        if participant is None:
+            return False
+        self._relay(participant, [message])
+        return True
+
+    def _relay(self, participant: CallParticipant, messages: List[dict]):
+        self.relayed += len(messages)
+        self.backplane.publish("call.signal", {"conn": participant.conn_id, "messages": messages})
+
+    def count_signal(self, message_type: Optional[str]):
+        self.signals[message_type or "unknown"] += 1
+
+    def peer_missing(self, conn_id: str):
+        """A signal couldn't be delivered because the other side isn't connected"""
+        self.failures += 1
+        self.reply(conn_id, {"type": "error", "message": "Peer not connected"})
+
+    def send_candidate(self, conn_id: str, message: dict):
+        """Queue an ICE candidate for the other peer; candidates go out together after the batching window"""
+        local = self.local.get(conn_id)
+        if local is None:
+            return
+        local.pending_candidates.append(message)
+        if self.ice_batch_seconds <= 0:
+            self._flush_candidates(local)
+        elif local.flush_handle is None:
+            local.flush_handle = asyncio.get_running_loop().call_later(
+                self.ice_batch_seconds, self._flush_candidates, local
+            )
+
+    def flush_candidates(self, conn_id: str):
+        """Send buffered candidates now, so they stay ahead of the signal that follows them"""
+        local = self.local.get(conn_id)
+        if local is not None and local.pending_candidates:
+            if local.flush_handle is not None:
+                local.flush_handle.cancel()
+            self._flush_candidates(local)
+
+    def _flush_candidates(self, local: LocalParticipant):
+        local.flush_handle = None
+        candidates, local.pending_candidates = local.pending_candidates, []
+        if not candidates or self.local.get(local.conn_id) is not local:
+            return
+        participant = self.peer(local.ticket_id, "agent" if local.role == "user" else "user")
+        if participant is None:
+            self.peer_missing(local.conn_id)
+            return
+        if participant.batch_ice:
+            first = candidates[0]
+            candidates = [{
+                "type": "ice-candidates",
+                "candidates": [candidate.get("candidate") for candidate in candidates],
+                "from": first.get("from"),
+                "fromUserId": first.get("fromUserId"),
+                "fromUserName": first.get("fromUserName"),
+            }]
+        self.candidate_frames += len(candidates)
+        self._relay(participant, candidates)
+
+    async def _write_loop(self, local: LocalParticipant):
+        while True:
+            message = await local.queue.get()
+            try:
+                await local.websocket.send_json(message)
+            except Exception as e:
+                # The receive loop notices the disconnect and cleans up
+                logger.debug(f"Dropping call frames for {local.conn_id}: {e}")
+                return
+            finally:
+                local.queue.task_done()
+
+    def _participant(self, local: LocalParticipant) -> CallParticipant:
+        return CallParticipant(
+            local.conn_id,
+            self.backplane.node_id,
+            local.user_id,
+            local.user_name,
+            time.monotonic() + self.ttl_seconds,
+            local.batch_ice,
+        )
+
+    # Backplane
+
+    def _announce(self, op: str, local: LocalParticipant):
+        self.backplane.publish("call.presence", {
+            "op": op,
+            "node": self.backplane.node_id,
+            "ticket_id": local.ticket_id,
+            "role": local.role,
+            "conn": local.conn_id,
+            "user_id": local.user_id,
+            "user_name": local.user_name,
+            "batch_ice": local.batch_ice,
+        })
+
+    def _on_presence(self, event: dict):
+        node = event["node"]
+        if node == self.backplane.node_id:
+            return
+        op = event["op"]
+        if op == "join":
+            self._record(event["ticket_id"], event["role"], CallParticipant(
+                event["conn"], node, event["user_id"], event["user_name"], time.monotonic() + self.ttl_seconds,
+                event.get("batch_ice", False),
+            ))
+        elif op == "leave":
+            self._forget(event["ticket_id"], event["role"], event["conn"])
+        elif op == "node_down":
+            for ticket_id in list(self.sessions):
+                for role, participant in list(self.sessions[ticket_id].items()):
+                    if participant.node == node:
+                        self._forget(ticket_id, role, participant.conn_id)
+        elif op == "sync":
+            for local in self.local.values():
+                self._announce("join", local)
+
+    def _on_signal(self, event: dict):
+        local = self.local.get(event["conn"])
+        if local is None:
+            return
+        for message in event["messages"]:
+            self.delivered += 1
+            local.queue.put_nowait(message)
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            for local in list(self.local.values()):
+                participant = self.sessions.get(local.ticket_id, {}).get(local.role)
+                if participant is not None and participant.conn_id == local.conn_id:
+                    participant.expires_at = time.monotonic() + self.ttl_seconds
+                    self._announce("join", local)
+            self._purge_expired()
+
+    def start(self):
+        """Start the heartbeat and ask the other workers for their calls"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+            self.backplane.publish("call.presence", {"op": "sync", "node": self.backplane.node_id})
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _flush_and_close(self, local: LocalParticipant):
+        # Let queued signaling and ICE frames go out before the reconnect hint
+        try:
+            await asyncio.wait_for(local.queue.join(), timeout=self.send_timeout)
+        except asyncio.TimeoutError:
+            pass
+        if local.writer is not None:
+            local.writer.cancel()
+        await close_for_restart(local.websocket)
+
+    async def drain(self):
+        """Flush every call socket's frames, then tell both peers to reconnect later and close (graceful shutdown)"""
+        # Candidates still in their batching window go to the peer now, while it can be found
+        for local in list(self.local.values()):
+            self.flush_candidates(local.conn_id)
+        self.backplane.publish("call.presence", {"op": "node_down", "node": self.backplane.node_id})
+        connections = list(self.local.values())
+        self.local = {}
+        self.sessions = {}
+        await asyncio.gather(*(self._flush_and_close(local) for local in connections))
+        logger.info(f"Drained {len(connections)} call signaling connections")
+
+    def stats(self) -> dict:
+        return {
+            "calls": len(self.sessions),
+            "participants": sum(len(call) for call in self.sessions.values()),
+            "local_connections": len(self.local),
+            "relayed": self.relayed,
+            "delivered": self.delivered,
+            "expired": self.expired,
+            "ttl_seconds": self.ttl_seconds,
+            "signals": dict(self.signals),
+            "candidate_frames": self.candidate_frames,
+            "ice_batch_ms": self.ice_batch_seconds * 1000,
+            "failures": self.failures,
+        }
+
+
+# Global call session store, heartbeat started by the lifespan in main.py
+call_sessions = CallSessionStore(backplane)
+shutdown.register(call_sessions.drain)
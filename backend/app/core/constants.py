@@ -1,7 +1,91 @@
+import os
+from dotenv import load_dotenv
 
+load_dotenv()
 
 # constants for security
 SECRET_KEY = "secret_key_to_change_in_production"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60*24*2
 
+# database diagnostics
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() == "true"
+SLOW_QUERY_LOG_ENABLED = os.getenv("SLOW_QUERY_LOG_ENABLED", "false").lower() == "true"
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_SAMPLE_RATE", "1.0"))
+SLOW_QUERY_MAX_PER_MINUTE = int(os.getenv("SLOW_QUERY_MAX_PER_MINUTE", "30"))
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "200"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+SLOW_QUERY_LOG_FILE = os.getenv("SLOW_QUERY_LOG_FILE", "slow_queries.jsonl")
+
+# graceful shutdown
+SHUTDOWN_DRAIN_TIMEOUT_SECONDS = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT_SECONDS", "10"))
+RECONNECT_AFTER_MIN_MS = int(os.getenv("RECONNECT_AFTER_MIN_MS", "1000"))
+RECONNECT_AFTER_MAX_MS = int(os.getenv("RECONNECT_AFTER_MAX_MS", "15000"))
+
+# websocket delivery
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "100"))
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "5"))
+WS_SLOW_CONSUMER_POLICY = os.getenv("WS_SLOW_CONSUMER_POLICY", "drop_oldest")
+TICKET_ROUTE_TTL_SECONDS = float(os.getenv("TICKET_ROUTE_TTL_SECONDS", "60"))
+TICKET_ROUTE_MAX_SIZE = int(os.getenv("TICKET_ROUTE_MAX_SIZE", "50000"))
+
+# cross-worker backplane
+BACKPLANE = os.getenv("BACKPLANE", "memory").lower()
+BACKPLANE_FLUSH_MS = float(os.getenv("BACKPLANE_FLUSH_MS", "10"))
+BACKPLANE_PG_CHANNEL = os.getenv("BACKPLANE_PG_CHANNEL", "helpdesk_backplane")
+CALL_SESSION_TTL_SECONDS = float(os.getenv("CALL_SESSION_TTL_SECONDS", "30"))
+CALL_SESSION_HEARTBEAT_SECONDS = float(os.getenv("CALL_SESSION_HEARTBEAT_SECONDS", "10"))
+CHAT_PRESENCE_TTL_SECONDS = float(os.getenv("CHAT_PRESENCE_TTL_SECONDS", "30"))
+CHAT_PRESENCE_HEARTBEAT_SECONDS = float(os.getenv("CHAT_PRESENCE_HEARTBEAT_SECONDS", "10"))
+
+# call signaling
+CALL_ICE_BATCH_MS = float(os.getenv("CALL_ICE_BATCH_MS", "20"))
+CALL_SIGNAL_LOG_SAMPLE_RATE = float(os.getenv("CALL_SIGNAL_LOG_SAMPLE_RATE", "0.01"))
+
+# notifications
+NOTIFICATION_COPY_THRESHOLD = int(os.getenv("NOTIFICATION_COPY_THRESHOLD", "500"))
+NOTIFICATION_COUNTER_RECONCILE_SECONDS = float(os.getenv("NOTIFICATION_COUNTER_RECONCILE_SECONDS", "3600"))
+NOTIFICATION_COUNTER_RECONCILE_BATCH = int(os.getenv("NOTIFICATION_COUNTER_RECONCILE_BATCH", "500"))
+NOTIFICATION_COALESCE_WINDOW_SECONDS = float(os.getenv("NOTIFICATION_COALESCE_WINDOW_SECONDS", "300"))
+NOTIFICATION_DIGEST_WINDOW_SECONDS = float(os.getenv("NOTIFICATION_DIGEST_WINDOW_SECONDS", "0"))
+NOTIFICATION_COALESCE_MAX_COUNT = int(os.getenv("NOTIFICATION_COALESCE_MAX_COUNT", "20"))
+NOTIFICATION_RETENTION_READ_DAYS = float(os.getenv("NOTIFICATION_RETENTION_READ_DAYS", "30"))
+NOTIFICATION_RETENTION_UNREAD_DAYS = float(os.getenv("NOTIFICATION_RETENTION_UNREAD_DAYS", "180"))
+NOTIFICATION_PURGE_INTERVAL_SECONDS = float(os.getenv("NOTIFICATION_PURGE_INTERVAL_SECONDS", "3600"))
+NOTIFICATION_PURGE_BATCH_SIZE = int(os.getenv("NOTIFICATION_PURGE_BATCH_SIZE", "1000"))
+NOTIFICATION_PURGE_PAUSE_MS = float(os.getenv("NOTIFICATION_PURGE_PAUSE_MS", "200"))
+NOTIFICATION_ETAG_TTL_SECONDS = float(os.getenv("NOTIFICATION_ETAG_TTL_SECONDS", "300"))
+NOTIFICATION_ETAG_MAX_SIZE = int(os.getenv("NOTIFICATION_ETAG_MAX_SIZE", "10000"))
+
+# chat message history
+MESSAGE_PAGE_SIZE = int(os.getenv("MESSAGE_PAGE_SIZE", "50"))
+MESSAGE_PAGE_MAX_SIZE = int(os.getenv("MESSAGE_PAGE_MAX_SIZE", "200"))
+
+# domain event outbox
+EVENT_WORKERS = int(os.getenv("EVENT_WORKERS", "2"))
+EVENT_BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", "50"))
+EVENT_POLL_INTERVAL_SECONDS = float(os.getenv("EVENT_POLL_INTERVAL_SECONDS", "1"))
+EVENT_MAX_ATTEMPTS = int(os.getenv("EVENT_MAX_ATTEMPTS", "5"))
+EVENT_RETRY_BASE_SECONDS = float(os.getenv("EVENT_RETRY_BASE_SECONDS", "2"))
+EVENT_RETENTION_HOURS = float(os.getenv("EVENT_RETENTION_HOURS", "24"))
+
+# authenticated principal cache
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "10000"))
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "10000"))
+
+# token revocation
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", "30"))
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "10000"))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+
+# password hashing
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# API worker processes on this host, exported by `start.py --prod`. The default
+# pool size splits the CPUs between them instead of giving each worker its own set.
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", str(max(1, min(4, (os.cpu_count() or 1) // WEB_CONCURRENCY)))))
+PASSWORD_POOL_MAX_PENDING = int(os.getenv("PASSWORD_POOL_MAX_PENDING", str(PASSWORD_POOL_WORKERS * 8)))
+PASSWORD_POOL_ACQUIRE_TIMEOUT_MS = float(os.getenv("PASSWORD_POOL_ACQUIRE_TIMEOUT_MS", "100"))
+PASSWORD_POOL_RETRY_AFTER_SECONDS = int(os.getenv("PASSWORD_POOL_RETRY_AFTER_SECONDS", "2"))
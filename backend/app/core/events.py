@@ -0,0 +1,291 @@
+"""
+Domain events with a transactional outbox.
+
+Operations call publish(db, SomeEvent(...)) instead of doing side effects
+inline. The event is written to the event_outbox table in the caller's
+transaction, so it exists exactly when the change it describes was
+committed, and the request returns without waiting for the side effects.
+
+EVENT_WORKERS consumer tasks per process claim pending events with
+SELECT ... FOR UPDATE SKIP LOCKED (so several workers never process the
+same event), run every handler subscribed to the event type inside one
+savepoint, and mark the event done. A failed event is retried with
+exponential backoff and marked failed after EVENT_MAX_ATTEMPTS. Consumers
+are woken right after a commit that published events, and otherwise poll
+every EVENT_POLL_INTERVAL_SECONDS to pick up other workers' events.
+"""
+
+import asyncio
+import dataclasses
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, ClassVar, Dict, List, Optional, Type
+
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session
+
+from app.core.constants import (
+    EVENT_BATCH_SIZE,
+    EVENT_MAX_ATTEMPTS,
+    EVENT_POLL_INTERVAL_SECONDS,
+    EVENT_RETENTION_HOURS,
+    EVENT_RETRY_BASE_SECONDS,
+    EVENT_WORKERS,
+)
+from app.database import SessionLocal
+from app.models.outbox_event import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+
+class Event:
+    """Base class for domain events. Subclasses are dataclasses of JSON-friendly fields."""
+    types: ClassVar[Dict[str, Type["Event"]]] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        Event.types[cls.__name__] = cls
+
+
+@dataclasses.dataclass(frozen=True)
+class TicketCreated(Event):
+    ticket_id: int
+    agent_id: Optional[int]
+
+
+@dataclasses.dataclass(frozen=True)
+class TicketAssigned(Event):
+    """An admin assigned, reassigned or unassigned a ticket"""
+    ticket_id: int
+    agent_id: Optional[int]
+    old_agent_id: Optional[int]
+
+
+@dataclasses.dataclass(frozen=True)
+class StatusChanged(Event):
+    ticket_id: int
+    old_status: str
+    new_status: str
+
+
+@dataclasses.dataclass(frozen=True)
+class TicketReopened(Event):
+    ticket_id: int
+    # Events published before this field existed have none
+    reopened_by: Optional[int] = None
+
+
+@dataclasses.dataclass(frozen=True)
+class TicketClosed(Event):
+    ticket_id: int
+    agent_id: int
+
+
+@dataclasses.dataclass(frozen=True)
+class TransferRequested(Event):
+    ticket_id: int
+    from_agent_id: int
+    to_agent_id: int
+
+
+@dataclasses.dataclass(frozen=True)
+class TransferApproved(Event):
+    ticket_id: int
+    from_agent_id: int
+    to_agent_id: int
+    old_agent_id: Optional[int]
+
+
+@dataclasses.dataclass(frozen=True)
+class NoteAdded(Event):
+    ticket_id: int
+    agent_id: int
+
+
+Handler = Callable[[Session, Event], None]
+
+
+def publish(db: Session, event: Event) -> None:
+    """Add an event to the caller's transaction. Handlers run after it commits."""
+    db.add(OutboxEvent(type=type(event).__name__, payload=dataclasses.asdict(event)))
+    db.info["published_events"] = True
+
+
+class EventBus:
+    def __init__(
+        self,
+        workers: int = EVENT_WORKERS,
+        batch_size: int = EVENT_BATCH_SIZE,
+        poll_interval_seconds: float = EVENT_POLL_INTERVAL_SECONDS,
+        max_attempts: int = EVENT_MAX_ATTEMPTS,
+        retry_base_seconds: float = EVENT_RETRY_BASE_SECONDS,
+        retention_hours: float = EVENT_RETENTION_HOURS,
+    ):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval_seconds = poll_interval_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retention = timedelta(hours=retention_hours)
+        self._handlers: Dict[Type[Event], List[Handler]] = defaultdict(list)
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._last_purge = 0.0
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.retried = 0
+        self.failed = 0
+        self.last_lag_ms = 0.0
+
+    def subscribe(self, event_type: Type[Event], handler: Handler):
+        """Call handler(db, event) for every committed event of this type"""
+        self._handlers[event_type].append(handler)
+
+    def wake(self):
+        """Start consuming now instead of at the next poll (safe from any thread)"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    # Consuming
+
+    def _process_batch(self) -> int:
+        """Claim and handle one batch of due events. Runs in a worker thread."""
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            events = (
+                db.query(OutboxEvent)
+                .filter(OutboxEvent.status == "pending", OutboxEvent.available_at <= now)
+                .order_by(OutboxEvent.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            for outbox_event in events:
+                self._handle(db, outbox_event)
+            db.commit()
+            return len(events)
+        finally:
+            db.close()
+
+    def _handle(self, db: Session, outbox_event: OutboxEvent):
+        event_type = Event.types.get(outbox_event.type)
+        try:
+            if event_type is None:
+                raise LookupError(f"Unknown event type {outbox_event.type!r}")
+            event = event_type(**outbox_event.payload)
+            # All handlers succeed or none do, so a retry doesn't repeat half the work
+            with db.begin_nested():
+                for handler in self._handlers.get(event_type, ()):
+                    handler(db, event)
+        except Exception as e:
+            outbox_event.attempts += 1
+            outbox_event.last_error = f"{type(e).__name__}: {e}"[:2000]
+            if outbox_event.attempts >= self.max_attempts:
+                outbox_event.status = "failed"
+                outbox_event.processed_at = datetime.utcnow()
+                with self._lock:
+                    self.failed += 1
+                logger.error(f"Event {outbox_event.type} #{outbox_event.id} failed permanently: {e}")
+            else:
+                delay = self.retry_base_seconds * 2 ** (outbox_event.attempts - 1)
+                outbox_event.available_at = datetime.utcnow() + timedelta(seconds=delay)
+                with self._lock:
+                    self.retried += 1
+                logger.warning(f"Event {outbox_event.type} #{outbox_event.id} failed, retrying in {delay:.0f}s: {e}")
+            return
+
+        outbox_event.status = "done"
+        outbox_event.processed_at = datetime.utcnow()
+        with self._lock:
+            self.processed += 1
+            self.last_lag_ms = (outbox_event.processed_at - outbox_event.created_at).total_seconds() * 1000
+
+    def _purge(self):
+        """Delete handled events older than EVENT_RETENTION_HOURS (failed ones are kept for inspection)"""
+        db = SessionLocal()
+        try:
+            deleted = db.query(OutboxEvent).filter(
+                OutboxEvent.status == "done",
+                OutboxEvent.processed_at < datetime.utcnow() - self.retention,
+            ).delete(synchronize_session=False)
+            db.commit()
+            if deleted:
+                logger.info(f"Purged {deleted} handled events from the outbox")
+        finally:
+            db.close()
+
+    async def _run(self, worker: int):
+        while True:
+            try:
+                handled = await asyncio.to_thread(self._process_batch)
+            except Exception as e:
+                logger.warning(f"Event consumer {worker} could not process the outbox: {e}")
+                handled = 0
+            if handled >= self.batch_size:
+                # More may be waiting
+                continue
+            if worker == 0 and time.monotonic() - self._last_purge > 3600:
+                self._last_purge = time.monotonic()
+                try:
+                    await asyncio.to_thread(self._purge)
+                except Exception as e:
+                    logger.warning(f"Could not purge the event outbox: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self):
+        """Start the consumer tasks on the running event loop"""
+        if self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [self._loop.create_task(self._run(worker)) for worker in range(self.workers)]
+
+    async def stop(self):
+        self._loop = None
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": len(self._tasks),
+                "subscribers": {event_type.__name__: len(handlers) for event_type, handlers in self._handlers.items()},
+                "processed": self.processed,
+                "retried": self.retried,
+                "failed": self.failed,
+                "last_lag_ms": round(self.last_lag_ms, 1),
+            }
+
+
+# Global event bus, consumers started by the lifespan in main.py
+event_bus = EventBus()
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _wake_consumers(session: Session):
+    # Releasing a savepoint fires this too; the events are visible only after the outer commit
+    if session.in_nested_transaction():
+        return
+    if session.info.pop("published_events", False):
+        event_bus.wake()
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _forget_published(session: Session):
+    if not session.in_nested_transaction():
+        session.info.pop("published_events", None)
@@ -0,0 +1,176 @@
+"""
+Reconciler for the per-user notification counters.
+
+notification_counters holds each user's total and unread notification
+count. The notification operations adjust it in the same transaction as
+every insert, mark-read and delete, so /notifications/stats never has to
+count rows. Anything that changes notifications behind their back (manual
+SQL, a cascade delete) would make the counters drift, so every
+NOTIFICATION_COUNTER_RECONCILE_SECONDS this recounts all users in batches
+of NOTIFICATION_COUNTER_RECONCILE_BATCH and corrects the rows that differ.
+The first pass runs at startup and also fills in missing rows.
+"""
+
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.constants import (
+    NOTIFICATION_COUNTER_RECONCILE_BATCH,
+    NOTIFICATION_COUNTER_RECONCILE_SECONDS,
+)
+from app.core.notification_versions import notification_versions, user_key
+from app.database import SessionLocal
+from app.models.notification import Notification
+from app.models.notification_counter import NotificationCounter
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+def count_notifications(db: Session, user_ids: Iterable[int]) -> Dict[int, Tuple[int, int]]:
+    """(total, unread) per user, counted from the notifications table. Users without notifications are left out."""
+    rows = (
+        db.query(
+            Notification.user_id,
+            func.count(Notification.id),
+            func.count(Notification.id).filter(Notification.is_read == False),
+        )
+        .filter(Notification.user_id.in_(list(user_ids)))
+        .group_by(Notification.user_id)
+        .all()
+    )
+    return {user_id: (total, unread) for user_id, total, unread in rows}
+
+
+class NotificationCounterReconciler:
+    def __init__(
+        self,
+        interval_seconds: float = NOTIFICATION_COUNTER_RECONCILE_SECONDS,
+        batch_size: int = NOTIFICATION_COUNTER_RECONCILE_BATCH,
+    ):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.checked = 0
+        self.corrected = 0
+        self.created = 0
+        self.last_run: Optional[datetime] = None
+        self.last_duration_ms = 0.0
+
+    def _reconcile_batch(self, db: Session, user_ids: list) -> Tuple[int, int]:
+        """Recount one batch of users. Returns (corrected, created)."""
+        # Locking the counter rows waits out transactions that are adjusting them,
+        # and holds back new ones until the recount is written
+        counters = {
+            counter.user_id: counter
+            for counter in db.query(NotificationCounter)
+            .filter(NotificationCounter.user_id.in_(user_ids))
+            .order_by(NotificationCounter.user_id)
+            .with_for_update()
+        }
+        actual = count_notifications(db, user_ids)
+
+        corrected = []
+        missing = []
+        for user_id in user_ids:
+            total, unread = actual.get(user_id, (0, 0))
+            counter = counters.get(user_id)
+            if counter is None:
+                missing.append({"user_id": user_id, "total": total, "unread": unread})
+            elif (counter.total, counter.unread) != (total, unread):
+                logger.info(
+                    f"Notification counters of user {user_id} drifted: "
+                    f"{counter.total}/{counter.unread} counted {total}/{unread}"
+                )
+                counter.total, counter.unread = total, unread
+                corrected.append(user_id)
+        if missing:
+            # Rows created meanwhile by a notification insert already include it
+            db.execute(pg_insert(NotificationCounter).values(missing).on_conflict_do_nothing(
+                index_elements=[NotificationCounter.user_id]
+            ))
+        db.commit()
+        # Cached /notifications/stats responses of these users are stale
+        notification_versions.bump(user_key(user_id) for user_id in corrected)
+        return len(corrected), len(missing)
+
+    def reconcile(self):
+        """Recount every user's notifications, one committed batch at a time"""
+        started = datetime.utcnow()
+        checked = corrected = created = 0
+        last_id = 0
+        db = SessionLocal()
+        try:
+            while True:
+                user_ids = [
+                    user_id for (user_id,) in db.query(User.id)
+                    .filter(User.id > last_id)
+                    .order_by(User.id)
+                    .limit(self.batch_size)
+                ]
+                if not user_ids:
+                    break
+                batch_corrected, batch_created = self._reconcile_batch(db, user_ids)
+                checked += len(user_ids)
+                corrected += batch_corrected
+                created += batch_created
+                last_id = user_ids[-1]
+        finally:
+            db.close()
+            with self._lock:
+                self.runs += 1
+                self.checked += checked
+                self.corrected += corrected
+                self.created += created
+                self.last_run = started
+                self.last_duration_ms = (datetime.utcnow() - started).total_seconds() * 1000
+        if corrected or created:
+            logger.info(f"Reconciled notification counters: {corrected} corrected, {created} created")
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.reconcile)
+            except Exception as e:
+                logger.warning(f"Could not reconcile notification counters: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        """Start the periodic reconcile on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "interval_seconds": self.interval_seconds,
+                "batch_size": self.batch_size,
+                "runs": self.runs,
+                "checked": self.checked,
+                "corrected": self.corrected,
+                "created": self.created,
+                "last_run": self.last_run.isoformat() if self.last_run else None,
+                "last_duration_ms": round(self.last_duration_ms, 1),
+            }
+
+
+# Global reconciler, started by the lifespan in main.py
+notification_counters = NotificationCounterReconciler()
@@ -0,0 +1,177 @@
+"""
+Notification retention.
+
+Every NOTIFICATION_PURGE_INTERVAL_SECONDS this deletes read notifications
+older than NOTIFICATION_RETENTION_READ_DAYS, and unread notifications and
+broadcasts older than NOTIFICATION_RETENTION_UNREAD_DAYS. Rows are deleted
+NOTIFICATION_PURGE_BATCH_SIZE at a time, one short transaction per batch,
+with a NOTIFICATION_PURGE_PAUSE_MS pause in between so no lock is held for
+long and replicas can keep up. The users' counters are adjusted in the same
+transaction as each batch.
+
+Each batch takes a transaction-level advisory lock, so when several workers
+run the job only one of them purges at a time; the others skip the pass.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.constants import (
+    NOTIFICATION_PURGE_BATCH_SIZE,
+    NOTIFICATION_PURGE_INTERVAL_SECONDS,
+    NOTIFICATION_PURGE_PAUSE_MS,
+    NOTIFICATION_RETENTION_READ_DAYS,
+    NOTIFICATION_RETENTION_UNREAD_DAYS,
+)
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# pg_try_advisory_xact_lock key shared by all workers
+PURGE_LOCK_KEY = 0x6E6F7469  # "noti"
+
+
+class NotificationRetention:
+    def __init__(
+        self,
+        read_days: float = NOTIFICATION_RETENTION_READ_DAYS,
+        unread_days: float = NOTIFICATION_RETENTION_UNREAD_DAYS,
+        interval_seconds: float = NOTIFICATION_PURGE_INTERVAL_SECONDS,
+        batch_size: int = NOTIFICATION_PURGE_BATCH_SIZE,
+        pause_ms: float = NOTIFICATION_PURGE_PAUSE_MS,
+    ):
+        self.read_days = read_days
+        self.unread_days = unread_days
+        self.read_retention = timedelta(days=read_days)
+        self.unread_retention = timedelta(days=unread_days)
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.pause_seconds = pause_ms / 1000
+        self._task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.skipped = 0
+        self.batches = 0
+        self.purged = 0
+        self.purged_broadcasts = 0
+        self.seconds_spent = 0.0
+        self.last_run: Optional[datetime] = None
+        self.last_purged = 0
+        self.last_duration_ms = 0.0
+
+    def _locked(self, db: Session) -> bool:
+        """Take the purge lock for this transaction. False if another worker holds it."""
+        return db.execute(select(func.pg_try_advisory_xact_lock(PURGE_LOCK_KEY))).scalar()
+
+    def _purge_batch(self, broadcasts: bool) -> Optional[int]:
+        """Delete one batch in its own transaction. None if another worker is purging."""
+        # Imported here: the operations module pulls in the WebSocket manager
+        from app.operations.notification import purge_broadcasts, purge_notifications
+
+        db = SessionLocal()
+        try:
+            if not self._locked(db):
+                return None
+            now = datetime.utcnow()
+            if broadcasts:
+                deleted = purge_broadcasts(db, now - self.unread_retention, self.batch_size)
+            else:
+                deleted = purge_notifications(
+                    db, now - self.read_retention, now - self.unread_retention, self.batch_size
+                )
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+
+    async def purge(self):
+        """Run one retention pass, batch by batch"""
+        started = time.monotonic()
+        purged = purged_broadcasts = batches = 0
+        skipped = False
+        try:
+            for broadcasts in (False, True):
+                while True:
+                    deleted = await asyncio.to_thread(self._purge_batch, broadcasts)
+                    if deleted is None:
+                        skipped = True
+                        return
+                    batches += 1
+                    if broadcasts:
+                        purged_broadcasts += deleted
+                    else:
+                        purged += deleted
+                    if deleted < self.batch_size:
+                        break
+                    await asyncio.sleep(self.pause_seconds)
+        finally:
+            duration = time.monotonic() - started
+            with self._lock:
+                self.runs += 1
+                self.skipped += skipped
+                self.batches += batches
+                self.purged += purged
+                self.purged_broadcasts += purged_broadcasts
+                self.seconds_spent += duration
+                self.last_run = datetime.utcnow()
+                self.last_purged = purged + purged_broadcasts
+                self.last_duration_ms = duration * 1000
+            if purged or purged_broadcasts:
+                logger.info(
+                    f"Purged {purged} notifications and {purged_broadcasts} broadcasts "
+                    f"in {batches} batches ({duration:.1f}s)"
+                )
+            elif skipped:
+                logger.debug("Notification purge skipped, another worker is running it")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.purge()
+            except Exception as e:
+                logger.warning(f"Could not purge expired notifications: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        """Start the periodic purge on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "read_retention_days": self.read_days,
+                "unread_retention_days": self.unread_days,
+                "interval_seconds": self.interval_seconds,
+                "batch_size": self.batch_size,
+                "pause_ms": self.pause_seconds * 1000,
+                "runs": self.runs,
+                "skipped": self.skipped,
+                "batches": self.batches,
+                "purged": self.purged,
+                "purged_broadcasts": self.purged_broadcasts,
+                "seconds_spent": round(self.seconds_spent, 3),
+                "last_run": self.last_run.isoformat() if self.last_run else None,
+                "last_purged": self.last_purged,
+                "last_duration_ms": round(self.last_duration_ms, 1),
+            }
+
+
+# Global retention job, started by the lifespan in main.py
+notification_retention = NotificationRetention()
@@ -0,0 +1,130 @@
+"""
+In-memory version stamps for conditional notification polling.
+
+Every change to a user's notifications (a new, merged, read or deleted
+notification) and every broadcast to an audience bumps a version key once
+the outermost transaction commits. Releasing a savepoint (event handlers run
+in one) doesn't count: a poll in between would read the old rows under the
+new ETag, and then get 304 for them until the next bump. GET /notifications/ and /notifications/stats send
+an ETag built from the caller's user and audience versions, and answer a
+matching If-None-Match with 304 straight from this table, without a query.
+
+Bumps are published over the backplane with the new version, so all workers
+agree on the stamps of recently changed keys. An entry is kept for
+NOTIFICATION_ETAG_TTL_SECONDS; after that it is replaced by a fresh version,
+so a bump that never reached this worker costs at most one stale TTL and an
+expired or evicted entry only costs a full response.
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+from app.core.backplane import Backplane, backplane
+from app.core.constants import NOTIFICATION_ETAG_MAX_SIZE, NOTIFICATION_ETAG_TTL_SECONDS
+from app.models.broadcast_notification import BroadcastAudience, audiences_for_role
+
+
+def user_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def audience_key(audience: BroadcastAudience) -> str:
+    return f"audience:{audience.value}"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header lists this ETag (or is "*")"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+class NotificationVersions:
+    def __init__(
+        self,
+        backplane: Backplane,
+        ttl_seconds: float = NOTIFICATION_ETAG_TTL_SECONDS,
+        max_size: int = NOTIFICATION_ETAG_MAX_SIZE,
+    ):
+        self.backplane = backplane
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        # key -> (expires_at, version)
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.bumps = 0
+        self.not_modified = 0
+        self.modified = 0
+        backplane.subscribe("notify.version", self._on_bump)
+
+    def _set(self, key: str, version: str):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, version)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def version(self, key: str) -> str:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._set(key, uuid.uuid4().hex[:12])
+                entry = self._entries[key]
+            return entry[1]
+
+    def bump(self, keys: Iterable[str]):
+        """Give keys a new version here and on every worker. Safe to call from any thread."""
+        keys = sorted(set(keys))
+        if not keys:
+            return
+        version = uuid.uuid4().hex[:12]
+        with self._lock:
+            for key in keys:
+                self._set(key, version)
+            self.bumps += 1
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.backplane.publish, "notify.version", {"keys": keys, "version": version})
+
+    def _on_bump(self, event: dict):
+        with self._lock:
+            for key in event["keys"]:
+                self._set(key, event["version"])
+
+    def etag(self, user, resource: str) -> str:
+        """Weak ETag of one of a user's notification resources ("list", "stats")"""
+        keys = [user_key(user.id)] + [audience_key(audience) for audience in audiences_for_role(user.role.value)]
+        return f'W/"{resource}.' + ".".join(self.version(key) for key in keys) + '"'
+
+    def check(self, if_none_match: Optional[str], etag: str) -> bool:
+        """True if the client's copy is current (answer 304)"""
+        matched = etag_matches(if_none_match, etag)
+        with self._lock:
+            if matched:
+                self.not_modified += 1
+            else:
+                self.modified += 1
+        return matched
+
+    def start(self):
+        """Publish bumps to other workers from now on (needs the running event loop)"""
+        self.loop = asyncio.get_running_loop()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "keys": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "bumps": self.bumps,
+                "not_modified": self.not_modified,
+                "modified": self.modified,
+            }
+
+
+# Global version table, bumped by app.operations.notification after commits
+notification_versions = NotificationVersions(backplane)
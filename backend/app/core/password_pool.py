@@ -0,0 +1,157 @@
+"""
+bcrypt hashing and verification in a dedicated process pool.
+
+bcrypt is deliberately CPU heavy (~250 ms at the default cost) and holds
+the GIL when run in-process, so a burst of logins starves every other
+request on the worker. Work is sent to a small process pool instead; the
+number of hashes waiting or running is capped and callers over the cap get
+PasswordHasherBusy, which main.py turns into a 503 with Retry-After.
+"""
+
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.core.constants import (
+    BCRYPT_ROUNDS,
+    PASSWORD_POOL_ACQUIRE_TIMEOUT_MS,
+    PASSWORD_POOL_MAX_PENDING,
+    PASSWORD_POOL_RETRY_AFTER_SECONDS,
+    PASSWORD_POOL_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hash/verify operations are already queued"""
+
+    def __init__(self, retry_after: int = PASSWORD_POOL_RETRY_AFTER_SECONDS):
+        super().__init__("Password hashing is overloaded")
+        self.retry_after = retry_after
+
+
+def make_context(rounds: int = BCRYPT_ROUNDS) -> CryptContext:
+    # min == max so needs_update() flags any hash made with another cost factor
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+# Worker-side functions. They run in the pool's processes and report when
+# they actually started so the caller can measure time spent queued.
+_worker_contexts = {}
+
+def _worker_context(rounds: int) -> CryptContext:
+    if rounds not in _worker_contexts:
+        _worker_contexts[rounds] = make_context(rounds)
+    return _worker_contexts[rounds]
+
+def _hash_in_worker(password: str, rounds: int) -> Tuple[str, float]:
+    started_at = time.time()
+    return _worker_context(rounds).hash(password), started_at
+
+def _verify_in_worker(password: str, hashed: str, rounds: int) -> Tuple[bool, float]:
+    started_at = time.time()
+    return _worker_context(rounds).verify(password, hashed), started_at
+
+
+class PasswordPool:
+    def __init__(
+        self,
+        workers: int = PASSWORD_POOL_WORKERS,
+        max_pending: int = PASSWORD_POOL_MAX_PENDING,
+        acquire_timeout_ms: float = PASSWORD_POOL_ACQUIRE_TIMEOUT_MS,
+        rounds: int = BCRYPT_ROUNDS,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.acquire_timeout = acquire_timeout_ms / 1000
+        self.rounds = rounds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+        self._metrics_lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.queue_ms_total = 0.0
+        self.queue_ms_max = 0.0
+        self.run_ms_total = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                # spawn: never fork a process that holds an event loop and DB connections
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _run(self, func: Callable, *args):
+        if self.workers <= 0:
+            # Pool disabled: hash in-process
+            return func(*args)[0]
+
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            with self._metrics_lock:
+                self.rejected += 1
+            raise PasswordHasherBusy()
+        try:
+            submitted_at = time.time()
+            result, started_at = self._get_executor().submit(func, *args).result()
+            finished_at = time.time()
+        finally:
+            self._slots.release()
+
+        queue_ms = max(0.0, (started_at - submitted_at) * 1000)
+        with self._metrics_lock:
+            self.completed += 1
+            self.queue_ms_total += queue_ms
+            self.queue_ms_max = max(self.queue_ms_max, queue_ms)
+            self.run_ms_total += (finished_at - started_at) * 1000
+        return result
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash_in_worker, password, self.rounds)
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return self._run(_verify_in_worker, password, hashed, self.rounds)
+
+    def start(self):
+        """Create the pool up front so the first login doesn't pay for process start-up"""
+        if self.workers > 0:
+            self._get_executor()
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stats(self) -> dict:
+        with self._metrics_lock:
+            completed = self.completed
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "bcrypt_rounds": self.rounds,
+                "completed": completed,
+                "rejected": self.rejected,
+                "avg_queue_ms": round(self.queue_ms_total / completed, 2) if completed else 0.0,
+                "max_queue_ms": round(self.queue_ms_max, 2),
+                "avg_run_ms": round(self.run_ms_total / completed, 2) if completed else 0.0,
+            }
+
+
+# Global pool used by app.core.security
+password_pool = PasswordPool()
@@ -0,0 +1,108 @@
+"""
+Process-local TTL + LRU cache of authenticated principals.
+
+get_current_user resolves the JWT subject through this cache so most
+authenticated requests don't query the users table. Entries are dropped
+when a user is updated, deleted or changes password; the TTL bounds how
+long another worker can serve a stale entry.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from app.core.constants import PRINCIPAL_CACHE_MAX_SIZE, PRINCIPAL_CACHE_TTL_SECONDS
+from app.models.user import User, UserRole
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Read-only snapshot of the authenticated user, safe to share between requests"""
+    id: int
+    name: str
+    email: str
+    role: UserRole
+    profile_photo_url: Optional[str]
+    created_at: Optional[datetime]
+    # users.updated_at when the snapshot was taken
+    version: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            name=user.name,
+            email=user.email,
+            role=user.role,
+            profile_photo_url=user.profile_photo_url,
+            created_at=user.created_at,
+            version=user.updated_at,
+        )
+
+
+class PrincipalCache:
+    def __init__(self, max_size: int = PRINCIPAL_CACHE_MAX_SIZE, ttl_seconds: float = PRINCIPAL_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, Tuple[float, Principal]]" = OrderedDict()
+        # Bumped on every invalidation so a load that raced with an update is not cached
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def generation(self, user_id: int) -> int:
+        """Read before loading a user from the database and pass to put()"""
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def put(self, principal: Principal, generation: int):
+        with self._lock:
+            if self._generations.get(principal.id, 0) != generation:
+                return
+            self._entries[principal.id] = (time.monotonic() + self.ttl_seconds, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+# Global cache instance used by app.dependencies.get_current_user
+principal_cache = PrincipalCache()
@@ -0,0 +1,238 @@
+"""
+Access token revocation.
+
+Revoked token ids (jti) and per-user cutoffs ("user:<id>") live in the
+revoked_tokens table. Every worker reloads them every
+REVOCATION_REFRESH_SECONDS: the cutoffs into a {user_id: revoked_at} map,
+which is checked without a query, and the jtis into a Bloom filter, so
+checking a token that was not revoked is a memory lookup. Only jtis the
+filter may contain are confirmed against the database. Cutoffs and the
+`iat_ms` claim are in milliseconds, so a token issued in the same second
+as a revocation is still caught. Revocations made on this worker take
+effect here immediately; other workers see them after their next refresh.
+"""
+
+import asyncio
+import calendar
+import hashlib
+import logging
+import math
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.constants import (
+    REVOCATION_BLOOM_CAPACITY,
+    REVOCATION_BLOOM_ERROR_RATE,
+    REVOCATION_REFRESH_SECONDS,
+)
+from app.database import SessionLocal
+from app.models.revoked_token import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+
+def user_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def to_timestamp_ms(value: datetime) -> int:
+    """Naive UTC datetime (as stored) to unix milliseconds, comparable with the `iat_ms` claim"""
+    return calendar.timegm(value.utctimetuple()) * 1000 + value.microsecond // 1000
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationList:
+    def __init__(
+        self,
+        refresh_seconds: float = REVOCATION_REFRESH_SECONDS,
+        capacity: int = REVOCATION_BLOOM_CAPACITY,
+        error_rate: float = REVOCATION_BLOOM_ERROR_RATE,
+    ):
+        self.refresh_seconds = refresh_seconds
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._filter = BloomFilter(capacity, error_rate)
+        # user id -> unix ms; tokens issued up to it are revoked
+        self._cutoffs: Dict[int, int] = {}
+        self._loaded = False
+        self._size = 0
+        # Revocations made while a refresh is running, replayed into the new state
+        self._added_during_refresh = set()
+        self._cutoffs_during_refresh: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._task = None
+        self.last_refresh: Optional[datetime] = None
+        self.checks = 0
+        self.possible_hits = 0
+        self.confirmed = 0
+        self.cutoff_hits = 0
+
+    def add(self, keys: Iterable[str]):
+        """Record jtis revoked by this worker so they take effect here immediately"""
+        with self._lock:
+            for key in keys:
+                self._filter.add(key)
+                self._added_during_refresh.add(key)
+
+    def add_cutoff(self, user_id: int, revoked_at: datetime):
+        """Record a user cutoff made by this worker so it takes effect here immediately"""
+        cutoff = to_timestamp_ms(revoked_at)
+        with self._lock:
+            self._cutoffs[user_id] = cutoff
+            self._cutoffs_during_refresh[user_id] = cutoff
+
+    def refresh(self, db: Session):
+        """Rebuild the filter and the cutoffs from every unexpired row"""
+        with self._lock:
+            self._added_during_refresh = set()
+            self._cutoffs_during_refresh = {}
+        jtis = []
+        cutoffs = {}
+        for key, user_id, revoked_at in (
+            db.query(RevokedToken.key, RevokedToken.user_id, RevokedToken.revoked_at)
+            .filter(RevokedToken.expires_at > datetime.utcnow())
+        ):
+            if key == user_key(user_id):
+                cutoffs[user_id] = to_timestamp_ms(revoked_at)
+            else:
+                jtis.append(key)
+        new_filter = BloomFilter(max(self.capacity, len(jtis) * 2), self.error_rate)
+        for key in jtis:
+            new_filter.add(key)
+        with self._lock:
+            for key in self._added_during_refresh:
+                new_filter.add(key)
+            cutoffs.update(self._cutoffs_during_refresh)
+            self._filter = new_filter
+            self._cutoffs = cutoffs
+            self._size = len(jtis) + len(cutoffs)
+            self._loaded = True
+            self.last_refresh = datetime.utcnow()
+
+    def is_revoked(self, db: Session, user_id: int, jti: Optional[str], issued_at: Optional[int]) -> bool:
+        """
+        True if the user's tokens issued up to a cutoff were revoked (checked
+        in memory), or the token's jti was. issued_at is in unix ms. Hits the
+        database only on a Bloom filter match for the jti, or while the list
+        has not been loaded yet.
+        """
+        if not self._loaded:
+            return self._is_revoked_in_db(db, user_id, jti, issued_at)
+
+        self.checks += 1
+        cutoff = self._cutoffs.get(user_id)
+        # Tokens without iat predate revocation support and are treated as old
+        if cutoff is not None and (issued_at is None or issued_at <= cutoff):
+            self.cutoff_hits += 1
+            return True
+
+        if not jti or jti not in self._filter:
+            return False
+        self.possible_hits += 1
+        revoked = (
+            db.query(RevokedToken.id)
+            .filter(RevokedToken.key == jti, RevokedToken.expires_at > datetime.utcnow())
+            .first()
+        )
+        if revoked is None:
+            return False
+        self.confirmed += 1
+        return True
+
+    def _is_revoked_in_db(self, db: Session, user_id: int, jti: Optional[str], issued_at: Optional[int]) -> bool:
+        """Check one token against the table, until the first load has succeeded"""
+        keys = [user_key(user_id)] + ([jti] if jti else [])
+        for key, revoked_at in (
+            db.query(RevokedToken.key, RevokedToken.revoked_at)
+            .filter(RevokedToken.key.in_(keys), RevokedToken.expires_at > datetime.utcnow())
+        ):
+            if key == jti or issued_at is None or issued_at <= to_timestamp_ms(revoked_at):
+                return True
+        return False
+
+    def _refresh_and_purge(self):
+        db = SessionLocal()
+        try:
+            purged = (
+                db.query(RevokedToken)
+                .filter(RevokedToken.expires_at <= datetime.utcnow())
+                .delete(synchronize_session=False)
+            )
+            db.commit()
+            if purged:
+                logger.info(f"Purged {purged} expired token revocations")
+            self.refresh(db)
+        finally:
+            db.close()
+
+    async def _refresh_in_thread(self):
+        try:
+            await asyncio.to_thread(self._refresh_and_purge)
+        except Exception as e:
+            logger.warning(f"Could not refresh token revocation list: {e}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            await self._refresh_in_thread()
+
+    async def start(self):
+        """Load the list off the event loop, then refresh it periodically"""
+        if self._task is None:
+            await self._refresh_in_thread()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": self._loaded,
+                "revoked_keys": self._size,
+                "user_cutoffs": len(self._cutoffs),
+                "filter_bits": self._filter.size,
+                "hash_count": self._filter.hash_count,
+                "refresh_seconds": self.refresh_seconds,
+                "last_refresh": self.last_refresh.isoformat() if self.last_refresh else None,
+                "checks": self.checks,
+                "possible_hits": self.possible_hits,
+                "confirmed": self.confirmed,
+                "cleared_by_lookup": self.possible_hits - self.confirmed,
+                "cutoff_hits": self.cutoff_hits,
+            }
+
+
+# Global revocation list, refreshed by the lifespan in main.py
+revocation_list = RevocationList()
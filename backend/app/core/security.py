@@ -1,20 +1,33 @@
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
+import uuid
 from app.core.constants import SECRET_KEY,ACCESS_TOKEN_EXPIRE_MINUTES,ALGORITHM
+from app.core.password_pool import make_context, password_pool
+from app.core.revocation import to_timestamp_ms
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Only used in-process for cheap checks (needs_update); hashing goes through the pool
+pwd_context = make_context()
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_pool.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_pool.verify(plain_password, hashed_password)
 
-def create_access_token(data: dict, expires_delta: timedelta | None = None):
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True when the stored hash uses a different cost factor than BCRYPT_ROUNDS"""
+    return pwd_context.needs_update(hashed_password)
+
+def create_access_token(data: dict, expires_delta: timedelta | None = None, issued_after: datetime | None = None):
     to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
+    now = datetime.utcnow()
+    # A token handed out right after a revocation must not fall under its cutoff
+    if issued_after is not None and now <= issued_after:
+        now = issued_after + timedelta(milliseconds=1)
+    expire = now + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    # jti/iat let a single token, or all of a user's older tokens, be revoked;
+    # iat_ms is what the revocation cutoffs are compared with
+    to_encode.update({"exp": expire, "iat": now, "iat_ms": to_timestamp_ms(now), "jti": uuid.uuid4().hex})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def decode_access_token(token: str):
@@ -24,4 +37,3 @@ def decode_access_token(token: str):
     except JWTError:
         
         return None
-
@@ -1,57 +1,74 @@
-from app.models.category import Category
-from app.models.subcategory import Subcategory
+from app.models import Category, Subcategory
 from app.database import SessionLocal
 
-def seed_categories():
+CATEGORY_SEED_DATA = [
+    {
+        "name": "Technical Issue",
+        "description": "Issues related to connectivity or speed",
+        "subcategories": ["Slow Internet", "No Internet", "Fiber Breakage"]
+    },
+    {
+        "name": "General Inquiry",
+        "description": "General questions and support",
+        "subcategories": []
+    },
+    {
+        "name": "Package Inquiry",
+        "description": "Queries about internet packages",
+        "subcategories": []
+    },
+    {
+        "name": "Recharge Inquiry",
+        "description": "Issues with recharge or payment",
+        "subcategories": []
+    },
+    {
+        "name": "Router Replacement",
+        "description": "Requests for router replacement",
+        "subcategories": []
+    },
+]
+
+def seed_categories() -> int:
+    """
+    Idempotently insert the default categories and subcategories.
+    Existing rows are loaded up front and everything missing is written
+    in a single transaction. Returns the number of rows inserted.
+    """
     db = SessionLocal()
     try:
-        data = [
-            {
-                "name": "Technical Issue",
-                "description": "Issues related to connectivity or speed",
-                "subcategories": ["Slow Internet", "No Internet", "Fiber Breakage"]
-            },
-            {
-                "name": "General Inquiry",
-                "description": "General questions and support",
-                "subcategories": []
-            },
-            {
-                "name": "Package Inquiry",
-                "description": "Queries about internet packages",
-                "subcategories": []
-            },
-            {
-                "name": "Recharge Inquiry",
-                "description": "Issues with recharge or payment",
-                "subcategories": []
-            },
-            {
-                "name": "Router Replacement",
-                "description": "Requests for router replacement",
-                "subcategories": []
-            },
-        ]
+        names = [entry["name"] for entry in CATEGORY_SEED_DATA]
+        categories = {
+            category.name: category
+            for category in db.query(Category).filter(Category.name.in_(names)).all()
+        }
 
-        for entry in data:
-            category = db.query(Category).filter(Category.name == entry["name"]).first()
-            if not category:
+        inserted = 0
+        for entry in CATEGORY_SEED_DATA:
+            if entry["name"] not in categories:
                 category = Category(name=entry["name"], description=entry["description"])
                 db.add(category)
-                db.commit()
-                db.refresh(category)
+                categories[entry["name"]] = category
+                inserted += 1
+
+        # Assign ids to new categories without committing
+        db.flush()
+
+        existing_subcategories = {
+            (category_id, name)
+            for category_id, name in db.query(Subcategory.category_id, Subcategory.name).filter(
+                Subcategory.category_id.in_([category.id for category in categories.values()])
+            ).all()
+        }
 
-            # Add subcategories
+        for entry in CATEGORY_SEED_DATA:
+            category = categories[entry["name"]]
             for sub in entry["subcategories"]:
-                exists = db.query(Subcategory).filter(
-                    Subcategory.name == sub,
-                    Subcategory.category_id == category.id
-                ).first()
-                if not exists:
+                if (category.id, sub) not in existing_subcategories:
                     db.add(Subcategory(name=sub, category_id=category.id))
+                    inserted += 1
 
         db.commit()
+        return inserted
     finally:
         db.close()
-
-
@@ -0,0 +1,117 @@
+"""
+Graceful shutdown coordination.
+
+On shutdown every open WebSocket gets a "reconnect" control frame with a
+randomized reconnect_after_ms hint and is closed with code 1012 (service
+restart), so clients spread their reconnects out instead of all coming
+back at once. New WebSocket connections are refused while draining.
+"""
+
+import asyncio
+import logging
+import random
+import signal
+import threading
+from typing import Awaitable, Callable, List
+
+from app.core.constants import (
+    SHUTDOWN_DRAIN_TIMEOUT_SECONDS,
+    RECONNECT_AFTER_MIN_MS,
+    RECONNECT_AFTER_MAX_MS,
+)
+
+logger = logging.getLogger(__name__)
+
+# WebSocket close code for "Service Restart"
+WS_SERVICE_RESTART = 1012
+
+
+def reconnect_frame() -> dict:
+    """Control frame telling a client when to come back"""
+    return {
+        "type": "reconnect",
+        "reason": "server_restart",
+        "reconnect_after_ms": random.randint(RECONNECT_AFTER_MIN_MS, RECONNECT_AFTER_MAX_MS),
+    }
+
+
+async def close_for_restart(websocket) -> None:
+    """Send the reconnect hint and close one socket, ignoring already-dead sockets"""
+    try:
+        await websocket.send_json(reconnect_frame())
+    except Exception:
+        pass
+    try:
+        await websocket.close(code=WS_SERVICE_RESTART, reason="Server restarting")
+    except Exception:
+        pass
+
+
+class ShutdownCoordinator:
+    def __init__(self, timeout: float = SHUTDOWN_DRAIN_TIMEOUT_SECONDS):
+        self.timeout = timeout
+        self.draining = False
+        self._hooks: List[Callable[[], Awaitable[None]]] = []
+        self._drain_task = None
+
+    def register(self, hook: Callable[[], Awaitable[None]]):
+        """Register a coroutine function that closes one group of connections"""
+        self._hooks.append(hook)
+
+    async def drain(self):
+        """Stop accepting sockets and run every drain hook within the deadline. Idempotent."""
+        if self.draining:
+            if self._drain_task is not None:
+                await asyncio.shield(self._drain_task)
+            return
+        self.draining = True
+        self._drain_task = asyncio.ensure_future(self._run_hooks())
+        await asyncio.shield(self._drain_task)
+
+    async def _run_hooks(self):
+        logger.info(f"Draining WebSocket connections (deadline {self.timeout}s)")
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(hook() for hook in self._hooks), return_exceptions=True),
+                timeout=self.timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning("WebSocket drain deadline reached, closing remaining connections abruptly")
+
+    def install_signal_handlers(self):
+        """
+        Drain before the server starts its own shutdown.
+        uvicorn (>= 0.29, also under gunicorn's UvicornWorker) handles SIGINT/SIGTERM
+        with a plain signal handler; we chain in front of it so sockets get their
+        reconnect hint before uvicorn closes them. If the server uses loop-level
+        handlers instead, the lifespan shutdown drain is the fallback.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            previous = signal.getsignal(sig)
+            server = getattr(previous, "__self__", None)
+            if not hasattr(server, "should_exit"):
+                continue
+
+            def handler(signum, frame, previous=previous):
+                if self.draining:
+                    # Second signal: hand over to the server immediately
+                    previous(signum, frame)
+                    return
+                loop.call_soon_threadsafe(
+                    lambda: asyncio.ensure_future(self._drain_then(previous, signum, frame))
+                )
+
+            signal.signal(sig, handler)
+
+    async def _drain_then(self, previous, signum, frame):
+        try:
+            await self.drain()
+        finally:
+            previous(signum, frame)
+
+
+# Global coordinator, driven by the lifespan in main.py
+shutdown = ShutdownCoordinator()
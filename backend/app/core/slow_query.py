@@ -0,0 +1,203 @@
+"""
+Opt-in slow-query recorder.
+
+Hooks into SQLAlchemy cursor events and records statements that exceed
+SLOW_QUERY_THRESHOLD_MS together with the shape of their bound parameters,
+the route that issued them and (on PostgreSQL) the EXPLAIN plan.
+Records are sampled and rate limited, kept in a ring buffer for the admin
+diagnostics endpoint and appended to a JSONL file for offline analysis.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.constants import (
+    SLOW_QUERY_BUFFER_SIZE,
+    SLOW_QUERY_EXPLAIN,
+    SLOW_QUERY_LOG_FILE,
+    SLOW_QUERY_MAX_PER_MINUTE,
+    SLOW_QUERY_SAMPLE_RATE,
+    SLOW_QUERY_THRESHOLD_MS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Set by the HTTP middleware in main.py so queries can be traced to a route
+current_route: ContextVar[Optional[str]] = ContextVar("current_route", default=None)
+
+_START_TIMES_KEY = "slow_query_start_times"
+_EXPLAINING_KEY = "slow_query_explaining"
+
+
+def parameter_shape(parameters: Any) -> Any:
+    """Describe bound parameters by type only so values never reach the log"""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    if parameters is None:
+        return None
+    return type(parameters).__name__
+
+
+class SlowQueryRecorder:
+    def __init__(
+        self,
+        threshold_ms: float = SLOW_QUERY_THRESHOLD_MS,
+        sample_rate: float = SLOW_QUERY_SAMPLE_RATE,
+        max_per_minute: int = SLOW_QUERY_MAX_PER_MINUTE,
+        buffer_size: int = SLOW_QUERY_BUFFER_SIZE,
+        explain: bool = SLOW_QUERY_EXPLAIN,
+        log_file: Optional[str] = SLOW_QUERY_LOG_FILE,
+    ):
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.max_per_minute = max_per_minute
+        self.explain = explain
+        self.log_file = log_file
+        self.records: Deque[Dict] = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self._recent: Deque[float] = deque()
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+
+    def install(self, engine: Engine):
+        """Attach the recorder to an engine's cursor events"""
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(_START_TIMES_KEY, []).append(time.perf_counter())
+
+    def _handle_error(self, exception_context):
+        # A failed statement never reaches after_cursor_execute, drop its start time
+        conn = exception_context.connection
+        if conn is not None and conn.info.get(_START_TIMES_KEY):
+            conn.info[_START_TIMES_KEY].pop()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start_times = conn.info.get(_START_TIMES_KEY)
+        if not start_times:
+            return
+        duration_ms = (time.perf_counter() - start_times.pop()) * 1000
+
+        if duration_ms < self.threshold_ms or conn.info.get(_EXPLAINING_KEY):
+            return
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        if not self._acquire_slot():
+            return
+
+        if executemany:
+            shape = {
+                "rows": len(parameters),
+                "row": parameter_shape(parameters[0]) if parameters else None,
+            }
+        else:
+            shape = parameter_shape(parameters)
+
+        plan = None
+        if self.explain and not executemany and conn.dialect.name == "postgresql":
+            plan = self._explain(conn, statement, parameters)
+
+        self._store({
+            "timestamp": datetime.utcnow().isoformat(),
+            "duration_ms": round(duration_ms, 2),
+            "statement": statement,
+            "parameters": shape,
+            "executemany": executemany,
+            "route": current_route.get(),
+            "plan": plan,
+        })
+
+    def _acquire_slot(self) -> bool:
+        """Rate limit captures to max_per_minute using a sliding window"""
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            if len(self._recent) >= self.max_per_minute:
+                self.dropped += 1
+                return False
+            self._recent.append(now)
+            return True
+
+    def _explain(self, conn, statement: str, parameters) -> Optional[List[str]]:
+        """
+        Capture the plan for a slow statement.
+        Only plain SELECTs are run with ANALYZE because ANALYZE executes the
+        statement again; a WITH can hide an INSERT, UPDATE or DELETE, so it
+        only gets the estimated plan. The EXPLAIN runs inside a savepoint that
+        is always rolled back, so it never changes data and a failure never
+        aborts the caller's transaction.
+        """
+        is_read_only = statement.lstrip().upper().startswith("SELECT")
+        options = "ANALYZE, BUFFERS, FORMAT TEXT" if is_read_only else "FORMAT TEXT"
+
+        conn.info[_EXPLAINING_KEY] = True
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute(f"EXPLAIN ({options}) {statement}", parameters)
+                return [row[0] for row in cursor.fetchall()]
+            except Exception as e:
+                logger.warning(f"Could not explain slow query: {e}")
+                return None
+            finally:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        except Exception as e:
+            logger.warning(f"Could not explain slow query: {e}")
+            return None
+        finally:
+            cursor.close()
+            conn.info[_EXPLAINING_KEY] = False
+
+    def _store(self, record: Dict):
+        with self._lock:
+            self.records.append(record)
+
+        if not self.log_file:
+            return
+        try:
+            line = json.dumps(record, default=str)
+            with self._file_lock:
+                with open(self.log_file, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        except OSError as e:
+            logger.warning(f"Could not write slow query log: {e}")
+
+    def snapshot(self, limit: int = 50) -> Dict:
+        """Most recent records first, for the admin diagnostics endpoint"""
+        with self._lock:
+            # [-0:] would be every record
+            records = list(self.records)[-limit:] if limit > 0 else []
+            dropped = self.dropped
+        return {
+            "threshold_ms": self.threshold_ms,
+            "sample_rate": self.sample_rate,
+            "max_per_minute": self.max_per_minute,
+            "rate_limited": dropped,
+            "records": list(reversed(records)),
+        }
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+            self.dropped = 0
+
+
+# Global recorder instance, installed on the engine when SLOW_QUERY_LOG_ENABLED is set
+recorder = SlowQueryRecorder()
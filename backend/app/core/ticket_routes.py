@@ -0,0 +1,98 @@
+"""
+Process-local routing table: ticket_id -> the users who take part in it.
+
+Chat messages sent on /messages/ws are delivered only to a ticket's
+participants (its creator and assigned agent) instead of to every connected
+client. The table only decides delivery; who may send is checked against the
+tickets row, which also refills or corrects the entry. Entries are replaced
+by the ticket operations on create/assign/transfer, which also tell the other
+workers over the backplane to drop their copy, and expire after
+TICKET_ROUTE_TTL_SECONDS as a fallback.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from app.core.backplane import Backplane, backplane
+from app.core.constants import TICKET_ROUTE_MAX_SIZE, TICKET_ROUTE_TTL_SECONDS
+
+
+@dataclass(frozen=True, slots=True)
+class TicketRoute:
+    user_id: int
+    agent_id: Optional[int]
+
+    @property
+    def participants(self) -> Tuple[int, ...]:
+        if self.agent_id is None or self.agent_id == self.user_id:
+            return (self.user_id,)
+        return (self.user_id, self.agent_id)
+
+
+class TicketRoutingTable:
+    def __init__(
+        self,
+        backplane: Backplane,
+        max_size: int = TICKET_ROUTE_MAX_SIZE,
+        ttl_seconds: float = TICKET_ROUTE_TTL_SECONDS,
+    ):
+        self.backplane = backplane
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, Tuple[float, TicketRoute]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        backplane.subscribe("ticket.route", self._on_route_changed)
+
+    def get(self, ticket_id: int) -> Optional[TicketRoute]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(ticket_id)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[ticket_id]
+                return None
+            self._entries.move_to_end(ticket_id)
+            return entry[1]
+
+    def update(self, ticket_id: int, user_id: int, agent_id: Optional[int]) -> TicketRoute:
+        """Record a ticket's current owner and agent on this worker"""
+        route = TicketRoute(user_id, agent_id)
+        with self._lock:
+            self._entries[ticket_id] = (time.monotonic() + self.ttl_seconds, route)
+            self._entries.move_to_end(ticket_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return route
+
+    def forget(self, ticket_id: int):
+        with self._lock:
+            self._entries.pop(ticket_id, None)
+
+    def changed(self, ticket_id: int, user_id: int, agent_id: Optional[int]) -> TicketRoute:
+        """
+        A committed create/assign/transfer: record the route here and make every
+        other worker re-read it. Safe to call from any thread.
+        """
+        route = self.update(ticket_id, user_id, agent_id)
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(
+                self.backplane.publish, "ticket.route", {"ticket_id": ticket_id, "node": self.backplane.node_id}
+            )
+        return route
+
+    def _on_route_changed(self, event: dict):
+        if event["node"] != self.backplane.node_id:
+            self.forget(event["ticket_id"])
+
+    def start(self):
+        """Publish route changes to other workers from now on (needs the running event loop)"""
+        self.loop = asyncio.get_running_loop()
+
+
+# Global routing table, kept current by app.operations.ticket and started by the lifespan in main.py
+ticket_routes = TicketRoutingTable(backplane)
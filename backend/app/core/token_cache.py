@@ -0,0 +1,83 @@
+"""
+Process-local cache of verified access tokens.
+
+Maps sha256(token) -> verified claims until the token's own `exp`, so a
+client that reconnects with the same token skips the JWT signature check.
+The raw token is never stored. Revocation is still checked on every use and
+the user itself is resolved through principal_cache.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from app.core.constants import TOKEN_CACHE_MAX_SIZE
+
+
+class VerifiedToken(NamedTuple):
+    user_id: int
+    jti: Optional[str]
+    # unix ms
+    issued_at: Optional[int]
+    expires_at: float
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+class VerifiedTokenCache:
+    def __init__(self, max_size: int = TOKEN_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, VerifiedToken]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest: bytes) -> Optional[VerifiedToken]:
+        """Claims of a previously verified, unexpired token"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None or entry.expires_at <= now:
+                if entry is not None:
+                    del self._entries[digest]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return entry
+
+    def put(self, digest: bytes, verified: VerifiedToken):
+        if self.max_size <= 0 or verified.expires_at <= time.time():
+            return
+        with self._lock:
+            self._entries[digest] = verified
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, digest: bytes):
+        with self._lock:
+            self._entries.pop(digest, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+# Global cache instance used by app.dependencies.authenticate_token
+token_cache = VerifiedTokenCache()
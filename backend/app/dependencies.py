@@ -1,57 +1,93 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from jose import JWTError, jwt
+from typing import Optional
 
 from app.database import get_db
 from app.models.user import User  # We'll need schemas for token data
 from app.core import security # Import your security functions
 from app.models.user import UserRole
+from app.core.principal_cache import Principal, principal_cache
+from app.core.token_cache import VerifiedToken, token_cache, token_digest
+from app.core.revocation import revocation_list
 
 # This tells FastAPI where the token can be obtained from.
 # The "tokenUrl" should point to your login endpoint.
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+def authenticate_token(token: str, db: Session) -> Optional[Principal]:
+    """
+    Resolve a bearer token to a Principal, or None if it is invalid or the user is gone.
+    Shared by get_current_user and the WebSocket endpoints. A token that was
+    already verified is recognised by its digest until it expires, so
+    reconnects skip the JWT signature check; revocation is checked against the
+    in-memory Bloom filter and the user comes from principal_cache.
+    """
+    if not token:
+        return None
+
+    digest = token_digest(token)
+    verified = token_cache.get(digest)
+    if verified is None:
+        payload = security.decode_access_token(token)
+        if payload is None:
+            return None
+        try:
+            # Tokens from before iat_ms only have whole seconds
+            issued_at = payload.get("iat_ms")
+            if issued_at is None and payload.get("iat") is not None:
+                issued_at = int(payload.get("iat")) * 1000
+            verified = VerifiedToken(
+                user_id=int(payload.get("sub")),
+                jti=payload.get("jti"),
+                issued_at=issued_at,
+                expires_at=float(payload.get("exp")),
+            )
+        except (TypeError, ValueError):
+            return None
+        token_cache.put(digest, verified)
+
+    # Bloom filter check; only a possible match costs a query
+    user_id = verified.user_id
+    if revocation_list.is_revoked(db, user_id, verified.jti, verified.issued_at):
+        return None
+
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    generation = principal_cache.generation(user_id)
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is None:
+        token_cache.discard(digest)
+        return None
+
+    principal = Principal.from_user(user)
+    principal_cache.put(principal, generation)
+    return principal
+
 def get_current_user(
     token: str = Depends(oauth2_scheme), 
     db: Session = Depends(get_db)
-) -> User:
+) -> Principal:
     """
     Dependency to get the current user from a JWT token.
-    1. Decodes the JWT token.
-    2. Extracts the user ID ('sub').
-    3. Fetches the user from the database.
-    4. Returns the user object.
+    Returns a read-only Principal (id, name, email, role, ...) resolved by authenticate_token.
     Raises HTTPException if the token is invalid or the user doesn't exist.
+    Endpoints that need to modify the user row must load it themselves.
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    try:
-        # Use the decode function from your security file
-        payload = security.decode_access_token(token)
-        if payload is None:
-            raise credentials_exception
-            
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-            
-    except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if user is None:
-        raise credentials_exception
-        
-    return user
+    principal = authenticate_token(token, db)
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return principal
 
 def get_current_admin(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """
     Dependency that relies on get_current_user and then checks
     if the user has the 'admin' role.
@@ -64,8 +100,8 @@ def get_current_admin(
     return current_user
 
 def get_current_agent (
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """
     Dependency that relies on get_current_user and then checks
     if the user has the 'agent' role.
@@ -7,4 +7,10 @@ from app.models.message import Message
 from app.models.user import User
 from app.database import Base
 from app.models.ticket_note import TicketNote
+from app.models.ticket_watcher import TicketWatcher
+from app.models.notification import Notification
+from app.models.notification_counter import NotificationCounter
+from app.models.broadcast_notification import BroadcastNotification, BroadcastReceipt
 
+from app.models.revoked_token import RevokedToken
+from app.models.outbox_event import OutboxEvent
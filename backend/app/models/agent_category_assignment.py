@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, Boolean
 from app.database import Base
 
 class AgentCategoryAssignment(Base):
@@ -6,3 +6,5 @@ class AgentCategoryAssignment(Base):
 
     agent_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
     category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    # Opt-in: watch every new ticket in this category
+    watch_new_tickets = Column(Boolean, default=False, server_default="false", nullable=False)
@@ -0,0 +1,51 @@
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Boolean, DateTime, Enum, Index
+from app.database import Base
+from app.models.notification import NotificationType
+from datetime import datetime
+import enum
+
+class BroadcastAudience(enum.Enum):
+    STAFF = "staff"    # agents and admins
+    ADMINS = "admins"
+
+# User roles in each audience
+AUDIENCE_ROLES = {
+    BroadcastAudience.STAFF: ("agent", "admin"),
+    BroadcastAudience.ADMINS: ("admin",),
+}
+
+def audiences_for_role(role: str) -> list:
+    """Audiences whose broadcasts a user with this role sees"""
+    return [audience for audience, roles in AUDIENCE_ROLES.items() if role in roles]
+
+class BroadcastNotification(Base):
+    """One notification shown to everyone in an audience, instead of a row per recipient"""
+    __tablename__ = "broadcast_notifications"
+
+    id = Column(Integer, primary_key=True, index=True)
+    audience = Column(Enum(BroadcastAudience), nullable=False)
+    ticket_id = Column(Integer, ForeignKey("tickets.id", ondelete="CASCADE"), nullable=True)
+
+    type = Column(Enum(NotificationType), nullable=False)
+    title = Column(String(200), nullable=False)
+    message = Column(Text, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_broadcast_notifications_audience_created_at", "audience", "created_at"),
+    )
+
+class BroadcastReceipt(Base):
+    """
+    A user's state for one broadcast, where it differs from the default.
+    Broadcasts up to the user's read cursor (notification_counters.broadcast_read_through)
+    are read; only ones read individually past it, or deleted, get a row here.
+    """
+    __tablename__ = "broadcast_receipts"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    broadcast_id = Column(Integer, ForeignKey("broadcast_notifications.id", ondelete="CASCADE"), primary_key=True)
+    is_read = Column(Boolean, default=False, nullable=False)
+    # Hidden from this user: deleted by them, or they caused the event
+    is_deleted = Column(Boolean, default=False, nullable=False)
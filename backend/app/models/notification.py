@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Boolean, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Boolean, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -27,8 +27,18 @@ class Notification(Base):
     message = Column(Text, nullable=False)
     
     is_read = Column(Boolean, default=False, nullable=False)
+    # Time of the latest event merged into this notification
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Events coalesced into this unread notification (see NOTIFICATION_COALESCE_WINDOW_SECONDS)
+    count = Column(Integer, default=1, server_default="1", nullable=False)
     
     # Relationships
     user = relationship("User", back_populates="notifications")
-    ticket = relationship("Ticket", back_populates="notifications")
\ No newline at end of file
+    ticket = relationship("Ticket", back_populates="notifications")
+    
+    __table_args__ = (
+        # A user's list, newest first, and the coalescing lookup
+        Index("ix_notifications_user_id_created_at", "user_id", "created_at"),
+        # Retention purge, oldest first
+        Index("ix_notifications_created_at", "created_at"),
+    )
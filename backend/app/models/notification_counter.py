@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from app.database import Base
+from datetime import datetime
+
+class NotificationCounter(Base):
+    """Per-user notification totals, kept in step with the notifications table, and the broadcast read cursor"""
+    __tablename__ = "notification_counters"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    total = Column(Integer, default=0, nullable=False)
+    unread = Column(Integer, default=0, nullable=False)
+    # Broadcast notifications with ids up to this one are read (mark-all-read moves it)
+    broadcast_read_through = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
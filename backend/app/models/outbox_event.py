@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index
+from app.database import Base
+from datetime import datetime
+
+class OutboxEvent(Base):
+    """A domain event written in the same transaction as the change that raised it"""
+    __tablename__ = "event_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Event class name, e.g. "TicketCreated"
+    type = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False)
+    # pending -> done, or failed once EVENT_MAX_ATTEMPTS is reached
+    status = Column(String(20), default="pending", nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Retries are pushed back with exponential backoff
+    available_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    processed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_event_outbox_status_available_at", "status", "available_at"),
+    )
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from app.database import Base
+from datetime import datetime
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # A token's jti, or "user:<id>" to revoke every token of that user issued up to revoked_at
+    key = Column(String(64), unique=True, nullable=False, index=True)
+    user_id = Column(Integer, nullable=True, index=True)
+    revoked_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Once every affected token has expired the row can be purged
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
+from app.database import Base
+from datetime import datetime
+
+class TicketWatcher(Base):
+    """A user who gets notified about a ticket's activity"""
+    __tablename__ = "ticket_watchers"
+
+    ticket_id = Column(Integer, ForeignKey("tickets.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # creator, assignee, category (opted in through their category assignment) or follower
+    reason = Column(String(20), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # "What am I watching", and cleanup when a user goes away
+        Index("ix_ticket_watchers_user_id", "user_id"),
+    )
@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from app.models.revoked_token import RevokedToken
+from app.core.constants import ACCESS_TOKEN_EXPIRE_MINUTES
+from app.core.revocation import revocation_list, user_key
+
+def revoke_token(db: Session, jti: str, user_id: int, expires_at: datetime):
+    """Revoke a single access token by its jti (e.g. on logout)"""
+    if db.query(RevokedToken.id).filter(RevokedToken.key == jti).first() is None:
+        db.add(RevokedToken(key=jti, user_id=user_id, expires_at=expires_at))
+        db.commit()
+    revocation_list.add([jti])
+
+def revoke_user_tokens(db: Session, user_id: int) -> datetime:
+    """
+    Revoke every token issued to a user so far (role change, password reset, disabled account).
+    Returns the cutoff; a token for the user issued after it stays valid.
+    """
+    key = user_key(user_id)
+    now = datetime.utcnow()
+    # No token issued before now outlives this
+    expires_at = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+
+    revoked = db.query(RevokedToken).filter(RevokedToken.key == key).first()
+    if revoked is None:
+        db.add(RevokedToken(key=key, user_id=user_id, revoked_at=now, expires_at=expires_at))
+    else:
+        revoked.revoked_at = now
+        revoked.expires_at = expires_at
+    db.commit()
+    revocation_list.add_cutoff(user_id, now)
+    return now
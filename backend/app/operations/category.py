@@ -164,4 +164,20 @@ def unassign_agent_from_category(db: Session, category_id: int, agent_id: int):
     db.delete(assignment)
     db.commit()
     
-    return {"message": "Agent successfully unassigned from category"}
\ No newline at end of file
+    return {"message": "Agent successfully unassigned from category"}
+
+
+def set_category_watch(db: Session, category_id: int, agent_id: int, watch: bool) -> bool:
+    """
+    Opts an agent in or out of watching every new ticket in one of their categories.
+    Returns False if the agent is not assigned to the category.
+    """
+    from app.models.agent_category_assignment import AgentCategoryAssignment
+    
+    updated = db.query(AgentCategoryAssignment).filter(
+        AgentCategoryAssignment.agent_id == agent_id,
+        AgentCategoryAssignment.category_id == category_id
+    ).update({AgentCategoryAssignment.watch_new_tickets: watch})
+    db.commit()
+    
+    return updated > 0
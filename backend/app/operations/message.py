@@ -1,4 +1,8 @@
 
+from typing import Optional
+from sqlalchemy import insert
+from app.core.constants import MESSAGE_PAGE_SIZE
+from app.core.principal_cache import Principal
 from app.models.message import Message
 from app.models.user import User
 from sqlalchemy.orm import Session, joinedload
@@ -16,23 +20,58 @@ def message_to_dict(message: Message) -> dict:
         "created_at": message.timestamp  # For compatibility with frontend
     }
 
-# get old messages for ticket_id 
-def get_old_messages_for_ticket_id(db: Session, ticket_id: int):
-    messages = db.query(Message).options(joinedload(Message.sender)).filter(Message.ticket_id == ticket_id).order_by(Message.timestamp.asc()).all()
-    return [message_to_dict(message) for message in messages]
+# get old messages for ticket_id, one page at a time
+def get_old_messages_for_ticket_id(
+    db: Session,
+    ticket_id: int,
+    before_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    limit: int = MESSAGE_PAGE_SIZE,
+):
+    """
+    Up to limit messages of a ticket, oldest first. Without cursors this is the
+    latest page; before_id pages back through older messages and after_id
+    returns the ones newer than the last message the client has. Message ids
+    grow with their timestamps, so paging walks the (ticket_id, id) index.
+    """
+    query = db.query(Message).options(joinedload(Message.sender)).filter(Message.ticket_id == ticket_id)
+    if after_id is not None:
+        query = query.filter(Message.id > after_id).order_by(Message.id.asc())
+        return [message_to_dict(message) for message in query.limit(limit)]
+    if before_id is not None:
+        query = query.filter(Message.id < before_id)
+    # Newest first to take the page, returned in reading order
+    messages = query.order_by(Message.id.desc()).limit(limit).all()
+    return [message_to_dict(message) for message in reversed(messages)]
 
 # create message
-def create_message(db: Session, message_data: MessageCreate):
-    # Create message with sender_id
-    db_message = Message(
-        ticket_id=message_data.ticket_id,
-        content=message_data.content,
-        sender_id=message_data.sender_id
-    )
-    db.add(db_message)
+def create_message(db: Session, message_data: MessageCreate, sender: Optional[Principal] = None):
+    """
+    Insert a message and commit. The id and server timestamp come back from
+    INSERT ... RETURNING, and the sender's name from the authenticated
+    principal when the caller passes it, so the message isn't read back.
+    """
+    row = db.execute(
+        insert(Message)
+        .values(
+            ticket_id=message_data.ticket_id,
+            content=message_data.content,
+            sender_id=message_data.sender_id
+        )
+        .returning(Message.id, Message.timestamp)
+    ).one()
     db.commit()
-    db.refresh(db_message)
-    # Load the sender relationship to get sender name
-    db_message = db.query(Message).options(joinedload(Message.sender)).filter(Message.id == db_message.id).first()
-    return message_to_dict(db_message)
 
+    if sender is not None and sender.id == message_data.sender_id:
+        sender_name = sender.name
+    else:
+        sender_name = db.query(User.name).filter(User.id == message_data.sender_id).scalar()
+    return {
+        "id": row.id,
+        "ticket_id": message_data.ticket_id,
+        "sender_id": message_data.sender_id,
+        "sender_name": sender_name or "Unknown",
+        "content": message_data.content,
+        "timestamp": row.timestamp,
+        "created_at": row.timestamp  # For compatibility with frontend
+    }
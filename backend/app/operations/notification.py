@@ -1,301 +1,839 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy.orm import Session, SessionTransaction
+from sqlalchemy import func, desc, insert, delete, select, and_, or_, cast, TIMESTAMP, event as sa_event
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.models.notification import Notification, NotificationType
+from app.models.notification_counter import NotificationCounter
+from app.models.broadcast_notification import (
+    AUDIENCE_ROLES,
+    BroadcastAudience,
+    BroadcastNotification,
+    BroadcastReceipt,
+    audiences_for_role,
+)
 from app.models.user import User
 from app.models.ticket import Ticket
 from app.schemas.notification import NotificationCreate, NotificationOut, NotificationStats
-from typing import List, Optional
-from datetime import datetime
+from app.core.constants import (
+    NOTIFICATION_COALESCE_MAX_COUNT,
+    NOTIFICATION_COALESCE_WINDOW_SECONDS,
+    NOTIFICATION_COPY_THRESHOLD,
+    NOTIFICATION_DIGEST_WINDOW_SECONDS,
+)
+from app.core.notification_counters import count_notifications
+from app.core.principal_cache import Principal
+from app.core.notification_versions import audience_key, notification_versions, user_key
+from app.operations.ticket_watcher import watcher_ids
+from app.websocket_manager import manager
+from app.core.events import (
+    event_bus,
+    NoteAdded,
+    StatusChanged,
+    TicketAssigned,
+    TicketClosed,
+    TicketCreated,
+    TicketReopened,
+    TransferApproved,
+    TransferRequested,
+)
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta
+from functools import partial
+import csv
+import io
+
+# Live pushes: frames are collected while notifications are written and sent to
+# the users' /notifications/ws sockets once the outermost transaction commits.
+# The same commit bumps the version stamps that conditional polling compares
+# against; bumping any earlier would pin a stale list to the new ETag.
+
+def _queue(db: Session, send, version_key: str) -> None:
+    transaction = db.get_nested_transaction() or db.get_transaction()
+    db.info.setdefault("notification_pushes", []).append((transaction, send, version_key))
+
+def _queue_push(db: Session, user_id: int, frame: dict) -> None:
+    _queue(db, partial(manager.push_notification, user_id, frame), user_key(user_id))
+
+def _queue_broadcast_push(db: Session, audience: BroadcastAudience, frame: dict, exclude: Iterable[int]) -> None:
+    _queue(db, partial(manager.push_broadcast_notification, AUDIENCE_ROLES[audience], frame, list(exclude)), audience_key(audience))
+
+def _touch(db: Session, user_id: int) -> None:
+    """A user's notifications changed in a way that isn't pushed (read, deleted, purged)"""
+    _queue(db, None, user_key(user_id))
+
+def _notification_frame(notification: NotificationOut) -> dict:
+    return {"type": "notification", "notification": notification.model_dump(mode="json"), "unread_delta": 1}
+
+def _within(transaction: Optional[SessionTransaction], ancestor: SessionTransaction) -> bool:
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+@sa_event.listens_for(Session, "after_commit")
+def _push_committed(session: Session):
+    # Also fires when a savepoint is released; the rows aren't committed until the outer transaction is
+    if session.in_nested_transaction():
+        return
+    version_keys = set()
+    for _, send, version_key in session.info.pop("notification_pushes", ()):
+        if send is not None:
+            send()
+        version_keys.add(version_key)
+    notification_versions.bump(version_keys)
+
+@sa_event.listens_for(Session, "after_soft_rollback")
+def _drop_rolled_back(session: Session, previous_transaction: SessionTransaction):
+    # Also fires for savepoints: drop only what was written inside the rolled back one
+    pushes = session.info.get("notification_pushes")
+    if pushes:
+        session.info["notification_pushes"] = [
+            push for push in pushes if not _within(push[0], previous_transaction)
+        ]
+
+@sa_event.listens_for(Session, "after_rollback")
+def _drop_all(session: Session):
+    if not session.in_nested_transaction():
+        session.info.pop("notification_pushes", None)
+
+# Counters: notification_counters is updated in the same transaction as every
+# insert, read and delete, so /notifications/stats is a primary-key lookup
+
+def _bump_counters(db: Session, deltas: Dict[int, Tuple[int, int]]) -> None:
+    """Add (total, unread) deltas to users' counters in one upsert"""
+    if not deltas:
+        return
+    # Sorted, so concurrent fan-outs lock counter rows in the same order
+    rows = [
+        {"user_id": user_id, "total": total, "unread": unread, "updated_at": datetime.utcnow()}
+        for user_id, (total, unread) in sorted(deltas.items())
+    ]
+    statement = pg_insert(NotificationCounter).values(rows)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[NotificationCounter.user_id],
+        set_={
+            "total": NotificationCounter.total + statement.excluded.total,
+            "unread": NotificationCounter.unread + statement.excluded.unread,
+            "updated_at": statement.excluded.updated_at,
+        },
+    ))
+
+def _count_new(db: Session, user_ids: Iterable[int]) -> None:
+    _bump_counters(db, {user_id: (count, count) for user_id, count in Counter(user_ids).items()})
 
 def create_notification(db: Session, notification_data: NotificationCreate) -> Notification:
     """Create a new notification."""
     db_notification = Notification(**notification_data.model_dump())
     db.add(db_notification)
+    db.flush()
+    _count_new(db, [db_notification.user_id])
+    _queue_push(db, db_notification.user_id, _notification_frame(NotificationOut.model_validate(db_notification)))
     db.commit()
     db.refresh(db_notification)
     return db_notification
 
-def get_user_notifications(db: Session, user_id: int, skip: int = 0, limit: int = 50, unread_only: bool = False) -> List[Notification]:
-    """Get notifications for a specific user."""
-    query = db.query(Notification).filter(Notification.user_id == user_id)
+def get_user_notifications(
+    db: Session, user: Principal, skip: int = 0, limit: int = 50, unread_only: bool = False,
+    since_id: Optional[int] = None, since_broadcast_id: Optional[int] = None,
+) -> List[NotificationOut]:
+    """
+    Get notifications for a specific user: their own merged with the broadcasts they see.
+    since_id / since_broadcast_id return only notifications / broadcasts added after those ids.
+    """
+    query = db.query(Notification).filter(Notification.user_id == user.id)
     
     if unread_only:
         query = query.filter(Notification.is_read == False)
+    if since_id is not None:
+        query = query.filter(Notification.id > since_id)
+    
+    # Each stream is read up to skip + limit deep, then the two are merged by time
+    personal = [
+        NotificationOut.model_validate(notification)
+        for notification in query.order_by(desc(Notification.created_at)).limit(skip + limit)
+    ]
+    broadcasts = []
+    broadcast_query = _visible_broadcasts(db, user)
+    if broadcast_query is not None:
+        cursor = _broadcast_cursor(db, user.id)
+        is_read = _broadcast_is_read(cursor)
+        if unread_only:
+            broadcast_query = broadcast_query.filter(~is_read)
+        if since_broadcast_id is not None:
+            broadcast_query = broadcast_query.filter(BroadcastNotification.id > since_broadcast_id)
+        broadcasts = [
+            _broadcast_out(broadcast, user.id, read)
+            for broadcast, read in broadcast_query
+            .add_columns(is_read)
+            .order_by(desc(BroadcastNotification.created_at))
+            .limit(skip + limit)
+        ]
     
-    return query.order_by(desc(Notification.created_at)).offset(skip).limit(limit).all()
+    merged = sorted(personal + broadcasts, key=lambda notification: notification.created_at, reverse=True)
+    return merged[skip:skip + limit]
 
 def mark_notification_as_read(db: Session, notification_id: int, user_id: int) -> Optional[Notification]:
     """Mark a notification as read."""
-    notification = db.query(Notification).filter(
+    if notification_id < 0:
+        return _mark_broadcast_read(db, -notification_id, user_id)
+    
+    # Conditional update, so two concurrent requests can't both decrement the counter
+    updated = db.query(Notification).filter(
         Notification.id == notification_id,
-        Notification.user_id == user_id
-    ).first()
+        Notification.user_id == user_id,
+        Notification.is_read == False
+    ).update({Notification.is_read: True}, synchronize_session=False)
     
-    if notification:
-        notification.is_read = True
+    if updated:
+        _bump_counters(db, {user_id: (0, -updated)})
+        _touch(db, user_id)
         db.commit()
-        db.refresh(notification)
     
-    return notification
+    return db.query(Notification).filter(
+        Notification.id == notification_id,
+        Notification.user_id == user_id
+    ).first()
 
-def mark_all_notifications_as_read(db: Session, user_id: int) -> int:
+def mark_all_notifications_as_read(db: Session, user: Principal) -> int:
     """Mark all notifications as read for a user."""
+    counter = _counter(db, user.id)
+    broadcast_unread = _broadcast_counts(db, user)[1]
+    
     updated_count = db.query(Notification).filter(
-        Notification.user_id == user_id,
+        Notification.user_id == user.id,
         Notification.is_read == False
     ).update({Notification.is_read: True})
     
+    if updated_count:
+        _bump_counters(db, {user.id: (0, -updated_count)})
+    
+    # Broadcasts: move the read cursor past all of them, the read-set below it is no longer needed
+    updated_count += broadcast_unread
+    counter.broadcast_read_through = max(
+        counter.broadcast_read_through,
+        db.query(func.max(BroadcastNotification.id)).scalar() or 0,
+    )
+    db.query(BroadcastReceipt).filter(
+        BroadcastReceipt.user_id == user.id,
+        BroadcastReceipt.broadcast_id <= counter.broadcast_read_through,
+        BroadcastReceipt.is_deleted == False
+    ).delete(synchronize_session=False)
+    _touch(db, user.id)
     db.commit()
     return updated_count
 
 def delete_notification(db: Session, notification_id: int, user_id: int) -> bool:
     """Delete a notification."""
-    notification = db.query(Notification).filter(
-        Notification.id == notification_id,
-        Notification.user_id == user_id
-    ).first()
+    if notification_id < 0:
+        return _set_receipt(db, -notification_id, user_id, is_deleted=True)
     
-    if notification:
-        db.delete(notification)
-        db.commit()
-        return True
+    # RETURNING tells us whether it still counted as unread
+    was_read = db.execute(
+        delete(Notification)
+        .where(Notification.id == notification_id, Notification.user_id == user_id)
+        .returning(Notification.is_read)
+    ).scalar_one_or_none()
     
-    return False
+    if was_read is None:
+        return False
+    
+    _bump_counters(db, {user_id: (-1, 0 if was_read else -1)})
+    _touch(db, user_id)
+    db.commit()
+    return True
 
-def get_notification_stats(db: Session, user_id: int) -> NotificationStats:
+def _counter(db: Session, user_id: int) -> NotificationCounter:
+    """A user's counter row. The first time, it is counted once and kept."""
+    counter = db.get(NotificationCounter, user_id)
+    if counter is None:
+        total, unread = count_notifications(db, [user_id]).get(user_id, (0, 0))
+        statement = pg_insert(NotificationCounter).values(user_id=user_id, total=total, unread=unread)
+        db.execute(statement.on_conflict_do_nothing(index_elements=[NotificationCounter.user_id]))
+        db.commit()
+        counter = db.get(NotificationCounter, user_id)
+    return counter
+
+def get_notification_stats(db: Session, user: Principal) -> NotificationStats:
     """Get notification statistics for a user."""
-    total = db.query(func.count(Notification.id)).filter(Notification.user_id == user_id).scalar()
-    unread = db.query(func.count(Notification.id)).filter(
-        Notification.user_id == user_id,
-        Notification.is_read == False
-    ).scalar()
+    counter = _counter(db, user.id)
+    broadcast_total, broadcast_unread = _broadcast_counts(db, user)
     
     return NotificationStats(
-        total_notifications=total,
-        unread_notifications=unread
+        total_notifications=counter.total + broadcast_total,
+        unread_notifications=counter.unread + broadcast_unread
     )
 
-# Notification creation helpers for different events
+# Broadcasts: events for a whole audience (all staff, all admins) are stored once.
+# Each user has a read cursor on their counter row plus receipts for broadcasts
+# read individually past it or deleted, and sees broadcasts as negative ids.
+
+def _broadcast_cursor(db: Session, user_id: int) -> int:
+    return db.query(NotificationCounter.broadcast_read_through).filter(
+        NotificationCounter.user_id == user_id
+    ).scalar() or 0
+
+def _broadcast_is_read(cursor: int):
+    return or_(BroadcastNotification.id <= cursor, func.coalesce(BroadcastReceipt.is_read, False))
+
+def _visible_broadcasts(db: Session, user: Principal):
+    """Query for the broadcasts a user sees, with their receipt outer-joined. None if they see none."""
+    audiences = audiences_for_role(user.role.value)
+    if not audiences:
+        return None
+    query = db.query(BroadcastNotification).outerjoin(BroadcastReceipt, and_(
+        BroadcastReceipt.broadcast_id == BroadcastNotification.id,
+        BroadcastReceipt.user_id == user.id,
+    )).filter(
+        BroadcastNotification.audience.in_(audiences),
+        func.coalesce(BroadcastReceipt.is_deleted, False) == False,
+    )
+    # Nothing from before the user joined
+    if user.created_at is not None:
+        query = query.filter(BroadcastNotification.created_at >= _joined_at_utc(db, user.id))
+    return query
+
+def _joined_at_utc(db: Session, user_id: int):
+    """
+    When the user signed up, on the broadcasts' clock. Broadcasts are stamped with
+    datetime.utcnow(), but users.created_at is the database's now() in the session
+    time zone, so PostgreSQL converts it to UTC before the two are compared.
+    SQLite's now() is already UTC.
+    """
+    created_at = User.created_at
+    if db.get_bind().dialect.name == "postgresql":
+        created_at = func.timezone("UTC", cast(User.created_at, TIMESTAMP(timezone=True)))
+    return select(created_at).where(User.id == user_id).scalar_subquery()
+
+def _broadcast_counts(db: Session, user: Principal) -> Tuple[int, int]:
+    """(total, unread) broadcasts for a user"""
+    query = _visible_broadcasts(db, user)
+    if query is None:
+        return 0, 0
+    is_read = _broadcast_is_read(_broadcast_cursor(db, user.id))
+    total, unread = query.with_entities(
+        func.count(BroadcastNotification.id),
+        func.count(BroadcastNotification.id).filter(~is_read),
+    ).one()
+    return total, unread
+
+def _broadcast_out(broadcast: BroadcastNotification, user_id: Optional[int], is_read: bool) -> NotificationOut:
+    return NotificationOut(
+        id=-broadcast.id,
+        user_id=user_id,
+        ticket_id=broadcast.ticket_id,
+        type=broadcast.type,
+        title=broadcast.title,
+        message=broadcast.message,
+        is_read=is_read,
+        created_at=broadcast.created_at,
+        broadcast=True,
+    )
+
+def _set_receipt(db: Session, broadcast_id: int, user_id: int, **state) -> bool:
+    """Record a user's read/deleted state for one broadcast. False if there is no such broadcast."""
+    if db.get(BroadcastNotification, broadcast_id) is None:
+        return False
+    statement = pg_insert(BroadcastReceipt).values(user_id=user_id, broadcast_id=broadcast_id, **state)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[BroadcastReceipt.user_id, BroadcastReceipt.broadcast_id],
+        set_=state,
+    ))
+    _touch(db, user_id)
+    db.commit()
+    return True
+
+def _mark_broadcast_read(db: Session, broadcast_id: int, user_id: int) -> Optional[BroadcastNotification]:
+    # Already read through the cursor
+    if broadcast_id > _broadcast_cursor(db, user_id):
+        if not _set_receipt(db, broadcast_id, user_id, is_read=True):
+            return None
+    return db.get(BroadcastNotification, broadcast_id)
+
+def create_broadcast(
+    db: Session, audience: BroadcastAudience, ticket: Ticket, type: NotificationType, title: str, message: str,
+    exclude: Iterable[int] = (),
+) -> BroadcastNotification:
+    """
+    Write one notification for a whole audience, hidden from the excluded users.
+    Runs in the caller's transaction and does not commit.
+    """
+    broadcast = BroadcastNotification(audience=audience, ticket_id=ticket.id, type=type, title=title, message=message)
+    db.add(broadcast)
+    db.flush()
+    exclude = sorted(set(exclude))
+    if exclude:
+        db.execute(insert(BroadcastReceipt), [
+            {"user_id": user_id, "broadcast_id": broadcast.id, "is_read": True, "is_deleted": True}
+            for user_id in exclude
+        ])
+    frame = {
+        "type": "notification",
+        "notification": _broadcast_out(broadcast, None, False).model_dump(mode="json"),
+        "unread_delta": 1,
+    }
+    _queue_broadcast_push(db, audience, frame, exclude)
+    return broadcast
+
+# Bulk writes
+
+# Columns written by the bulk insert, in COPY order
+_BULK_COLUMNS = ("user_id", "ticket_id", "type", "title", "message", "is_read", "created_at")
+
+def _notification_row(user_id: int, ticket: Ticket, type: NotificationType, title: str, message: str) -> dict:
+    return {
+        "user_id": user_id,
+        "ticket_id": ticket.id,
+        "type": type,
+        "title": title,
+        "message": message,
+        "is_read": False,
+        "created_at": datetime.utcnow(),
+    }
+
+def _copy_notifications(db: Session, rows: List[dict]) -> None:
+    """Stream rows with COPY on the session's own connection (same transaction)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        # Enum columns are stored by member name
+        writer.writerow([
+            row["user_id"], row["ticket_id"], row["type"].name, row["title"], row["message"],
+            "t" if row["is_read"] else "f", row["created_at"].isoformat(),
+        ])
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {Notification.__tablename__} ({', '.join(_BULK_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+# Coalescing: instead of adding a row, a new notification is merged into the
+# recipient's unread one of the same ticket and type from the last
+# NOTIFICATION_COALESCE_WINDOW_SECONDS, or into one of the same type on any
+# ticket from the last NOTIFICATION_DIGEST_WINDOW_SECONDS, which becomes a
+# digest without a ticket. `count` says how many events a row stands for.
+
+# Types merged as one: closing a ticket reports both
+_COALESCE_GROUPS = {NotificationType.TICKET_RESOLVED: NotificationType.TICKET_STATUS_CHANGED}
+
+def _coalesce_group(type: NotificationType) -> NotificationType:
+    return _COALESCE_GROUPS.get(type, type)
+
+def _coalesce(db: Session, rows: List[dict]) -> List[dict]:
+    """Merge rows into recent unread notifications. Returns the rows that still need inserting."""
+    window = max(NOTIFICATION_COALESCE_WINDOW_SECONDS, NOTIFICATION_DIGEST_WINDOW_SECONDS)
+    if window <= 0:
+        return rows
+    now = datetime.utcnow()
+    coalesce_after = now - timedelta(seconds=NOTIFICATION_COALESCE_WINDOW_SECONDS)
+    digest_after = now - timedelta(seconds=NOTIFICATION_DIGEST_WINDOW_SECONDS)
+    groups = {_coalesce_group(row["type"]) for row in rows}
+    
+    # Locked, so concurrent fan-outs can't both merge into the same row
+    candidates = db.query(Notification).filter(
+        Notification.user_id.in_({row["user_id"] for row in rows}),
+        Notification.type.in_([type for type in NotificationType if _coalesce_group(type) in groups]),
+        Notification.is_read == False,
+        Notification.created_at >= now - timedelta(seconds=window),
+    ).order_by(desc(Notification.created_at)).with_for_update().all()
+    if not candidates:
+        return rows
+    by_user: Dict[int, List[Notification]] = {}
+    for candidate in candidates:
+        by_user.setdefault(candidate.user_id, []).append(candidate)
+    
+    remaining = []
+    merged = {}
+    for row in rows:
+        group = _coalesce_group(row["type"])
+        same_ticket = digest = None
+        for candidate in by_user.get(row["user_id"], ()):
+            # Full rows stay as they are, so a steady stream can't keep one row alive forever
+            if _coalesce_group(candidate.type) != group or candidate.count >= NOTIFICATION_COALESCE_MAX_COUNT:
+                continue
+            if candidate.ticket_id is not None and candidate.ticket_id == row["ticket_id"] and candidate.created_at >= coalesce_after:
+                same_ticket = candidate
+                break
+            if digest is None and candidate.created_at >= digest_after:
+                digest = candidate
+        target = same_ticket or digest
+        if target is None:
+            remaining.append(row)
+            continue
+        
+        target.count += 1
+        target.type = row["type"]
+        target.title = row["title"]
+        target.created_at = now
+        if target is same_ticket:
+            target.message = row["message"]
+        else:
+            target.ticket_id = None
+            target.message = f"{target.count} notifications, the latest: {row['message']}"
+        merged[target.id] = target
+    
+    db.flush()
+    for notification in merged.values():
+        # Already unread, so the unread count doesn't change
+        _queue_push(db, notification.user_id, {
+            "type": "notification_updated",
+            "notification": NotificationOut.model_validate(notification).model_dump(mode="json"),
+            "unread_delta": 0,
+        })
+    return remaining
+
+def bulk_create_notifications(db: Session, rows: List[dict]) -> int:
+    """
+    Write many notifications in one statement: a multi-row INSERT, or COPY from
+    NOTIFICATION_COPY_THRESHOLD rows on PostgreSQL. Rows are coalesced into
+    recent unread notifications first. Runs in the caller's transaction and
+    does not commit; recipients get a push once it commits.
+    """
+    if not rows:
+        return 0
+    rows = _coalesce(db, rows)
+    if not rows:
+        return 0
+    if len(rows) >= NOTIFICATION_COPY_THRESHOLD and db.get_bind().dialect.name == "postgresql":
+        db.flush()
+        _copy_notifications(db, rows)
+        _count_new(db, [row["user_id"] for row in rows])
+        # COPY returns no ids; clients refetch the list on this frame
+        for row in rows:
+            _queue_push(db, row["user_id"], {"type": "notifications_changed", "unread_delta": 1})
+    else:
+        ids = db.scalars(insert(Notification).returning(Notification.id, sort_by_parameter_order=True), rows).all()
+        _count_new(db, [row["user_id"] for row in rows])
+        for notification_id, row in zip(ids, rows):
+            _queue_push(db, row["user_id"], _notification_frame(NotificationOut(id=notification_id, **row)))
+    return len(rows)
+
+# Retention
+
+def purge_notifications(db: Session, read_before: datetime, unread_before: datetime, limit: int) -> int:
+    """
+    Delete up to `limit` read notifications created before read_before and
+    unread ones created before unread_before, and take them off their users'
+    counters. Rows locked by other transactions are skipped. Does not commit.
+    """
+    expired = select(Notification.id).where(or_(
+        and_(Notification.is_read == True, Notification.created_at < read_before),
+        Notification.created_at < unread_before,
+    )).limit(limit).with_for_update(skip_locked=True)
+    deleted = db.execute(
+        delete(Notification).where(Notification.id.in_(expired.scalar_subquery()))
+        .returning(Notification.user_id, Notification.is_read)
+    ).all()
+    
+    deltas: Dict[int, Tuple[int, int]] = {}
+    for user_id, is_read in deleted:
+        total, unread = deltas.get(user_id, (0, 0))
+        deltas[user_id] = (total - 1, unread if is_read else unread - 1)
+    _bump_counters(db, deltas)
+    for user_id in deltas:
+        _touch(db, user_id)
+    return len(deleted)
+
+def purge_broadcasts(db: Session, before: datetime, limit: int) -> int:
+    """Delete up to `limit` broadcasts created before `before`, with their receipts. Does not commit."""
+    expired = select(BroadcastNotification.id).where(
+        BroadcastNotification.created_at < before
+    ).limit(limit).with_for_update(skip_locked=True)
+    deleted = db.execute(
+        delete(BroadcastNotification).where(BroadcastNotification.id.in_(expired.scalar_subquery()))
+    ).rowcount
+    if deleted:
+        for audience in BroadcastAudience:
+            _queue(db, None, audience_key(audience))
+    return deleted
+
+# Notification creation helpers for different events.
+# They only add rows to the caller's transaction; the caller commits.
+# In the request path they are reached through the event subscribers below.
 
 def notify_ticket_created(db: Session, ticket: Ticket) -> None:
     """Create notification when a ticket is created."""
-    # Notify all agents and admins
-    agents_and_admins = db.query(User).filter(User.role.in_(['agent', 'admin'])).all()
-    
-    for user in agents_and_admins:
-        notification = NotificationCreate(
-            user_id=user.id,
-            ticket_id=ticket.id,
-            type=NotificationType.TICKET_CREATED,
-            title="New Ticket Created",
-            message=f"New ticket #{ticket.ticket_uid}: {ticket.title}"
-        )
-        create_notification(db, notification)
+    title = "New Ticket Created"
+    message = f"New ticket #{ticket.ticket_uid}: {ticket.title}"
+    
+    # Notify the staff who opted in to its category (the assignee gets "Ticket Assigned to You" instead)
+    bulk_create_notifications(db, [
+        _notification_row(user_id, ticket, NotificationType.TICKET_CREATED, title, message)
+        for user_id in watcher_ids(db, ticket.id, exclude=[ticket.user_id, ticket.agent_id])
+    ])
 
-def notify_ticket_assigned(db: Session, ticket: Ticket, agent: User) -> None:
+def notify_ticket_assigned(db: Session, ticket: Ticket, agent_id: int) -> None:
     """Create notification when a ticket is assigned."""
     # Notify the assigned agent
-    notification = NotificationCreate(
-        user_id=agent.id,
-        ticket_id=ticket.id,
-        type=NotificationType.TICKET_ASSIGNED,
-        title="Ticket Assigned to You",
-        message=f"You have been assigned ticket #{ticket.ticket_uid}: {ticket.title}"
-    )
-    create_notification(db, notification)
+    bulk_create_notifications(db, [_notification_row(
+        agent_id, ticket, NotificationType.TICKET_ASSIGNED,
+        "Ticket Assigned to You",
+        f"You have been assigned ticket #{ticket.ticket_uid}: {ticket.title}",
+    )])
+
+def notify_transfer_approved(db: Session, ticket: Ticket, requester_id: int) -> None:
+    """Create notification when a requested transfer is approved."""
+    # Notify the agent who asked for the transfer
+    bulk_create_notifications(db, [_notification_row(
+        requester_id, ticket, NotificationType.TICKET_TRANSFER_APPROVED,
+        "Ticket Transfer Approved",
+        f"Your transfer request for ticket #{ticket.ticket_uid} has been approved",
+    )])
 
 def notify_ticket_status_changed(db: Session, ticket: Ticket, old_status: str, new_status: str) -> None:
     """Create notification when ticket status changes."""
-    # Notify the ticket creator
-    notification = NotificationCreate(
-        user_id=ticket.user_id,
-        ticket_id=ticket.id,
-        type=NotificationType.TICKET_STATUS_CHANGED,
-        title="Ticket Status Updated",
-        message=f"Your ticket #{ticket.ticket_uid} status changed from {old_status} to {new_status}"
-    )
-    create_notification(db, notification)
-    
-    # Also notify the assigned agent if different from creator
-    if ticket.agent_id and ticket.agent_id != ticket.user_id:
-        agent_notification = NotificationCreate(
-            user_id=ticket.agent_id,
-            ticket_id=ticket.id,
-            type=NotificationType.TICKET_STATUS_CHANGED,
-            title="Assigned Ticket Status Updated",
-            message=f"Ticket #{ticket.ticket_uid} status changed from {old_status} to {new_status}"
-        )
-        create_notification(db, agent_notification)
+    rows = []
+    for user_id in watcher_ids(db, ticket.id):
+        if user_id == ticket.user_id:
+            # The ticket creator
+            title = "Ticket Status Updated"
+            message = f"Your ticket #{ticket.ticket_uid} status changed from {old_status} to {new_status}"
+        else:
+            title = "Assigned Ticket Status Updated" if user_id == ticket.agent_id else "Ticket Status Updated"
+            message = f"Ticket #{ticket.ticket_uid} status changed from {old_status} to {new_status}"
+        rows.append(_notification_row(user_id, ticket, NotificationType.TICKET_STATUS_CHANGED, title, message))
+    bulk_create_notifications(db, rows)
 
-def notify_ticket_reopened(db: Session, ticket: Ticket) -> None:
+def notify_ticket_reopened(db: Session, ticket: Ticket, reopened_by: Optional[int] = None) -> None:
     """Create notification when a ticket is reopened."""
-    # Notify the assigned agent and admins
-    users_to_notify = []
-    
-    if ticket.agent_id:
-        users_to_notify.append(ticket.agent_id)
-    
-    # Also notify admins
-    admins = db.query(User).filter(User.role == 'admin').all()
-    for admin in admins:
-        if admin.id not in users_to_notify:
-            users_to_notify.append(admin.id)
-    
-    for user_id in users_to_notify:
-        notification = NotificationCreate(
-            user_id=user_id,
-            ticket_id=ticket.id,
-            type=NotificationType.TICKET_REOPENED,
-            title="Ticket Reopened",
-            message=f"Ticket #{ticket.ticket_uid}: {ticket.title} has been reopened"
-        )
-        create_notification(db, notification)
+    title = "Ticket Reopened"
+    message = f"Ticket #{ticket.ticket_uid}: {ticket.title} has been reopened"
+    
+    # Notify the ticket's watchers, but not the creator who asked for it or the admin who accepted
+    user_ids = watcher_ids(db, ticket.id, exclude=[ticket.user_id, reopened_by])
+    bulk_create_notifications(db, [
+        _notification_row(user_id, ticket, NotificationType.TICKET_REOPENED, title, message)
+        for user_id in user_ids
+    ])
+    
+    # Admins follow reopened tickets
+    create_broadcast(
+        db, BroadcastAudience.ADMINS, ticket, NotificationType.TICKET_REOPENED, title, message,
+        exclude=user_ids + ([reopened_by] if reopened_by else []),
+    )
 
 def notify_note_added(db: Session, ticket: Ticket, agent: User) -> None:
     """Create notification when a note is added."""
-    # Notify other agents working on this ticket and admins
-    agents_and_admins = db.query(User).filter(
-        User.role.in_(['agent', 'admin']),
-        User.id != agent.id  # Don't notify the person who added the note
-    ).all()
-    
-    for user in agents_and_admins:
-        notification = NotificationCreate(
-            user_id=user.id,
-            ticket_id=ticket.id,
-            type=NotificationType.NOTE_ADDED,
-            title="New Note Added",
-            message=f"A new note was added to ticket #{ticket.ticket_uid} by {agent.name}"
+    # Notes are internal: notify the staff watching the ticket, but not the person who added the note
+    bulk_create_notifications(db, [
+        _notification_row(
+            user_id, ticket, NotificationType.NOTE_ADDED,
+            "New Note Added",
+            f"A new note was added to ticket #{ticket.ticket_uid} by {agent.name}",
         )
-        create_notification(db, notification)
+        for user_id in watcher_ids(db, ticket.id, exclude=[agent.id], staff_only=True)
+    ])
 
 def notify_ticket_transferred(db: Session, ticket: Ticket, old_agent_id: int, new_agent_id: int) -> None:
     """Create notification when a ticket is transferred."""
-    # Get agent objects
-    old_agent = db.query(User).filter(User.id == old_agent_id).first()
-    new_agent = db.query(User).filter(User.id == new_agent_id).first()
-    
-    if not old_agent or not new_agent:
+    # Get agent names
+    names = dict(db.query(User.id, User.name).filter(User.id.in_([old_agent_id, new_agent_id])).all())
+    if old_agent_id not in names or new_agent_id not in names:
         return
+    old_agent_name, new_agent_name = names[old_agent_id], names[new_agent_id]
     
-    # Notify the new agent
-    notification = NotificationCreate(
-        user_id=new_agent_id,
-        ticket_id=ticket.id,
-        type=NotificationType.TICKET_TRANSFER_APPROVED,
-        title="Ticket Transferred to You",
-        message=f"Ticket #{ticket.ticket_uid} has been transferred to you from {old_agent.name}"
-    )
-    create_notification(db, notification)
+    rows = [
+        # Notify the new agent
+        _notification_row(
+            new_agent_id, ticket, NotificationType.TICKET_TRANSFER_APPROVED,
+            "Ticket Transferred to You",
+            f"Ticket #{ticket.ticket_uid} has been transferred to you from {old_agent_name}",
+        ),
+        # Notify the old agent
+        _notification_row(
+            old_agent_id, ticket, NotificationType.TICKET_TRANSFER_APPROVED,
+            "Ticket Transfer Completed",
+            f"Ticket #{ticket.ticket_uid} has been transferred from you to {new_agent_name}",
+        ),
+    ]
     
-    # Notify the old agent
-    notification = NotificationCreate(
-        user_id=old_agent_id,
-        ticket_id=ticket.id,
-        type=NotificationType.TICKET_TRANSFER_APPROVED,
-        title="Ticket Transfer Completed",
-        message=f"Ticket #{ticket.ticket_uid} has been transferred from you to {new_agent.name}"
-    )
-    create_notification(db, notification)
-    
-    # Notify admins
-    admins = db.query(User).filter(User.role == 'admin').all()
-    for admin in admins:
-        if admin.id not in [old_agent_id, new_agent_id]:
-            notification = NotificationCreate(
-                user_id=admin.id,
-                ticket_id=ticket.id,
-                type=NotificationType.TICKET_TRANSFER_APPROVED,
-                title="Ticket Transferred",
-                message=f"Ticket #{ticket.ticket_uid} transferred from {old_agent.name} to {new_agent.name}"
-            )
-            create_notification(db, notification)
+    # Notify the other watchers
+    rows += [
+        _notification_row(
+            user_id, ticket, NotificationType.TICKET_TRANSFER_APPROVED,
+            "Ticket Transferred",
+            f"Ticket #{ticket.ticket_uid} transferred from {old_agent_name} to {new_agent_name}",
+        )
+        for user_id in watcher_ids(db, ticket.id, exclude=[old_agent_id, new_agent_id])
+    ]
+    bulk_create_notifications(db, rows)
 
 def notify_ticket_unassigned(db: Session, ticket: Ticket, old_agent_id: int) -> None:
     """Create notification when a ticket is unassigned."""
-    old_agent = db.query(User).filter(User.id == old_agent_id).first()
-    if not old_agent:
+    old_agent_name = db.query(User.name).filter(User.id == old_agent_id).scalar()
+    if old_agent_name is None:
         return
     
     # Notify the old agent
-    notification = NotificationCreate(
-        user_id=old_agent_id,
-        ticket_id=ticket.id,
-        type=NotificationType.TICKET_STATUS_CHANGED,
-        title="Ticket Unassigned",
-        message=f"Ticket #{ticket.ticket_uid} has been unassigned from you"
+    rows = [_notification_row(
+        old_agent_id, ticket, NotificationType.TICKET_STATUS_CHANGED,
+        "Ticket Unassigned",
+        f"Ticket #{ticket.ticket_uid} has been unassigned from you",
+    )]
+    
+    # Notify the other watchers
+    title = "Ticket Unassigned"
+    message = f"Ticket #{ticket.ticket_uid} has been unassigned from {old_agent_name}"
+    user_ids = watcher_ids(db, ticket.id, exclude=[old_agent_id])
+    rows += [
+        _notification_row(user_id, ticket, NotificationType.TICKET_STATUS_CHANGED, title, message)
+        for user_id in user_ids
+    ]
+    bulk_create_notifications(db, rows)
+    
+    # Admins need to find the ticket a new agent
+    create_broadcast(
+        db, BroadcastAudience.ADMINS, ticket, NotificationType.TICKET_STATUS_CHANGED, title, message,
+        exclude=user_ids + [old_agent_id],
     )
-    create_notification(db, notification)
-    
-    # Notify admins
-    admins = db.query(User).filter(User.role == 'admin').all()
-    for admin in admins:
-        notification = NotificationCreate(
-            user_id=admin.id,
-            ticket_id=ticket.id,
-            type=NotificationType.TICKET_STATUS_CHANGED,
-            title="Ticket Unassigned",
-            message=f"Ticket #{ticket.ticket_uid} has been unassigned from {old_agent.name}"
-        )
-        create_notification(db, notification)
 
 def notify_ticket_updated(db: Session, ticket: Ticket, updated_by: User, changes: str) -> None:
     """Create notification when ticket details are updated."""
+    rows = []
+    
     # Notify the ticket creator (if different from updater)
     if ticket.user_id != updated_by.id:
-        notification = NotificationCreate(
-            user_id=ticket.user_id,
-            ticket_id=ticket.id,
-            type=NotificationType.TICKET_UPDATED,
-            title="Your Ticket Updated",
-            message=f"Your ticket #{ticket.ticket_uid} has been updated: {changes}"
-        )
-        create_notification(db, notification)
+        rows.append(_notification_row(
+            ticket.user_id, ticket, NotificationType.TICKET_UPDATED,
+            "Your Ticket Updated",
+            f"Your ticket #{ticket.ticket_uid} has been updated: {changes}",
+        ))
     
     # Notify assigned agent (if different from updater and creator)
     if ticket.agent_id and ticket.agent_id != updated_by.id and ticket.agent_id != ticket.user_id:
-        notification = NotificationCreate(
-            user_id=ticket.agent_id,
-            ticket_id=ticket.id,
-            type=NotificationType.TICKET_UPDATED,
-            title="Assigned Ticket Updated",
-            message=f"Ticket #{ticket.ticket_uid} assigned to you has been updated: {changes}"
-        )
-        create_notification(db, notification)
+        rows.append(_notification_row(
+            ticket.agent_id, ticket, NotificationType.TICKET_UPDATED,
+            "Assigned Ticket Updated",
+            f"Ticket #{ticket.ticket_uid} assigned to you has been updated: {changes}",
+        ))
+    bulk_create_notifications(db, rows)
 
 def notify_ticket_resolved(db: Session, ticket: Ticket, resolved_by: User) -> None:
     """Create notification when a ticket is resolved."""
     # Notify the ticket creator
-    notification = NotificationCreate(
-        user_id=ticket.user_id,
-        ticket_id=ticket.id,
-        type=NotificationType.TICKET_RESOLVED,
-        title="Your Ticket Resolved",
-        message=f"Your ticket #{ticket.ticket_uid}: {ticket.title} has been resolved by {resolved_by.name}"
-    )
-    create_notification(db, notification)
+    bulk_create_notifications(db, [_notification_row(
+        ticket.user_id, ticket, NotificationType.TICKET_RESOLVED,
+        "Your Ticket Resolved",
+        f"Your ticket #{ticket.ticket_uid}: {ticket.title} has been resolved by {resolved_by.name}",
+    )])
 
 def notify_ticket_transfer_requested(db: Session, ticket: Ticket, from_agent: User, to_agent: User, requested_by: User) -> None:
     """Create notification when a ticket transfer is requested."""
     # Notify the target agent
-    notification = NotificationCreate(
-        user_id=to_agent.id,
-        ticket_id=ticket.id,
-        type=NotificationType.TICKET_TRANSFER_REQUESTED,
-        title="Ticket Transfer Request",
-        message=f"Transfer request for ticket #{ticket.ticket_uid} from {from_agent.name}"
+    rows = [_notification_row(
+        to_agent.id, ticket, NotificationType.TICKET_TRANSFER_REQUESTED,
+        "Ticket Transfer Request",
+        f"Transfer request for ticket #{ticket.ticket_uid} from {from_agent.name}",
+    )]
+    
+    # Notify the other staff watching the ticket
+    title = "Ticket Transfer Request Pending"
+    message = f"Transfer request for ticket #{ticket.ticket_uid} from {from_agent.name} to {to_agent.name}"
+    user_ids = watcher_ids(db, ticket.id, exclude=[requested_by.id, to_agent.id], staff_only=True)
+    rows += [
+        _notification_row(user_id, ticket, NotificationType.TICKET_TRANSFER_REQUESTED, title, message)
+        for user_id in user_ids
+    ]
+    bulk_create_notifications(db, rows)
+    
+    # Admins approve transfers
+    create_broadcast(
+        db, BroadcastAudience.ADMINS, ticket, NotificationType.TICKET_TRANSFER_REQUESTED, title, message,
+        exclude=user_ids + [requested_by.id, to_agent.id],
     )
-    create_notification(db, notification)
-    
-    # Notify admins
-    admins = db.query(User).filter(User.role == 'admin').all()
-    for admin in admins:
-        if admin.id != requested_by.id:
-            notification = NotificationCreate(
-                user_id=admin.id,
-                ticket_id=ticket.id,
-                type=NotificationType.TICKET_TRANSFER_REQUESTED,
-                title="Ticket Transfer Request Pending",
-                message=f"Transfer request for ticket #{ticket.ticket_uid} from {from_agent.name} to {to_agent.name}"
-            )
-            create_notification(db, notification)
\ No newline at end of file
+
+# Event subscribers, run by the event bus consumers once the change is committed
+
+def _on_ticket_created(db: Session, event: TicketCreated) -> None:
+    ticket = db.get(Ticket, event.ticket_id)
+    if ticket is None:
+        return
+    # Notify staff about ticket creation
+    notify_ticket_created(db, ticket)
+    
+    # Notify agent if assigned
+    if event.agent_id:
+        notify_ticket_assigned(db, ticket, event.agent_id)
+
+def _on_ticket_assigned(db: Session, event: TicketAssigned) -> None:
+    ticket = db.get(Ticket, event.ticket_id)
+    if ticket is None:
+        return
+    if event.agent_id and event.old_agent_id:
+        changes = "Ticket reassigned from one agent to another"
+    elif event.agent_id:
+        changes = "Ticket assigned to an agent"
+    else:
+        changes = "Ticket unassigned from agent"
+    
+    updater = db.get(User, ticket.user_id)  # Default to ticket creator
+    if updater:
+        notify_ticket_updated(db, ticket, updater, changes)
+    
+    if event.agent_id:
+        # Notify new agent about assignment
+        notify_ticket_assigned(db, ticket, event.agent_id)
+    if event.old_agent_id:
+        # Notify old agent about unassignment
+        notify_ticket_unassigned(db, ticket, event.old_agent_id)
+
+def _on_status_changed(db: Session, event: StatusChanged) -> None:
+    ticket = db.get(Ticket, event.ticket_id)
+    if ticket is not None:
+        notify_ticket_status_changed(db, ticket, event.old_status, event.new_status)
+
+def _on_ticket_reopened(db: Session, event: TicketReopened) -> None:
+    ticket = db.get(Ticket, event.ticket_id)
+    if ticket is not None:
+        notify_ticket_reopened(db, ticket, event.reopened_by)
+
+def _on_ticket_closed(db: Session, event: TicketClosed) -> None:
+    ticket = db.get(Ticket, event.ticket_id)
+    if ticket is None:
+        return
+    # Notify about status change
+    notify_ticket_status_changed(db, ticket, "assigned", "closed")
+    
+    # And about the resolution, which is coalesced into it for the creator
+    agent = db.get(User, event.agent_id)
+    if agent:
+        notify_ticket_resolved(db, ticket, agent)
+
+def _on_transfer_requested(db: Session, event: TransferRequested) -> None:
+    ticket = db.get(Ticket, event.ticket_id)
+    from_agent = db.get(User, event.from_agent_id)
+    to_agent = db.get(User, event.to_agent_id)
+    if ticket and from_agent and to_agent:
+        # The requesting agent is the one giving the ticket away
+        notify_ticket_transfer_requested(db, ticket, from_agent, to_agent, from_agent)
+
+def _on_transfer_approved(db: Session, event: TransferApproved) -> None:
+    ticket = db.get(Ticket, event.ticket_id)
+    if ticket is None:
+        return
+    # Notify new agent about ticket assignment
+    notify_ticket_assigned(db, ticket, event.to_agent_id)
+    # Notify old agent about transfer completion (if different from requester)
+    if event.old_agent_id and event.old_agent_id != event.from_agent_id:
+        notify_ticket_transferred(db, ticket, event.old_agent_id, event.to_agent_id)
+    # Notify requesting agent about transfer approval
+    notify_transfer_approved(db, ticket, event.from_agent_id)
+
+def _on_note_added(db: Session, event: NoteAdded) -> None:
+    ticket = db.get(Ticket, event.ticket_id)
+    agent = db.get(User, event.agent_id)
+    if ticket and agent:
+        notify_note_added(db, ticket, agent)
+
+event_bus.subscribe(TicketCreated, _on_ticket_created)
+event_bus.subscribe(TicketAssigned, _on_ticket_assigned)
+event_bus.subscribe(StatusChanged, _on_status_changed)
+event_bus.subscribe(TicketReopened, _on_ticket_reopened)
+event_bus.subscribe(TicketClosed, _on_ticket_closed)
+event_bus.subscribe(TransferRequested, _on_transfer_requested)
+event_bus.subscribe(TransferApproved, _on_transfer_approved)
+event_bus.subscribe(NoteAdded, _on_note_added)
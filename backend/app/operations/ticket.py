@@ -3,7 +3,19 @@ from sqlalchemy import func, or_, String, and_, desc
 from app.models import user as user_model
 from app.models.ticket import Ticket, TicketPriority, TicketStatus
 from app.models.ticket_transfer import TicketTransfer, TransferStatus
-from app.operations import notification as notification_ops
+from app.core.events import (
+    publish,
+    NoteAdded,
+    StatusChanged,
+    TicketAssigned,
+    TicketClosed,
+    TicketCreated,
+    TicketReopened,
+    TransferApproved,
+    TransferRequested,
+)
+from app.core.ticket_routes import ticket_routes
+from app.operations.ticket_watcher import change_assignee, watch_new_ticket
 import random
 from datetime import datetime, timedelta 
 
@@ -84,17 +96,13 @@ def update_ticket_status(db: Session, db_ticket: ticket_model, status: TicketSta
     """Updates the status of a given ticket."""
     old_status = db_ticket.status
     db_ticket.status = status
-    db.commit()
-    db.refresh(db_ticket)
     
-    # Create notifications for status changes
-    try:
-        if old_status != status:
-            notification_ops.notify_ticket_status_changed(db, db_ticket, old_status.value, status.value)
-    except Exception as e:
-        # Don't fail status update if notifications fail
-        print(f"Notification error: {e}")
+    # Notifications are sent by the event bus once this commits
+    if old_status != status:
+        publish(db, StatusChanged(db_ticket.id, old_status.value, status.value))
     
+    db.commit()
+    db.refresh(db_ticket)
     return db_ticket
 
 
@@ -411,21 +419,15 @@ def create_ticket(db: Session, ticket_data: ticket_schema, user_id: int):
 
     
     db.add(db_ticket)
-    db.commit()
-    db.refresh(db_ticket)
+    db.flush()
+    watch_new_ticket(db, db_ticket)
     
-    # Create notifications
-    try:
-        # Notify user about ticket creation
-        notification_ops.notify_ticket_created(db, db_ticket)
-        
-        # Notify agent if assigned
-        if best_agent_id:
-            notification_ops.notify_ticket_assigned(db, db_ticket, best_agent_id)
-    except Exception as e:
-        # Don't fail ticket creation if notifications fail
-        print(f"Notification error: {e}")
+    # Notifications are sent by the event bus once this commits
+    publish(db, TicketCreated(db_ticket.id, best_agent_id))
     
+    db.commit()
+    db.refresh(db_ticket)
+    ticket_routes.changed(db_ticket.id, db_ticket.user_id, db_ticket.agent_id)
     return db_ticket
 
 def create_ticket_transfer_request(db: Session, db_ticket: ticket_model, from_agent_id: int, to_agent_id: int, reason: str):
@@ -438,20 +440,12 @@ def create_ticket_transfer_request(db: Session, db_ticket: ticket_model, from_ag
         status= TransferStatus.pending
     )
     db.add(transfer_request)
-    db.commit()
-    db.refresh(transfer_request)
     
-    # Create notification for transfer request
-    try:
-        from_agent = db.query(User).filter(User.id == from_agent_id).first()
-        to_agent = db.query(User).filter(User.id == to_agent_id).first()
-        requester = db.query(User).filter(User.id == from_agent_id).first()  # Usually the same as from_agent
-        
-        if from_agent and to_agent and requester:
-            notification_ops.notify_ticket_transfer_requested(db, db_ticket, from_agent, to_agent, requester)
-    except Exception as e:
-        print(f"Notification error for transfer request: {e}")
+    # Notifications are sent by the event bus once this commits
+    publish(db, TransferRequested(db_ticket.id, from_agent_id, to_agent_id))
     
+    db.commit()
+    db.refresh(transfer_request)
     return transfer_request
 
 def approve_ticket_transfer(db: Session, transfer_request: TicketTransfer):
@@ -473,21 +467,14 @@ def approve_ticket_transfer(db: Session, transfer_request: TicketTransfer):
     ticket.status = TicketStatus.assigned
     
     db.add(ticket)
+    change_assignee(db, ticket.id, old_agent_id, ticket.agent_id)
+    
+    # Notifications are sent by the event bus once this commits
+    publish(db, TransferApproved(ticket.id, transfer_request.from_agent_id, transfer_request.to_agent_id, old_agent_id))
+    
     db.commit()
     db.refresh(ticket)
-    
-    # Create notifications for transfer approval
-    try:
-        # Notify new agent about ticket assignment
-        notification_ops.notify_ticket_assigned(db, ticket, transfer_request.to_agent_id)
-        # Notify old agent about transfer completion (if different from requester)
-        if old_agent_id and old_agent_id != transfer_request.from_agent_id:
-            notification_ops.notify_ticket_transferred(db, ticket, old_agent_id, transfer_request.to_agent_id)
-        # Notify requesting agent about transfer approval
-        notification_ops.notify_transfer_approved(db, ticket, transfer_request.from_agent_id)
-    except Exception as e:
-        # Don't fail transfer if notifications fail
-        print(f"Notification error: {e}")
+    ticket_routes.changed(ticket.id, ticket.user_id, ticket.agent_id)
     
     print(f"Ticket #{ticket.id} transferred from agent {old_agent_id} to agent {transfer_request.to_agent_id}")
     return ticket
@@ -532,21 +519,20 @@ def search_tickets(db: Session, search_query: str):
         .all()
     )
 
-def accept_reopen_ticket(db: Session, ticket: Ticket):
+def accept_reopen_ticket(db: Session, ticket: Ticket, reopened_by: int):
     ticket.status = TicketStatus.reopened
-    db.commit()
-    db.refresh(ticket)
     
-    # Create notification for ticket reopened
-    try:
-        notification_ops.notify_ticket_reopened(db, ticket)
-    except Exception as e:
-        print(f"Notification error for ticket reopen: {e}")
+    # Notifications are sent by the event bus once this commits
+    publish(db, TicketReopened(ticket.id, reopened_by))
     
+    db.commit()
+    db.refresh(ticket)
     return ticket
 
 def create_ticket_note(db: Session, ticket_note: TicketNote):
     db.add(ticket_note)
+    # Notifications are sent by the event bus once this commits
+    publish(db, NoteAdded(ticket_note.ticket_id, ticket_note.agent_id))
     db.commit()
     db.refresh(ticket_note)
     return ticket_note
@@ -577,34 +563,14 @@ def admin_assign_ticket(db: Session, db_ticket: ticket_model, agent_id: Optional
         if db_ticket.status == TicketStatus.assigned:
             db_ticket.status = TicketStatus.open
     
+    # Notifications are sent by the event bus once this commits
+    if old_agent_id != agent_id:
+        change_assignee(db, db_ticket.id, old_agent_id, agent_id)
+        publish(db, TicketAssigned(db_ticket.id, agent_id, old_agent_id))
+    
     db.commit()
     db.refresh(db_ticket)
-    
-    # Create notifications for assignment changes
-    try:
-        if old_agent_id != agent_id:
-            # Create update notification for assignment change
-            updater = db.query(User).filter(User.id == db_ticket.user_id).first()  # Default to ticket creator
-            if agent_id and old_agent_id:
-                changes = f"Ticket reassigned from one agent to another"
-            elif agent_id:
-                changes = f"Ticket assigned to an agent"
-            else:
-                changes = f"Ticket unassigned from agent"
-            
-            if updater:
-                notification_ops.notify_ticket_updated(db, db_ticket, updater, changes)
-            
-            if agent_id:
-                # Notify new agent about assignment
-                notification_ops.notify_ticket_assigned(db, db_ticket, agent_id)
-            if old_agent_id:
-                # Notify old agent about unassignment
-                notification_ops.notify_ticket_unassigned(db, db_ticket, old_agent_id)
-    except Exception as e:
-        # Don't fail assignment if notifications fail
-        print(f"Notification error: {e}")
-    
+    ticket_routes.changed(db_ticket.id, db_ticket.user_id, db_ticket.agent_id)
     return db_ticket
 
 
@@ -652,22 +618,11 @@ def close_ticket(db: Session, db_ticket: ticket_model, agent_id: int, resolution
         )
         db.add(note)
     
+    # Notifications are sent by the event bus once this commits
+    publish(db, TicketClosed(db_ticket.id, agent_id))
+    
     db.commit()
     db.refresh(db_ticket)
-    
-    # Create notifications
-    try:
-        # Notify about ticket resolution
-        agent = db.query(User).filter(User.id == agent_id).first()
-        if agent:
-            notification_ops.notify_ticket_resolved(db, db_ticket, agent)
-        
-        # Also notify about status change
-        notification_ops.notify_ticket_status_changed(db, db_ticket, "assigned", "closed")
-    except Exception as e:
-        # Don't fail closure if notifications fail
-        print(f"Notification error: {e}")
-    
     return db_ticket
 
 
@@ -0,0 +1,97 @@
+"""
+Ticket watchers: who is notified about a ticket.
+
+The creator and the assigned agent watch a ticket automatically, agents
+who opted in on a category watch every new ticket in it, and staff can
+follow or unfollow any ticket. Notifications go to a ticket's watchers
+only, resolved with one primary-key range query.
+"""
+
+from sqlalchemy import delete, select, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from typing import Iterable, List, Optional
+from datetime import datetime
+
+from app.models.ticket import Ticket
+from app.models.ticket_watcher import TicketWatcher
+from app.models.user import User, UserRole
+from app.models.agent_category_assignment import AgentCategoryAssignment
+
+def add_watchers(db: Session, ticket_id: int, user_ids: Iterable[Optional[int]], reason: str) -> None:
+    """Add watchers to a ticket; users who already watch it keep their reason. Does not commit."""
+    rows = [
+        {"ticket_id": ticket_id, "user_id": user_id, "reason": reason, "created_at": datetime.utcnow()}
+        for user_id in sorted({user_id for user_id in user_ids if user_id is not None})
+    ]
+    if rows:
+        db.execute(pg_insert(TicketWatcher).values(rows).on_conflict_do_nothing(
+            index_elements=[TicketWatcher.ticket_id, TicketWatcher.user_id]
+        ))
+
+def watch_new_ticket(db: Session, ticket: Ticket) -> None:
+    """Watchers of a just created ticket: creator, assignee and the category's opted-in agents. Does not commit."""
+    add_watchers(db, ticket.id, [ticket.user_id], "creator")
+    add_watchers(db, ticket.id, [ticket.agent_id], "assignee")
+    opted_in = select(
+        literal(ticket.id), AgentCategoryAssignment.agent_id, literal("category"), literal(datetime.utcnow())
+    ).where(
+        AgentCategoryAssignment.category_id == ticket.category_id,
+        AgentCategoryAssignment.watch_new_tickets == True,
+    )
+    db.execute(
+        pg_insert(TicketWatcher)
+        .from_select(["ticket_id", "user_id", "reason", "created_at"], opted_in)
+        .on_conflict_do_nothing(index_elements=[TicketWatcher.ticket_id, TicketWatcher.user_id])
+    )
+
+def change_assignee(db: Session, ticket_id: int, old_agent_id: Optional[int], new_agent_id: Optional[int]) -> None:
+    """Move the assignee watch to the new agent. Does not commit."""
+    if old_agent_id == new_agent_id:
+        return
+    if old_agent_id is not None:
+        # Unless they also follow it for another reason
+        db.execute(delete(TicketWatcher).where(
+            TicketWatcher.ticket_id == ticket_id,
+            TicketWatcher.user_id == old_agent_id,
+            TicketWatcher.reason == "assignee",
+        ))
+    add_watchers(db, ticket_id, [new_agent_id], "assignee")
+
+def watcher_ids(
+    db: Session, ticket_id: int, exclude: Iterable[Optional[int]] = (), staff_only: bool = False
+) -> List[int]:
+    """Ids of a ticket's watchers. staff_only leaves out end users, for internal updates."""
+    exclude = set(exclude)
+    query = db.query(TicketWatcher.user_id).filter(TicketWatcher.ticket_id == ticket_id)
+    if staff_only:
+        query = query.join(User, User.id == TicketWatcher.user_id).filter(
+            User.role.in_([UserRole.agent, UserRole.admin])
+        )
+    return [user_id for (user_id,) in query if user_id not in exclude]
+
+def follow_ticket(db: Session, ticket_id: int, user_id: int) -> None:
+    add_watchers(db, ticket_id, [user_id], "follower")
+    db.commit()
+
+def unfollow_ticket(db: Session, ticket_id: int, user_id: int) -> bool:
+    """Stop watching a ticket. False if the user wasn't watching it."""
+    deleted = db.execute(delete(TicketWatcher).where(
+        TicketWatcher.ticket_id == ticket_id,
+        TicketWatcher.user_id == user_id,
+    )).rowcount
+    db.commit()
+    return deleted > 0
+
+def backfill_watchers(db: Session) -> int:
+    """Add the creator and assignee of every existing ticket as watchers. Safe to run repeatedly."""
+    inserted = 0
+    for column, reason in ((Ticket.user_id, "creator"), (Ticket.agent_id, "assignee")):
+        rows = select(Ticket.id, column, literal(reason), literal(datetime.utcnow())).where(column.is_not(None))
+        inserted += db.execute(
+            pg_insert(TicketWatcher)
+            .from_select(["ticket_id", "user_id", "reason", "created_at"], rows)
+            .on_conflict_do_nothing(index_elements=[TicketWatcher.ticket_id, TicketWatcher.user_id])
+        ).rowcount
+    db.commit()
+    return inserted
@@ -2,6 +2,8 @@ from sqlalchemy.orm import Session
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, UserUpdate
 from app.core.security import get_password_hash
+from app.core.principal_cache import principal_cache
+from app.operations.auth import revoke_user_tokens
 
 def get_user(db: Session, user_id: int):
     return db.query(User).filter(User.id == user_id).first()
@@ -55,6 +57,9 @@ def update_user(db: Session, user_id: int, user: UserUpdate):
     if not db_user:
         return None
     
+    # A role change or password reset must not leave old tokens usable
+    revoke_tokens = (user.role is not None and user.role != db_user.role) or user.password is not None
+
     # Update fields if provided
     if user.name is not None:
         db_user.name = user.name
@@ -69,6 +74,10 @@ def update_user(db: Session, user_id: int, user: UserUpdate):
         db_user.profile_photo_url = user.profile_photo_url
     
     db.commit()
+    # Name, role or credentials may have changed
+    principal_cache.invalidate(user_id)
+    if revoke_tokens:
+        revoke_user_tokens(db, user_id)
     db.refresh(db_user)
     return db_user
 
@@ -80,4 +89,5 @@ def delete_user(db: Session, user_id: int):
         return None
     db.delete(db_user)
     db.commit()
+    principal_cache.invalidate(user_id)
     return db_user
@@ -1,7 +1,19 @@
-from .ticket import router as ticket_router
-from .user import router as user_router
-from .category import router as category_router
-from .ticket_transfer import router as ticket_transfer_router
-from .message_ws import router as message_ws_router
-from .notification import router as notification_router
-from .call_ws import router as call_ws_router
+import importlib
+
+# Router re-exports are resolved on first access so importing one router
+# module doesn't import (and build) every other router.
+_ROUTER_MODULES = {
+    "ticket_router": ".ticket",
+    "user_router": ".user",
+    "category_router": ".category",
+    "ticket_transfer_router": ".ticket_transfer",
+    "message_ws_router": ".message_ws",
+    "notification_router": ".notification",
+    "call_ws_router": ".call_ws",
+    "diagnostics_router": ".diagnostics",
+}
+
+def __getattr__(name):
+    if name in _ROUTER_MODULES:
+        return importlib.import_module(_ROUTER_MODULES[name], __name__).router
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
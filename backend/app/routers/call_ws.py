@@ -9,43 +9,20 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User, UserRole
 from app.models.ticket import Ticket
-from app.dependencies import get_current_user
-from jose import JWTError, jwt
-from app.core import security
-from typing import Dict, Set
+from app.dependencies import get_current_user, authenticate_token
+from app.core.shutdown import shutdown, close_for_restart
+from app.core.call_sessions import call_sessions
+from app.core.constants import CALL_SIGNAL_LOG_SAMPLE_RATE
 import json
 import logging
+import random
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/calls", tags=["Calls"])
 
-# Store active call connections: ticket_id -> {user_ws, agent_ws}
-active_calls: Dict[int, Dict[str, WebSocket]] = {}
-
-# Store user to ticket mapping: user_id -> set of ticket_ids
-user_tickets: Dict[int, Set[int]] = {}
-
-
-async def get_current_user_from_token(token: str, db: Session) -> User:
-    """Extract and validate user from JWT token"""
-    try:
-        payload = jwt.decode(token, security.SECRET_KEY, algorithms=[security.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-        
-        user = db.query(User).filter(User.id == int(user_id)).first()
-        if user is None:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-        
-        return user
-    except JWTError as e:
-        logger.error(f"JWT decode error: {e}")
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    except ValueError as e:
-        logger.error(f"Invalid user ID format: {e}")
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token format")
+# Who is in which call, and the relay to their sockets, is shared by all
+# workers through app.core.call_sessions
 
 
 @router.websocket("/ws/{ticket_id}")
@@ -53,18 +30,29 @@ async def call_websocket(
     websocket: WebSocket,
     ticket_id: int,
     token: str,
+    batch_ice: bool = False,
     db: Session = Depends(get_db)
 ):
     """
     WebSocket endpoint for WebRTC signaling
-    Handles offer, answer, and ICE candidate exchange
+    Handles offer, answer, and ICE candidate exchange.
+    Clients connecting with batch_ice=1 receive the peer's ICE candidates
+    as {"type": "ice-candidates", "candidates": [...]} frames.
     """
     await websocket.accept()
+    conn_id = None
+    if shutdown.draining:
+        await close_for_restart(websocket)
+        return
     
     try:
         # Authenticate user
         logger.info(f"WebSocket connection attempt for ticket {ticket_id}")
-        current_user = await get_current_user_from_token(token, db)
+        current_user = authenticate_token(token, db)
+        if current_user is None:
+            await websocket.send_json({"type": "error", "message": "Invalid token"})
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
         logger.info(f"User authenticated: {current_user.id} ({current_user.role})")
         
         # Verify ticket exists and user has access
@@ -90,72 +78,64 @@ async def call_websocket(
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
             return
         
-        # Initialize ticket in active calls if not exists
-        if ticket_id not in active_calls:
-            active_calls[ticket_id] = {}
-        
-        # Determine role and store connection
+        # Determine role; the other side may be connected to another worker
         role = "user" if is_user else "agent"
-        active_calls[ticket_id][role] = websocket
-        
-        # Track user tickets
-        if current_user.id not in user_tickets:
-            user_tickets[current_user.id] = set()
-        user_tickets[current_user.id].add(ticket_id)
-        
-        logger.info(f"User {current_user.id} ({role}) connected to call for ticket {ticket_id}")
-        
-        # Notify the other party that someone joined
         other_role = "agent" if role == "user" else "user"
-        if other_role in active_calls[ticket_id]:
-            await active_calls[ticket_id][other_role].send_json({
-                "type": "peer-connected",
-                "role": role,
-                "userId": current_user.id,
-                "userName": current_user.name
-            })
         
         # Send connection success
         await websocket.send_json({
             "type": "connected",
             "role": role,
             "ticketId": ticket_id,
-            "peerOnline": other_role in active_calls[ticket_id]
+            "peerOnline": call_sessions.peer(ticket_id, other_role) is not None
+        })
+        
+        conn_id = await call_sessions.join(websocket, ticket_id, role, current_user.id, current_user.name, batch_ice)
+        logger.info(f"User {current_user.id} ({role}) connected to call for ticket {ticket_id}")
+        
+        # Notify the other party that someone joined
+        call_sessions.send(ticket_id, other_role, {
+            "type": "peer-connected",
+            "role": role,
+            "userId": current_user.id,
+            "userName": current_user.name
         })
         
         # Handle signaling messages
         while True:
             data = await websocket.receive_text()
             message = json.loads(data)
+            message_type = message.get("type")
             
-            logger.info(f"Received signal from {role}: {message.get('type')}")
+            call_sessions.count_signal(message_type)
+            if random.random() < CALL_SIGNAL_LOG_SAMPLE_RATE:
+                logger.info(f"Received signal from {role}: {message_type} (sampled)")
             
             # Forward signaling messages to the other peer
-            if other_role in active_calls[ticket_id]:
-                peer_ws = active_calls[ticket_id][other_role]
-                message_data = {
-                    **message,
-                    "from": role,
-                    "fromUserId": current_user.id,
-                    "fromUserName": current_user.name
-                }
-                
-                # Add extra metadata for offer messages
-                if message.get("type") == "offer":
-                    message_data["callerId"] = current_user.id
-                    message_data["callerName"] = current_user.name
-                    message_data["callerRole"] = role
-                    message_data["ticketId"] = ticket_id
-                    message_data["callType"] = message.get("callType", "audio")
-                
-                await peer_ws.send_json(message_data)
-            else:
+            message_data = {
+                **message,
+                "from": role,
+                "fromUserId": current_user.id,
+                "fromUserName": current_user.name
+            }
+            
+            # Add extra metadata for offer messages
+            if message_type == "offer":
+                message_data["callerId"] = current_user.id
+                message_data["callerName"] = current_user.name
+                message_data["callerRole"] = role
+                message_data["ticketId"] = ticket_id
+                message_data["callType"] = message.get("callType", "audio")
+            
+            if message_type == "ice-candidate":
+                # Batched with the candidates that follow it
+                call_sessions.send_candidate(conn_id, message_data)
+                continue
+            call_sessions.flush_candidates(conn_id)
+            if not call_sessions.send(ticket_id, other_role, message_data):
                 # Peer not connected
-                if message.get("type") in ["offer", "answer", "ice-candidate"]:
-                    await websocket.send_json({
-                        "type": "error",
-                        "message": "Peer not connected"
-                    })
+                if message_type in ["offer", "answer"]:
+                    call_sessions.peer_missing(conn_id)
     
     except WebSocketDisconnect:
         logger.info(f"User {current_user.id} disconnected from call for ticket {ticket_id}")
@@ -166,41 +146,12 @@ async def call_websocket(
         except:
             pass
     finally:
-        # Cleanup
-        try:
-            if ticket_id in active_calls:
-                # Remove this connection
-                if "user" in active_calls[ticket_id] and active_calls[ticket_id]["user"] == websocket:
-                    del active_calls[ticket_id]["user"]
-                    role = "user"
-                elif "agent" in active_calls[ticket_id] and active_calls[ticket_id]["agent"] == websocket:
-                    del active_calls[ticket_id]["agent"]
-                    role = "agent"
-                else:
-                    role = "unknown"
-                
-                # Notify the other party
-                other_role = "agent" if role == "user" else "user"
-                if other_role in active_calls[ticket_id]:
-                    try:
-                        await active_calls[ticket_id][other_role].send_json({
-                            "type": "peer-disconnected",
-                            "role": role
-                        })
-                    except:
-                        pass
-                
-                # Remove ticket if no one is connected
-                if not active_calls[ticket_id]:
-                    del active_calls[ticket_id]
-            
-            # Cleanup user tickets
-            if current_user.id in user_tickets:
-                user_tickets[current_user.id].discard(ticket_id)
-                if not user_tickets[current_user.id]:
-                    del user_tickets[current_user.id]
-        except:
-            pass
+        # Cleanup, and notify the other party unless this connection was already replaced
+        if conn_id is not None and call_sessions.leave(conn_id):
+            call_sessions.send(ticket_id, other_role, {
+                "type": "peer-disconnected",
+                "role": role
+            })
 
 
 @router.get("/status/{ticket_id}")
@@ -221,13 +172,12 @@ def get_call_status(
     if not (is_user or is_agent):
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    # Check if call is active
-    is_active = ticket_id in active_calls and len(active_calls[ticket_id]) > 0
-    participants = list(active_calls.get(ticket_id, {}).keys())
+    # Check if call is active (on any worker)
+    participants = call_sessions.participants(ticket_id)
     
     return {
         "ticketId": ticket_id,
-        "isActive": is_active,
+        "isActive": len(participants) > 0,
         "participants": participants,
         "canCall": ticket.agent_id is not None
     }
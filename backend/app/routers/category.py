@@ -173,6 +173,25 @@ def unassign_agent_from_category(
     return category_ops.unassign_agent_from_category(db, category_id, agent_id)
 
 
-
-
-
+@router.put("/{category_id}/watch")
+def watch_category(
+    category_id: int,
+    watch_data: dict,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Opts the current agent in or out of watching new tickets in one of their categories.
+    Body: {"watch_new_tickets": true | false}
+    """
+    if current_user.role != UserRole.agent:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only agents can watch categories."
+        )
+    
+    watch = bool(watch_data.get("watch_new_tickets", True))
+    if not category_ops.set_category_watch(db, category_id, current_user.id, watch):
+        raise HTTPException(status_code=404, detail="You are not assigned to this category")
+    
+    return {"message": "Watching new tickets in this category" if watch else "Stopped watching this category"}
@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.slow_query import recorder
+from app.core.constants import SLOW_QUERY_LOG_ENABLED
+from app.core.principal_cache import Principal, principal_cache
+from app.core.password_pool import password_pool
+from app.core.token_cache import token_cache
+from app.core.revocation import revocation_list
+from app.core.backplane import backplane
+from app.core.call_sessions import call_sessions
+from app.core.events import event_bus
+from app.core.notification_counters import notification_counters
+from app.core.notification_retention import notification_retention
+from app.core.notification_versions import notification_versions
+from app.models.outbox_event import OutboxEvent
+from app.database import get_db
+from app.websocket_manager import manager
+from app.dependencies import get_current_admin
+
+router = APIRouter(prefix="/diagnostics", tags=["Diagnostics"])
+
+@router.get("/slow-queries")
+def get_slow_queries(limit: int = Query(50, ge=1), current_user: Principal = Depends(get_current_admin)):
+    """Most recent slow queries captured by the slow-query recorder. Admin only."""
+    return {"enabled": SLOW_QUERY_LOG_ENABLED, **recorder.snapshot(limit)}
+
+@router.delete("/slow-queries")
+def clear_slow_queries(current_user: Principal = Depends(get_current_admin)):
+    """Clear the in-memory slow-query buffer. The JSONL file is left untouched."""
+    recorder.clear()
+    return {"message": "Slow query buffer cleared"}
+
+@router.get("/principal-cache")
+def get_principal_cache_stats(current_user: Principal = Depends(get_current_admin)):
+    """Hit/miss counters of this worker's authenticated principal cache."""
+    return principal_cache.stats()
+
+@router.get("/token-cache")
+def get_token_cache_stats(current_user: Principal = Depends(get_current_admin)):
+    """Hit/miss counters of this worker's verified-token cache (WebSocket reconnects)."""
+    return token_cache.stats()
+
+@router.get("/revocations")
+def get_revocation_stats(current_user: Principal = Depends(get_current_admin)):
+    """Bloom filter size and lookup counters of this worker's token revocation list."""
+    return revocation_list.stats()
+
+@router.get("/password-pool")
+def get_password_pool_stats(current_user: Principal = Depends(get_current_admin)):
+    """Throughput, rejections and queue time of this worker's bcrypt process pool."""
+    return password_pool.stats()
+
+@router.get("/websockets")
+def get_websocket_stats(current_user: Principal = Depends(get_current_admin)):
+    """Connection counts, send-queue drops and delivery latency of this worker's chat sockets."""
+    return manager.stats()
+
+@router.get("/backplane")
+def get_backplane_stats(current_user: Principal = Depends(get_current_admin)):
+    """Cross-worker pub/sub traffic and the room members this worker knows about on other workers."""
+    return {
+        **backplane.stats(),
+        "remote_rooms": len(manager.remote_members),
+        "remote_members": sum(len(members) for members in manager.remote_members.values()),
+    }
+
+@router.get("/calls")
+def get_call_stats(current_user: Principal = Depends(get_current_admin)):
+    """Calls known across all workers, this worker's call sockets and signaling relay counters."""
+    return call_sessions.stats()
+
+@router.get("/events")
+def get_event_stats(current_user: Principal = Depends(get_current_admin), db: Session = Depends(get_db)):
+    """Outbox backlog by status and this worker's event consumer counters."""
+    counts = dict(db.query(OutboxEvent.status, func.count(OutboxEvent.id)).group_by(OutboxEvent.status).all())
+    oldest_pending = db.query(func.min(OutboxEvent.created_at)).filter(OutboxEvent.status == "pending").scalar()
+    return {**event_bus.stats(), "outbox": counts, "oldest_pending": oldest_pending}
+
+@router.get("/notification-counters")
+def get_notification_counter_stats(current_user: Principal = Depends(get_current_admin)):
+    """Runs, rows checked and drift corrected by this worker's notification counter reconciler."""
+    return notification_counters.stats()
+
+@router.get("/notification-retention")
+def get_notification_retention_stats(current_user: Principal = Depends(get_current_admin)):
+    """Rows purged, batches and time spent by this worker's notification retention job."""
+    return notification_retention.stats()
+
+@router.get("/notification-versions")
+def get_notification_version_stats(current_user: Principal = Depends(get_current_admin)):
+    """Version stamps held by this worker and how many conditional polls it answered with 304."""
+    return notification_versions.stats()
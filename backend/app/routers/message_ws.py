@@ -1,6 +1,7 @@
 #websocket message router
 
-from fastapi import APIRouter, Depends
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.operations import message as message_ops
@@ -9,25 +10,39 @@ from app.models.user import User, UserRole
 from app.models.ticket import Ticket
 from app.models.message import Message
 from fastapi import WebSocket, status
-from jose import JWTError, jwt
-from app.core import security
 from app.websocket_manager import manager
+from app.core.ticket_routes import ticket_routes
+from app.core.constants import MESSAGE_PAGE_SIZE, MESSAGE_PAGE_MAX_SIZE
 from datetime import datetime
 import json
 
 #http exception
 from fastapi import HTTPException
 
-from app.dependencies import get_current_user, get_current_agent, get_current_admin
+from app.dependencies import get_current_user, get_current_agent, get_current_admin, authenticate_token
 
 from fastapi import WebSocket
 
 router = APIRouter(prefix="/messages", tags=["Messages"])
 
-#load all messages for ticket_id 
+#load messages for ticket_id, one page at a time
 
 @router.get("/{ticket_id}")
-def get_messages(ticket_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_messages(
+    ticket_id: int,
+    before_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    limit: int = Query(MESSAGE_PAGE_SIZE, ge=1, le=MESSAGE_PAGE_MAX_SIZE),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Latest page of a ticket's messages, oldest first. Pass the id of the first
+    message shown as before_id to load older ones; a page shorter than limit
+    means the start of the conversation was reached.
+    """
+    if before_id is not None and after_id is not None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Use either before_id or after_id, not both")
     ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
     if not ticket:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
@@ -43,7 +58,7 @@ def get_messages(ticket_id: int, db: Session = Depends(get_db), current_user: Us
     if current_user.role == UserRole.admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admins cannot view private messages between users and agents.")
     
-    return message_ops.get_old_messages_for_ticket_id(db, ticket.id)
+    return message_ops.get_old_messages_for_ticket_id(db, ticket.id, before_id, after_id, limit)
 
 
 # HTTP POST endpoint for sending messages
@@ -74,7 +89,7 @@ def send_message(message_data: MessageCreateRequest, db: Session = Depends(get_d
     )
     
     # Create the message
-    new_message = message_ops.create_message(db, message_create)
+    new_message = message_ops.create_message(db, message_create, current_user)
     
     return new_message
 
@@ -104,7 +119,7 @@ def send_message_request(message_request: MessageCreateRequest, db: Session = De
         sender_id=current_user.id
     )
     
-    return message_ops.create_message(db, message_create)
+    return message_ops.create_message(db, message_create, current_user)
 
 
 # Room-based WebSocket endpoint for ticket-specific messaging
@@ -116,23 +131,12 @@ async def ticket_room_websocket(websocket: WebSocket, ticket_id: int, db: Sessio
         await websocket.close(code=1008, reason="Missing authentication token")
         return
 
-    # Verify token and get user
-    try:
-        payload = security.decode_access_token(token)
-        user_id: int | None = payload.get("sub")
-        if user_id is None:
-            await websocket.close(code=1008, reason="Invalid token")
-            return
-    except JWTError:
+    # Verify token and get user (a reconnect with the same token hits the token cache)
+    current_user = authenticate_token(token, db)
+    if current_user is None:
         await websocket.close(code=1008, reason="Invalid token")
         return
 
-    # Get current user
-    current_user = db.query(User).filter(User.id == user_id).first()
-    if not current_user:
-        await websocket.close(code=1008, reason="User not found")
-        return
-
     # Fetch ticket and check authorization
     ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
     if not ticket:
@@ -151,7 +155,8 @@ async def ticket_room_websocket(websocket: WebSocket, ticket_id: int, db: Sessio
         return
 
     # Join the ticket room
-    await manager.join_ticket_room(websocket, ticket_id, current_user.id, current_user.name or current_user.email, current_user.role.value)
+    if not await manager.join_ticket_room(websocket, ticket_id, current_user.id, current_user.name or current_user.email, current_user.role.value):
+        return
     
     try:
         while True:
@@ -171,7 +176,7 @@ async def ticket_room_websocket(websocket: WebSocket, ticket_id: int, db: Sessio
                     sender_id=current_user.id
                 )
                 
-                new_message = message_ops.create_message(db, message_create)
+                new_message = message_ops.create_message(db, message_create, current_user)
                 
                 # Broadcast message to all users in this ticket room
                 # new_message is a dictionary, not an object
@@ -211,25 +216,15 @@ async def global_websocket_endpoint(websocket: WebSocket, db: Session = Depends(
         await websocket.close(code=1008, reason="Missing authentication token")
         return
 
-    # Verify token and get user
-    try:
-        payload = security.decode_access_token(token)
-        user_id: int | None = payload.get("sub")
-        if user_id is None:
-            await websocket.close(code=1008, reason="Invalid token")
-            return
-    except JWTError:
+    # Verify token and get user (a reconnect with the same token hits the token cache)
+    current_user = authenticate_token(token, db)
+    if current_user is None:
         await websocket.close(code=1008, reason="Invalid token")
         return
 
-    # Get current user
-    current_user = db.query(User).filter(User.id == user_id).first()
-    if not current_user:
-        await websocket.close(code=1008, reason="User not found")
-        return
-
     # Connect to global chat
-    await manager.connect_global(websocket, current_user.id, current_user.name or current_user.email, current_user.role.value)
+    if not await manager.connect_global(websocket, current_user.id, current_user.name or current_user.email, current_user.role.value):
+        return
     
     try:
         while True:
@@ -244,24 +239,33 @@ async def global_websocket_endpoint(websocket: WebSocket, db: Session = Depends(
                 if "ticket_id" not in message_data:
                     continue
                     
-                ticket_id = message_data["ticket_id"]
+                try:
+                    ticket_id = int(message_data["ticket_id"])
+                except (TypeError, ValueError):
+                    continue
                 
-                # Fetch ticket and check authorization
-                ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
-                if not ticket:
+                # Authorize against the ticket row itself: a cached route can lag an
+                # assign or transfer made on another worker
+                ticket = db.query(Ticket.user_id, Ticket.agent_id).filter(Ticket.id == ticket_id).first()
+                if ticket is None:
                     continue
 
-                # Check permissions for this specific ticket
+                # Only the ticket creator and the assigned agent may send here
+                # Admins still cannot send messages in private conversations
                 has_access = False
                 if current_user.role == UserRole.user and ticket.user_id == current_user.id:
                     has_access = True
                 elif current_user.role == UserRole.agent and ticket.agent_id == current_user.id:
                     has_access = True
-                # Admins still cannot send messages in private conversations
                 
                 if not has_access:
                     continue
                 
+                # Delivery goes through the cached routing table; the row just read corrects it if it was stale
+                route = ticket_routes.get(ticket_id)
+                if route is None or (route.user_id, route.agent_id) != (ticket.user_id, ticket.agent_id):
+                    route = ticket_routes.update(ticket_id, ticket.user_id, ticket.agent_id)
+                
                 # Create message in database
                 message_create = MessageCreate(
                     ticket_id=ticket_id,
@@ -269,21 +273,21 @@ async def global_websocket_endpoint(websocket: WebSocket, db: Session = Depends(
                     sender_id=current_user.id
                 )
                 
-                new_message = message_ops.create_message(db, message_create)
+                new_message = message_ops.create_message(db, message_create, current_user)
                 
-                # Broadcast message to all connected users (they will filter by ticket_id on frontend)
+                # Deliver only to the ticket's participants
                 broadcast_message = {
                     "type": "message",
-                    "id": new_message.id,
-                    "content": new_message.content,
+                    "id": new_message["id"],
+                    "content": new_message["content"],
                     "sender_id": current_user.id,
                     "sender_name": current_user.name or current_user.email,
                     "sender_role": current_user.role.value,
-                    "timestamp": new_message.created_at.isoformat(),
+                    "timestamp": new_message["timestamp"].isoformat(),
                     "ticket_id": ticket_id
                 }
                 
-                await manager.broadcast_global(broadcast_message)
+                await manager.send_to_users(route.participants, broadcast_message)
                 
             except json.JSONDecodeError:
                 # Invalid JSON, ignore
@@ -307,23 +311,12 @@ async def websocket_endpoint(websocket: WebSocket, ticket_id: int, db: Session =
         await websocket.close(code=1008, reason="Missing authentication token")
         return
 
-    # Verify token and get user
-    try:
-        payload = security.decode_access_token(token)
-        user_id: int | None = payload.get("sub")
-        if user_id is None:
-            await websocket.close(code=1008, reason="Invalid token")
-            return
-    except JWTError:
+    # Verify token and get user (a reconnect with the same token hits the token cache)
+    current_user = authenticate_token(token, db)
+    if current_user is None:
         await websocket.close(code=1008, reason="Invalid token")
         return
 
-    # Get current user
-    current_user = db.query(User).filter(User.id == user_id).first()
-    if not current_user:
-        await websocket.close(code=1008, reason="User not found")
-        return
-
     # Fetch ticket and check authorization
     ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
     if not ticket:
@@ -342,7 +335,8 @@ async def websocket_endpoint(websocket: WebSocket, ticket_id: int, db: Session =
         return
 
     # Connect to the chat room
-    await manager.connect(websocket, ticket_id, current_user.id, current_user.name or current_user.email, current_user.role.value)
+    if not await manager.connect(websocket, ticket_id, current_user.id, current_user.name or current_user.email, current_user.role.value):
+        return
     
     try:
         while True:
@@ -362,17 +356,17 @@ async def websocket_endpoint(websocket: WebSocket, ticket_id: int, db: Session =
                     sender_id=current_user.id
                 )
                 
-                new_message = message_ops.create_message(db, message_create)
+                new_message = message_ops.create_message(db, message_create, current_user)
                 
                 # Broadcast message to all users in the ticket
                 broadcast_message = {
                     "type": "message",
-                    "id": new_message.id,
-                    "content": new_message.content,
+                    "id": new_message["id"],
+                    "content": new_message["content"],
                     "sender_id": current_user.id,
                     "sender_name": current_user.name or current_user.email,
                     "sender_role": current_user.role.value,
-                    "timestamp": new_message.created_at.isoformat(),
+                    "timestamp": new_message["timestamp"].isoformat(),
                     "ticket_id": ticket_id
                 }
                 
@@ -1,32 +1,103 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, WebSocket, WebSocketDisconnect, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+import json
 from app.database import get_db
-from app.dependencies import get_current_user
+from app.dependencies import get_current_user, authenticate_token
+from app.websocket_manager import manager
+from app.core.notification_versions import notification_versions
 from app.operations import notification as notification_ops
 from app.schemas import notification as notification_schema
 from app.models import user as user_model
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
+# Clients must revalidate, which the browser does with If-None-Match
+CACHE_CONTROL = "private, no-cache"
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
 @router.get("/", response_model=List[notification_schema.NotificationOut])
 def get_notifications(
+    response: Response,
     skip: int = 0,
     limit: int = 50,
     unread_only: bool = False,
+    since_id: Optional[int] = None,
+    since_broadcast_id: Optional[int] = None,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: user_model.User = Depends(get_current_user)
 ):
-    """Get notifications for the current user."""
-    return notification_ops.get_user_notifications(db, current_user.id, skip, limit, unread_only)
+    """
+    Get notifications for the current user, including broadcasts to their role (listed with negative ids).
+    since_id / since_broadcast_id return only what was added after the newest ids the client has.
+    Answers 304 without a query when If-None-Match still matches the ETag.
+    """
+    # Taken before reading, so a change made meanwhile gives a new ETag on the next poll
+    etag = notification_versions.etag(current_user, "list")
+    if notification_versions.check(if_none_match, etag):
+        return _not_modified(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return notification_ops.get_user_notifications(
+        db, current_user, skip, limit, unread_only, since_id, since_broadcast_id
+    )
+
+@router.websocket("/ws")
+async def notifications_websocket(websocket: WebSocket, db: Session = Depends(get_db)):
+    """
+    Live notifications for the current user. Pushes
+    {"type": "notification", "notification": {...}, "unread_delta": 1} as
+    notifications are written, {"type": "notification_updated", ...} when one
+    was coalesced into an unread notification, or {"type": "notifications_changed", ...}
+    when a large fan-out was written without ids. The first frame is
+    {"type": "notification_count", "unread_notifications": n}.
+    """
+    token = websocket.query_params.get("token")
+    if not token:
+        await websocket.close(code=1008, reason="Missing authentication token")
+        return
+
+    current_user = authenticate_token(token, db)
+    if current_user is None:
+        await websocket.close(code=1008, reason="Invalid token")
+        return
+
+    if not await manager.connect_notifications(websocket, current_user.id, current_user.name or current_user.email, current_user.role.value):
+        return
+
+    try:
+        stats = notification_ops.get_notification_stats(db, current_user)
+        # Don't hold a pooled connection for the lifetime of the socket
+        db.close()
+        await manager.send_personal_message(json.dumps({
+            "type": "notification_count",
+            "unread_notifications": stats.unread_notifications
+        }), websocket)
+        # Nothing is expected from the client; this just notices the disconnect
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.disconnect_notifications(websocket)
 
 @router.get("/stats", response_model=notification_schema.NotificationStats)
 def get_notification_stats(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: user_model.User = Depends(get_current_user)
 ):
-    """Get notification statistics for the current user."""
-    return notification_ops.get_notification_stats(db, current_user.id)
+    """Get notification statistics for the current user. Supports If-None-Match like the list."""
+    etag = notification_versions.etag(current_user, "stats")
+    if notification_versions.check(if_none_match, etag):
+        return _not_modified(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return notification_ops.get_notification_stats(db, current_user)
 
 @router.patch("/{notification_id}/read")
 def mark_notification_as_read(
@@ -46,7 +117,7 @@ def mark_all_notifications_as_read(
     current_user: user_model.User = Depends(get_current_user)
 ):
     """Mark all notifications as read for the current user."""
-    updated_count = notification_ops.mark_all_notifications_as_read(db, current_user.id)
+    updated_count = notification_ops.mark_all_notifications_as_read(db, current_user)
     return {"message": f"Marked {updated_count} notifications as read"}
 
 @router.delete("/{notification_id}")
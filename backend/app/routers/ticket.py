@@ -6,6 +6,7 @@ from typing import List, Optional
 from app.database import get_db
 from app.dependencies import get_current_user # Assuming you have a general get_current_user
 from app.operations import ticket as ticket_ops
+from app.operations import ticket_watcher as ticket_watcher_ops
 from app.schemas import ticket as ticket_schema
 from app.schemas import ticket_note_create
 
@@ -256,7 +257,7 @@ def reopen_ticket(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Ticket is not requested to reopen")
         
     # Admin approves the reopen request
-    return ticket_ops.accept_reopen_ticket(db, db_ticket)
+    return ticket_ops.accept_reopen_ticket(db, db_ticket, current_user.id)
 
 
 @router.get("/search", response_model=List[ticket_schema.Ticket])
@@ -286,13 +287,7 @@ def create_ticket_note(
     if current_user.role != UserRole.agent:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only agents can create notes")
     ticket_note = TicketNote(ticket_id=ticket_id, agent_id=current_user.id, note_content=note.note)
-    result = ticket_ops.create_ticket_note(db, ticket_note)
-    
-    # Create notification for note added
-    from app.operations import notification as notification_ops
-    notification_ops.notify_note_added(db, db_ticket, current_user)
-    
-    return result
+    return ticket_ops.create_ticket_note(db, ticket_note)
 
 
 @router.get("/{ticket_id}/notes", response_model=List[ticket_note_create.TicketNoteOut])
@@ -411,3 +406,33 @@ def reopen_ticket(
     # Reopen the ticket
     return ticket_ops.reopen_ticket(db, db_ticket)
    
+
+
+@router.post("/{ticket_id}/watch")
+def watch_ticket(
+    ticket_id: int,
+    db: Session = Depends(get_db),
+    current_user: user_model.User = Depends(get_current_user)
+):
+    """Follow a ticket to be notified about its activity. Only for agents and admins."""
+    db_ticket = ticket_ops.get_ticket(db, ticket_id)
+    if not db_ticket:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
+    
+    if current_user.role not in (UserRole.agent, UserRole.admin):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only agents and admins can follow tickets")
+    
+    ticket_watcher_ops.follow_ticket(db, ticket_id, current_user.id)
+    return {"message": "Following ticket"}
+
+
+@router.delete("/{ticket_id}/watch")
+def unwatch_ticket(
+    ticket_id: int,
+    db: Session = Depends(get_db),
+    current_user: user_model.User = Depends(get_current_user)
+):
+    """Stop being notified about a ticket."""
+    if not ticket_watcher_ops.unfollow_ticket(db, ticket_id, current_user.id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not watching this ticket")
+    return {"message": "Stopped watching ticket"}
@@ -7,6 +7,7 @@ from app.operations.user import get_user, get_users, create_user, update_user, d
 from app.dependencies import get_current_user
 from app.models.user import UserRole
 from app.operations.user import create_agent
+from app.operations.auth import revoke_user_tokens
 from app.models.user import User
 
 router = APIRouter(prefix="/users", tags=["Users"])
@@ -93,3 +94,22 @@ def delete_existing_user(
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
+
+@router.post("/{user_id}/revoke-tokens")
+def revoke_tokens_of_user(
+    user_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    # Only admins can sign other users out (e.g. when disabling an agent)
+    if current_user.role != UserRole.admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have permission to revoke tokens."
+        )
+
+    if not get_user(db, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    revoke_user_tokens(db, user_id)
+    return {"message": "All existing tokens for this user have been revoked"}
@@ -17,10 +17,14 @@ class NotificationUpdate(BaseModel):
 
 class NotificationOut(NotificationBase):
     id: int
-    user_id: int
+    # None in the live push of a broadcast, which goes to many users
+    user_id: Optional[int]
     ticket_id: Optional[int] = None
     is_read: bool
     created_at: datetime
+    count: int = 1
+    # Broadcast notifications are listed with negative ids
+    broadcast: bool = False
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -1,215 +1,619 @@
 from fastapi import WebSocket
-from typing import Dict, List
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+from collections import deque
+from dataclasses import dataclass
 import json
+import asyncio
+import logging
+import time
 from datetime import datetime
+from app.core.shutdown import shutdown, close_for_restart
+from app.core.backplane import Backplane, backplane
+from app.core.constants import (
+    CHAT_PRESENCE_HEARTBEAT_SECONDS,
+    CHAT_PRESENCE_TTL_SECONDS,
+    WS_SEND_QUEUE_SIZE,
+    WS_SEND_TIMEOUT_SECONDS,
+    WS_SLOW_CONSUMER_POLICY,
+)
+
+logger = logging.getLogger(__name__)
+
+# Close code for a client that can't keep up ("Try Again Later")
+WS_TRY_AGAIN_LATER = 1013
+
+@dataclass(slots=True, eq=False)
+class Connection:
+    """One open WebSocket. eq=False keeps identity semantics so records can be compared cheaply"""
+    websocket: WebSocket
+    user_id: int
+    user_name: str
+    user_role: str
+    connected_at: datetime
+    # None for global and notification connections
+    ticket_id: Optional[int] = None
+    # True for /notifications/ws sockets
+    notifications: bool = False
+    # Outbound (enqueued_at, text) frames, drained by the writer task
+    queue: Optional[asyncio.Queue] = None
+    writer: Optional[asyncio.Task] = None
+    dropped: int = 0
+    closed: bool = False
+
+    def info(self) -> Dict:
+        return {
+            "user_id": self.user_id,
+            "user_name": self.user_name,
+            "user_role": self.user_role,
+            "connected_at": self.connected_at.isoformat()
+        }
+
 
 class ConnectionManager:
-    def __init__(self):
-        # Store active connections by ticket_id for rooms
-        self.ticket_rooms: Dict[int, List[Dict]] = {}
-        # Store global connections (not tied to specific tickets)
-        self.global_connections: List[Dict] = []
-    
+    """
+    Tracks open chat WebSockets. Every connection gets a bounded send queue and
+    its own writer task, so a broadcast is one put_nowait per recipient and a
+    slow client only delays itself. When a queue is full, WS_SLOW_CONSUMER_POLICY
+    decides: "drop_oldest", "drop_newest" or "disconnect".
+
+    Broadcasts, joins and leaves go through the backplane, so users on different
+    workers still see each other; each worker delivers to its own sockets. Every
+    worker re-announces its room members every CHAT_PRESENCE_HEARTBEAT_SECONDS,
+    and members of other workers not re-announced within CHAT_PRESENCE_TTL_SECONDS
+    (a missed leave, a crashed worker) are dropped.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = WS_SEND_QUEUE_SIZE,
+        send_timeout: float = WS_SEND_TIMEOUT_SECONDS,
+        slow_consumer_policy: str = WS_SLOW_CONSUMER_POLICY,
+        presence_ttl_seconds: float = CHAT_PRESENCE_TTL_SECONDS,
+        presence_heartbeat_seconds: float = CHAT_PRESENCE_HEARTBEAT_SECONDS,
+    ):
+        if slow_consumer_policy not in ("drop_oldest", "drop_newest", "disconnect"):
+            raise ValueError(f"Unknown slow consumer policy: {slow_consumer_policy}")
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.slow_consumer_policy = slow_consumer_policy
+        self.presence_ttl_seconds = presence_ttl_seconds
+        self.presence_heartbeat_seconds = presence_heartbeat_seconds
+        # ticket_id -> user_id -> connection (one connection per user per room)
+        self.ticket_rooms: Dict[int, Dict[int, Connection]] = {}
+        # websocket -> room connection, so leaving doesn't scan the room
+        self.room_connections: Dict[WebSocket, Connection] = {}
+        # websocket -> global connection (not tied to specific tickets)
+        self.global_connections: Dict[WebSocket, Connection] = {}
+        # user_id -> websocket -> global connection (a user may have several tabs open)
+        self.global_by_user: Dict[int, Dict[WebSocket, Connection]] = {}
+        # websocket -> notification connection, and user_id -> websocket -> connection
+        self.notification_connections: Dict[WebSocket, Connection] = {}
+        self.notifications_by_user: Dict[int, Dict[WebSocket, Connection]] = {}
+        # ticket_id -> (node_id, user_id) -> (expires_at, user info), for room members on other workers
+        self.remote_members: Dict[int, Dict[Tuple[str, int], Tuple[float, Dict]]] = {}
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self.expired_members = 0
+        self.backplane: Optional[Backplane] = None
+        # Event loop the sockets live on, for pushes from worker threads
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        # Delivery metrics
+        self.enqueued = 0
+        self.sent = 0
+        self.dropped = 0
+        self.slow_disconnects = 0
+        self.send_failures = 0
+        self._latencies_ms: Deque[float] = deque(maxlen=1024)
+
     async def connect(self, websocket: WebSocket, ticket_id: int, user_id: int, user_name: str, user_role: str):
         """Connect a user to a ticket's chat room (legacy method - use join_ticket_room instead)"""
         return await self.join_ticket_room(websocket, ticket_id, user_id, user_name, user_role)
-    
+
     def disconnect(self, websocket: WebSocket, ticket_id: int):
         """Disconnect a user from a ticket's chat room (legacy method - use leave_ticket_room instead)"""
         return self.leave_ticket_room(websocket, ticket_id)
-    
+
     async def broadcast_to_ticket(self, ticket_id: int, message: dict, exclude_user: int = None):
         """Broadcast a message to all users connected to a specific ticket (legacy method)"""
         return await self.broadcast_to_ticket_room(ticket_id, message, exclude_user)
-    
+
     def get_ticket_users(self, ticket_id: int) -> List[Dict]:
         """Get list of users currently connected to a ticket (legacy method)"""
         return self.get_ticket_room_users(ticket_id)
-    
+
     def is_user_online(self, ticket_id: int, user_id: int) -> bool:
         """Check if a specific user is online for a ticket (legacy method)"""
         return self.is_user_in_ticket_room(ticket_id, user_id)
-    
+
     async def send_personal_message(self, message: str, websocket: WebSocket):
         """Send a message to a specific websocket connection"""
+        connection = (
+            self.room_connections.get(websocket)
+            or self.global_connections.get(websocket)
+            or self.notification_connections.get(websocket)
+        )
+        if connection is not None:
+            self._enqueue(connection, message)
+            return
         try:
             await websocket.send_text(message)
         except:
             # Connection might be closed
             pass
 
-    async def connect_global(self, websocket: WebSocket, user_id: int, user_name: str, user_role: str):
+    # Send queues
+
+    def _start_writer(self, connection: Connection):
+        connection.queue = asyncio.Queue(maxsize=self.queue_size)
+        connection.writer = asyncio.get_running_loop().create_task(self._write_loop(connection))
+
+    def _stop_writer(self, connection: Connection):
+        # The flag also stops a writer whose cancellation wait_for swallowed mid-send
+        connection.closed = True
+        if connection.writer is not None and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+
+    async def _write_loop(self, connection: Connection):
+        """Send queued frames in order; a failed or timed-out send drops the connection"""
+        queue = connection.queue
+        while not connection.closed:
+            enqueued_at, text = await queue.get()
+            try:
+                await asyncio.wait_for(connection.websocket.send_text(text), timeout=self.send_timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.send_failures += 1
+                logger.info(f"Dropping WebSocket of user {connection.user_id}: send failed ({type(e).__name__})")
+                self._drop(connection)
+                await self._close(connection.websocket, code=1011, reason="Send failed")
+                return
+            finally:
+                queue.task_done()
+            self.sent += 1
+            self._latencies_ms.append((time.perf_counter() - enqueued_at) * 1000)
+
+    def _enqueue(self, connection: Connection, text: str) -> bool:
+        """O(1) hand-off to the connection's writer. False if the frame was not queued."""
+        queue = connection.queue
+        if queue is None or connection.closed:
+            return False
+        item = (time.perf_counter(), text)
+        try:
+            queue.put_nowait(item)
+            self.enqueued += 1
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        if self.slow_consumer_policy == "disconnect":
+            self.slow_disconnects += 1
+            logger.warning(f"Disconnecting slow WebSocket consumer (user {connection.user_id}, {queue.qsize()} frames queued)")
+            self._drop(connection)
+            asyncio.get_running_loop().create_task(
+                self._close(connection.websocket, code=WS_TRY_AGAIN_LATER, reason="Client too slow")
+            )
+            return False
+
+        connection.dropped += 1
+        self.dropped += 1
+        if self.slow_consumer_policy == "drop_newest":
+            return False
+        # drop_oldest: the newest state is usually what the client needs
+        queue.get_nowait()
+        queue.task_done()
+        queue.put_nowait(item)
+        self.enqueued += 1
+        return True
+
+    def _fanout(self, connections: Iterable[Connection], message: dict, exclude_user: int = None) -> int:
+        message_str = json.dumps(message)
+        queued = 0
+        for connection in list(connections):
+            if exclude_user and connection.user_id == exclude_user:
+                continue
+            if self._enqueue(connection, message_str):
+                queued += 1
+        return queued
+
+    def _remove(self, connection: Connection):
+        """Forget a connection in whichever index holds it and stop its writer"""
+        if connection.ticket_id is not None:
+            self._remove_from_room(connection)
+        elif connection.notifications:
+            self._remove_notifications(connection)
+        else:
+            self._remove_global(connection)
+        self._stop_writer(connection)
+
+    def _drop(self, connection: Connection):
+        """Remove a connection the server gave up on. Room members leave like any other, so everyone sees it."""
+        if connection.ticket_id is not None:
+            self._leave_room(connection)
+        else:
+            self._remove(connection)
+
+    def _remove_global(self, connection: Connection):
+        if self.global_connections.get(connection.websocket) is not connection:
+            return
+        del self.global_connections[connection.websocket]
+        user_connections = self.global_by_user.get(connection.user_id)
+        if user_connections is not None:
+            user_connections.pop(connection.websocket, None)
+            if not user_connections:
+                del self.global_by_user[connection.user_id]
+
+    def _remove_notifications(self, connection: Connection):
+        if self.notification_connections.get(connection.websocket) is not connection:
+            return
+        del self.notification_connections[connection.websocket]
+        user_connections = self.notifications_by_user.get(connection.user_id)
+        if user_connections is not None:
+            user_connections.pop(connection.websocket, None)
+            if not user_connections:
+                del self.notifications_by_user[connection.user_id]
+
+    def _remove_from_room(self, connection: Connection):
+        if self.room_connections.get(connection.websocket) is connection:
+            del self.room_connections[connection.websocket]
+        room = self.ticket_rooms.get(connection.ticket_id)
+        if room is None or room.get(connection.user_id) is not connection:
+            return
+        del room[connection.user_id]
+        if not room:
+            del self.ticket_rooms[connection.ticket_id]
+            logger.debug(f"Ticket room {connection.ticket_id} is now empty and has been removed")
+
+    async def _close(self, websocket: WebSocket, code: int, reason: str):
+        try:
+            await websocket.close(code=code, reason=reason)
+        except:
+            pass  # Connection might already be closed
+
+    # Backplane
+
+    def attach(self, backplane: Backplane):
+        """Route every fan-out through the backplane so all workers deliver it"""
+        self.backplane = backplane
+        backplane.subscribe("chat.room", self._on_room_message)
+        backplane.subscribe("chat.users", self._on_users_message)
+        backplane.subscribe("chat.global", self._on_global_message)
+        backplane.subscribe("chat.presence", self._on_presence)
+        backplane.subscribe("notify.user", self._on_notification_message)
+        backplane.subscribe("notify.roles", self._on_broadcast_notification)
+
+    def _publish(self, channel: str, message: dict):
+        if self.backplane is not None:
+            self.backplane.publish(channel, message)
+        else:
+            {
+                "chat.room": self._on_room_message,
+                "chat.users": self._on_users_message,
+                "chat.global": self._on_global_message,
+                "notify.user": self._on_notification_message,
+                "notify.roles": self._on_broadcast_notification,
+            }[channel](message)
+
+    def _on_room_message(self, event: dict):
+        room = self.ticket_rooms.get(event["ticket_id"])
+        if not room:
+            return
+        queued = self._fanout(room.values(), event["message"], event.get("exclude_user"))
+        logger.debug(f"Queued message for {queued} users in ticket room {event['ticket_id']}")
+
+    def _on_users_message(self, event: dict):
+        connections = []
+        for user_id in event["user_ids"]:
+            connections.extend(self.global_by_user.get(user_id, {}).values())
+        queued = self._fanout(connections, event["message"], event.get("exclude_user"))
+        logger.debug(f"Queued message for {queued} connections of users {event['user_ids']}")
+
+    def _on_global_message(self, event: dict):
+        queued = self._fanout(self.global_connections.values(), event["message"], event.get("exclude_user"))
+        logger.debug(f"Queued message for {queued} global connections")
+
+    def _on_notification_message(self, event: dict):
+        connections = self.notifications_by_user.get(event["user_id"])
+        if connections:
+            self._fanout(connections.values(), event["message"])
+
+    def _on_broadcast_notification(self, event: dict):
+        roles, exclude = event["roles"], set(event.get("exclude_users", ()))
+        self._fanout(
+            [
+                connection for connection in self.notification_connections.values()
+                if connection.user_role in roles and connection.user_id not in exclude
+            ],
+            event["message"],
+        )
+
+    def _publish_presence(self, op: str, connection: Connection):
+        if self.backplane is None:
+            return
+        self.backplane.publish("chat.presence", {
+            "op": op,
+            "node": self.backplane.node_id,
+            "ticket_id": connection.ticket_id,
+            "user": connection.info(),
+        })
+
+    def _on_presence(self, event: dict):
+        node = event["node"]
+        if self.backplane is None or node == self.backplane.node_id:
+            return
+        op = event["op"]
+        if op == "join":
+            user = event["user"]
+            self.remote_members.setdefault(event["ticket_id"], {})[(node, user["user_id"])] = (
+                time.monotonic() + self.presence_ttl_seconds, user
+            )
+        elif op == "leave":
+            members = self.remote_members.get(event["ticket_id"])
+            if members is not None:
+                members.pop((node, event["user"]["user_id"]), None)
+                if not members:
+                    del self.remote_members[event["ticket_id"]]
+        elif op == "node_down":
+            for ticket_id in list(self.remote_members):
+                members = self.remote_members[ticket_id]
+                for key in [key for key in members if key[0] == node]:
+                    del members[key]
+                if not members:
+                    del self.remote_members[ticket_id]
+        elif op == "sync":
+            # A worker just started; tell it who is in our rooms
+            for connection in self.room_connections.values():
+                self._publish_presence("join", connection)
+
+    def _purge_expired_members(self):
+        now = time.monotonic()
+        for ticket_id in list(self.remote_members):
+            members = self.remote_members[ticket_id]
+            for key in [key for key, (expires_at, _) in members.items() if expires_at < now]:
+                del members[key]
+                self.expired_members += 1
+            if not members:
+                del self.remote_members[ticket_id]
+
+    def _live_remote_members(self, ticket_id: int) -> List[Tuple[int, Dict]]:
+        now = time.monotonic()
+        return [
+            (user_id, info) for (_, user_id), (expires_at, info) in self.remote_members.get(ticket_id, {}).items()
+            if expires_at >= now
+        ]
+
+    async def _presence_heartbeat(self):
+        while True:
+            await asyncio.sleep(self.presence_heartbeat_seconds)
+            for connection in list(self.room_connections.values()):
+                self._publish_presence("join", connection)
+            self._purge_expired_members()
+
+    def start(self):
+        """Remember the event loop, start the presence heartbeat and ask the other workers for their room members (called on startup)"""
+        self.loop = asyncio.get_running_loop()
+        if self._heartbeat_task is None and self.backplane is not None:
+            self._heartbeat_task = self.loop.create_task(self._presence_heartbeat())
+        self.request_presence_sync()
+
+    async def stop(self):
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+
+    def request_presence_sync(self):
+        """Ask the other workers to announce their room members"""
+        if self.backplane is not None:
+            self.backplane.publish("chat.presence", {"op": "sync", "node": self.backplane.node_id})
+
+    # Global connections
+
+    async def connect_global(self, websocket: WebSocket, user_id: int, user_name: str, user_role: str) -> bool:
         """Connect a user to global messaging (not tied to specific ticket)"""
         await websocket.accept()
-        
-        connection_info = {
-            "websocket": websocket,
-            "user_id": user_id,
-            "user_name": user_name,
-            "user_role": user_role,
-            "connected_at": datetime.now()
-        }
-        
-        self.global_connections.append(connection_info)
-        print(f"User {user_name} connected globally. Total global connections: {len(self.global_connections)}")
+        if shutdown.draining:
+            await close_for_restart(websocket)
+            return False
+
+        connection = Connection(websocket, user_id, user_name, user_role, datetime.now())
+        self._start_writer(connection)
+        self.global_connections[websocket] = connection
+        self.global_by_user.setdefault(user_id, {})[websocket] = connection
+        logger.debug(f"User {user_name} connected globally. Total global connections: {len(self.global_connections)}")
+        return True
 
     def disconnect_global(self, websocket: WebSocket):
         """Disconnect a user from global messaging"""
-        connection_to_remove = None
-        for connection in self.global_connections:
-            if connection["websocket"] == websocket:
-                connection_to_remove = connection
-                break
-        
-        if connection_to_remove:
-            self.global_connections.remove(connection_to_remove)
-            user_name = connection_to_remove["user_name"]
-            print(f"User {user_name} disconnected globally. Total global connections: {len(self.global_connections)}")
+        connection = self.global_connections.get(websocket)
+        if connection is None:
+            return
+
+        self._remove(connection)
+        logger.debug(f"User {connection.user_name} disconnected globally. Total global connections: {len(self.global_connections)}")
 
     async def broadcast_global(self, message: dict, exclude_user: int = None):
-        """Broadcast a message to all globally connected users"""
-        message_str = json.dumps(message)
-        connections_to_remove = []
-        
-        for connection in self.global_connections:
-            if exclude_user and connection["user_id"] == exclude_user:
-                continue
-            
-            try:
-                await connection["websocket"].send_text(message_str)
-            except:
-                # Connection is broken, mark for removal
-                connections_to_remove.append(connection)
-        
-        # Remove broken connections
-        for broken_connection in connections_to_remove:
-            if broken_connection in self.global_connections:
-                self.global_connections.remove(broken_connection)
-        
-        print(f"Broadcasted message to {len(self.global_connections) - len(connections_to_remove)} global connections")
-
-    # New room-based methods for better ticket messaging
-    async def join_ticket_room(self, websocket: WebSocket, ticket_id: int, user_id: int, user_name: str, user_role: str):
-        """Join a user to a specific ticket room"""
+        """Queue a message for all globally connected users, on every worker"""
+        self._publish("chat.global", {"message": message, "exclude_user": exclude_user})
+
+    async def send_to_users(self, user_ids: Iterable[int], message: dict, exclude_user: int = None):
+        """Queue a message for the global connections of specific users only, on every worker"""
+        self._publish("chat.users", {"user_ids": list(user_ids), "message": message, "exclude_user": exclude_user})
+
+    # Notification channel
+
+    async def connect_notifications(self, websocket: WebSocket, user_id: int, user_name: str, user_role: str) -> bool:
+        """Subscribe a socket to one user's notification pushes"""
         await websocket.accept()
-        
-        if ticket_id not in self.ticket_rooms:
-            self.ticket_rooms[ticket_id] = []
-        
-        # Check if user is already in the room and remove old connection
-        existing_connections = [conn for conn in self.ticket_rooms[ticket_id] if conn["user_id"] == user_id]
-        for old_conn in existing_connections:
-            print(f"Removing duplicate connection for user {user_name} in ticket room {ticket_id}")
-            self.ticket_rooms[ticket_id].remove(old_conn)
-            try:
-                await old_conn["websocket"].close(code=1000, reason="Duplicate connection replaced")
-            except:
-                pass  # Connection might already be closed
-        
-        connection_info = {
-            "websocket": websocket,
-            "user_id": user_id,
-            "user_name": user_name,
-            "user_role": user_role,
-            "connected_at": datetime.now()
-        }
-        
-        self.ticket_rooms[ticket_id].append(connection_info)
-        print(f"User {user_name} ({user_role}) joined ticket room {ticket_id}. Room size: {len(self.ticket_rooms[ticket_id])}")
-        
+        if shutdown.draining:
+            await close_for_restart(websocket)
+            return False
+
+        connection = Connection(websocket, user_id, user_name, user_role, datetime.now(), notifications=True)
+        self._start_writer(connection)
+        self.notification_connections[websocket] = connection
+        self.notifications_by_user.setdefault(user_id, {})[websocket] = connection
+        return True
+
+    def disconnect_notifications(self, websocket: WebSocket):
+        connection = self.notification_connections.get(websocket)
+        if connection is not None:
+            self._remove(connection)
+
+    def push_notification(self, user_id: int, message: dict):
+        """Queue a frame for a user's notification sockets on every worker. Safe to call from any thread."""
+        if self.loop is None:
+            return
+        self.loop.call_soon_threadsafe(self._publish, "notify.user", {"user_id": user_id, "message": message})
+
+    def push_broadcast_notification(self, roles: Iterable[str], message: dict, exclude_users: Iterable[int] = ()):
+        """Queue a frame for the notification sockets of every user with one of the roles, on every worker"""
+        if self.loop is None:
+            return
+        self.loop.call_soon_threadsafe(self._publish, "notify.roles", {
+            "roles": list(roles),
+            "message": message,
+            "exclude_users": list(exclude_users),
+        })
+
+    # Ticket rooms
+
+    async def join_ticket_room(self, websocket: WebSocket, ticket_id: int, user_id: int, user_name: str, user_role: str) -> bool:
+        """Join a user to a specific ticket room. Returns False if the server is shutting down."""
+        await websocket.accept()
+        if shutdown.draining:
+            await close_for_restart(websocket)
+            return False
+
+        # Check if user is already in the room and replace the old connection
+        old_connection = self.ticket_rooms.get(ticket_id, {}).get(user_id)
+        if old_connection is not None:
+            logger.debug(f"Removing duplicate connection for user {user_name} in ticket room {ticket_id}")
+            self._remove(old_connection)
+            await self._close(old_connection.websocket, code=1000, reason="Duplicate connection replaced")
+
+        # Looked up after the await above; the room may have been removed meanwhile
+        room = self.ticket_rooms.setdefault(ticket_id, {})
+        connection = Connection(websocket, user_id, user_name, user_role, datetime.now(), ticket_id)
+        self._start_writer(connection)
+        room[user_id] = connection
+        self.room_connections[websocket] = connection
+        logger.debug(f"User {user_name} ({user_role}) joined ticket room {ticket_id}. Room size: {len(room)}")
+
         # Notify others in the room that someone joined (only if it's a fresh join)
-        if not existing_connections:
+        self._publish_presence("join", connection)
+        if old_connection is None:
             await self.broadcast_to_ticket_room(ticket_id, {
                 "type": "user_joined",
                 "user_name": user_name,
                 "user_role": user_role,
                 "timestamp": datetime.now().isoformat()
             }, exclude_user=user_id)
+        return True
 
     def leave_ticket_room(self, websocket: WebSocket, ticket_id: int):
         """Remove a user from a specific ticket room"""
-        if ticket_id not in self.ticket_rooms:
+        connection = self.room_connections.get(websocket)
+        if connection is None or connection.ticket_id != ticket_id:
             return
-        
-        connection_to_remove = None
-        for connection in self.ticket_rooms[ticket_id]:
-            if connection["websocket"] == websocket:
-                connection_to_remove = connection
-                break
-        
-        if connection_to_remove:
-            self.ticket_rooms[ticket_id].remove(connection_to_remove)
-            user_name = connection_to_remove["user_name"]
-            user_role = connection_to_remove["user_role"]
-            print(f"User {user_name} ({user_role}) left ticket room {ticket_id}. Room size: {len(self.ticket_rooms[ticket_id])}")
-            
-            # Notify others in the room that someone left
-            if self.ticket_rooms[ticket_id]:  # If there are still users in the room
-                import asyncio
-                try:
-                    loop = asyncio.get_event_loop()
-                    loop.create_task(self.broadcast_to_ticket_room(ticket_id, {
-                        "type": "user_left",
-                        "user_name": user_name,
-                        "user_role": user_role,
-                        "timestamp": datetime.now().isoformat()
-                    }))
-                except:
-                    pass
-            
-            # Clean up empty rooms
-            if not self.ticket_rooms[ticket_id]:
-                del self.ticket_rooms[ticket_id]
-                print(f"Ticket room {ticket_id} is now empty and has been removed")
+        self._leave_room(connection)
 
-    async def broadcast_to_ticket_room(self, ticket_id: int, message: dict, exclude_user: int = None):
-        """Broadcast a message to all users in a specific ticket room"""
-        if ticket_id not in self.ticket_rooms:
+    def _leave_room(self, connection: Connection):
+        """Remove a room connection and tell the room, on every worker, that the user left"""
+        if self.room_connections.get(connection.websocket) is not connection:
             return
-        
-        message_str = json.dumps(message)
-        connections_to_remove = []
-        active_connections = 0
-        
-        for connection in self.ticket_rooms[ticket_id]:
-            if exclude_user and connection["user_id"] == exclude_user:
-                continue
-            
-            try:
-                await connection["websocket"].send_text(message_str)
-                active_connections += 1
-            except:
-                # Connection is broken, mark for removal
-                connections_to_remove.append(connection)
-        
-        # Remove broken connections
-        for broken_connection in connections_to_remove:
-            if broken_connection in self.ticket_rooms[ticket_id]:
-                self.ticket_rooms[ticket_id].remove(broken_connection)
-        
-        print(f"Broadcasted message to {active_connections} users in ticket room {ticket_id}")
+        ticket_id = connection.ticket_id
+        self._remove(connection)
+        room = self.ticket_rooms.get(ticket_id)
+        logger.debug(f"User {connection.user_name} ({connection.user_role}) left ticket room {ticket_id}. Room size: {len(room) if room else 0}")
+
+        # Notify others in the room (on any worker) that someone left
+        self._publish_presence("leave", connection)
+        self._publish("chat.room", {"ticket_id": ticket_id, "message": {
+            "type": "user_left",
+            "user_name": connection.user_name,
+            "user_role": connection.user_role,
+            "timestamp": datetime.now().isoformat()
+        }})
+
+    async def broadcast_to_ticket_room(self, ticket_id: int, message: dict, exclude_user: int = None):
+        """Queue a message for all users in a specific ticket room, on every worker"""
+        self._publish("chat.room", {"ticket_id": ticket_id, "message": message, "exclude_user": exclude_user})
 
     def get_ticket_room_users(self, ticket_id: int) -> List[Dict]:
-        """Get list of users currently in a ticket room"""
-        if ticket_id not in self.ticket_rooms:
-            return []
-        
-        return [
-            {
-                "user_id": conn["user_id"],
-                "user_name": conn["user_name"],
-                "user_role": conn["user_role"],
-                "connected_at": conn["connected_at"].isoformat()
-            }
-            for conn in self.ticket_rooms[ticket_id]
-        ]
+        """Get list of users currently in a ticket room, including those connected to other workers"""
+        users = {connection.user_id: connection.info() for connection in self.ticket_rooms.get(ticket_id, {}).values()}
+        for user_id, info in self._live_remote_members(ticket_id):
+            users.setdefault(user_id, info)
+        return list(users.values())
 
     def is_user_in_ticket_room(self, ticket_id: int, user_id: int) -> bool:
-        """Check if a specific user is in a ticket room"""
-        if ticket_id not in self.ticket_rooms:
-            return False
-        
-        return any(conn["user_id"] == user_id for conn in self.ticket_rooms[ticket_id])
+        """Check if a specific user is in a ticket room on any worker"""
+        if user_id in self.ticket_rooms.get(ticket_id, ()):
+            return True
+        return any(member_id == user_id for member_id, _ in self._live_remote_members(ticket_id))
+
+    def _all_connections(self) -> List[Connection]:
+        return (
+            list(self.global_connections.values())
+            + list(self.room_connections.values())
+            + list(self.notification_connections.values())
+        )
+
+    def stats(self) -> Dict:
+        """Delivery counters and recent enqueue-to-sent latency, for the diagnostics endpoint"""
+        latencies = sorted(self._latencies_ms)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 2)
+
+        return {
+            "room_connections": len(self.room_connections),
+            "global_connections": len(self.global_connections),
+            "notification_connections": len(self.notification_connections),
+            "rooms": len(self.ticket_rooms),
+            "queue_size": self.queue_size,
+            "send_timeout_seconds": self.send_timeout,
+            "slow_consumer_policy": self.slow_consumer_policy,
+            "queued_frames": sum(c.queue.qsize() for c in self._all_connections() if c.queue is not None),
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "slow_disconnects": self.slow_disconnects,
+            "send_failures": self.send_failures,
+            "expired_remote_members": self.expired_members,
+            "latency_ms": {"p50": percentile(0.5), "p99": percentile(0.99), "max": percentile(1.0)},
+        }
+
+    async def _flush_and_close(self, connection: Connection):
+        # Let queued frames go out before the reconnect hint
+        if connection.queue is not None:
+            try:
+                await asyncio.wait_for(connection.queue.join(), timeout=self.send_timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._stop_writer(connection)
+        await close_for_restart(connection.websocket)
+
+    async def drain(self):
+        """Flush every send queue, then send a reconnect hint and close each socket (graceful shutdown)"""
+        if self.backplane is not None:
+            self.backplane.publish("chat.presence", {"op": "node_down", "node": self.backplane.node_id})
+        connections = self._all_connections()
+        self.global_connections = {}
+        self.global_by_user = {}
+        self.notification_connections = {}
+        self.notifications_by_user = {}
+        self.ticket_rooms = {}
+        self.room_connections = {}
+        await asyncio.gather(*(self._flush_and_close(connection) for connection in connections))
+        logger.info(f"Drained {len(connections)} WebSocket connections")
 
 # Global connection manager instance
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager()
+manager.attach(backplane)
+shutdown.register(manager.drain)
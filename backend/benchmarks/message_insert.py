@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Chat message inserts per second on one worker, before and after INSERT ... RETURNING.
+
+"before" replays the old create_message: INSERT, commit, refresh, then a
+second SELECT joining the sender just for their name. "after" calls
+app.operations.message.create_message with the authenticated principal,
+which is one INSERT ... RETURNING and the commit.
+
+Run from the backend directory:
+    python benchmarks/message_insert.py --messages 5000
+By default an in-memory SQLite database is used, where a round trip costs
+almost nothing; pass --database-url to measure against PostgreSQL (the
+tables must already exist), where the saved round trips dominate.
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark message creation")
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--database-url", default="sqlite://")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+
+    from sqlalchemy.orm import joinedload
+    from app.database import Base, SessionLocal, engine
+    import app.models  # noqa: F401
+    from app.models.category import Category
+    from app.models.message import Message
+    from app.models.ticket import Ticket
+    from app.models.user import User, UserRole
+    from app.core.principal_cache import Principal
+    from app.operations.message import create_message, message_to_dict
+    from app.schemas.messages import MessageCreate
+
+    if engine.dialect.name == "sqlite":
+        Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    user = db.query(User).filter(User.email == "bench@example.com").first()
+    if user is None:
+        user = User(name="Bench", email="bench@example.com", password_hash="x", role=UserRole.user)
+        db.add(user)
+        db.commit()
+    category = db.query(Category).first()
+    if category is None:
+        category = Category(name="Bench")
+        db.add(category)
+        db.commit()
+    ticket = Ticket(
+        ticket_uid=f"BENCH-{int(time.time())}",
+        user_id=user.id,
+        category_id=category.id,
+        title="Message insert benchmark",
+        initial_description="Benchmark",
+    )
+    db.add(ticket)
+    db.commit()
+    sender = Principal.from_user(user)
+    ticket_id = ticket.id
+
+    def legacy_create(message_data: MessageCreate):
+        db_message = Message(
+            ticket_id=message_data.ticket_id,
+            content=message_data.content,
+            sender_id=message_data.sender_id
+        )
+        db.add(db_message)
+        db.commit()
+        db.refresh(db_message)
+        db_message = db.query(Message).options(joinedload(Message.sender)).filter(Message.id == db_message.id).first()
+        return message_to_dict(db_message)
+
+    def run(create) -> float:
+        started = time.perf_counter()
+        for i in range(args.messages):
+            create(MessageCreate(ticket_id=ticket_id, content=f"message {i}", sender_id=sender.id))
+        return time.perf_counter() - started
+
+    # Warm up imports, connection and statement caches
+    run(legacy_create)
+    run(lambda message_data: create_message(db, message_data, sender))
+
+    before = run(legacy_create)
+    after = run(lambda message_data: create_message(db, message_data, sender))
+
+    # Leave no benchmark rows behind (messages go with the ticket)
+    db.query(Ticket).filter(Ticket.id == ticket_id).delete()
+    db.commit()
+    db.close()
+
+    per_second_before = args.messages / before
+    per_second_after = args.messages / after
+    print(f"🔧 create_message x {args.messages} ({engine.dialect.name})\n")
+    print(f"before  {per_second_before:9.0f} messages/s  {before / args.messages * 1e6:8.1f} µs/message")
+    print(f"after   {per_second_after:9.0f} messages/s  {after / args.messages * 1e6:8.1f} µs/message")
+    print(f"speedup {per_second_after / per_second_before:9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Per-request authentication cost with and without the principal cache.
+
+Calls app.dependencies.get_current_user directly, once with the principal
+and token caches cleared before every call (the old "decode + SELECT user
+per request" behaviour) and once with warm caches.
+
+Run from the backend directory:
+    python benchmarks/principal_cache.py --requests 20000
+By default an in-memory SQLite database is used; pass --database-url to
+measure against PostgreSQL (the users table must already exist).
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark get_current_user")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--database-url", default="sqlite://")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+
+    from app.database import Base, SessionLocal, engine
+    import app.models  # noqa: F401
+    from app.models.user import User, UserRole
+    from app.core.security import create_access_token
+    from app.core.principal_cache import principal_cache
+    from app.core.token_cache import token_cache
+    from app.dependencies import get_current_user
+
+    if engine.dialect.name == "sqlite":
+        Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    user = db.query(User).filter(User.email == "bench@example.com").first()
+    if user is None:
+        user = User(name="Bench", email="bench@example.com", password_hash="x", role=UserRole.agent)
+        db.add(user)
+        db.commit()
+    token = create_access_token({"sub": str(user.id)})
+
+    def run(clear_cache: bool) -> float:
+        started = time.perf_counter()
+        for _ in range(args.requests):
+            if clear_cache:
+                principal_cache.clear()
+                token_cache.clear()
+            get_current_user(token=token, db=db)
+        return time.perf_counter() - started
+
+    # Warm up imports, connection and statement caches
+    run(clear_cache=True)
+
+    uncached = run(clear_cache=True)
+    principal_cache.clear()
+    cached = run(clear_cache=False)
+    db.close()
+
+    per_uncached = uncached / args.requests * 1e6
+    per_cached = cached / args.requests * 1e6
+    print(f"🔧 get_current_user x {args.requests} ({engine.dialect.name})\n")
+    print(f"without cache  {per_uncached:9.1f} µs/request")
+    print(f"with cache     {per_cached:9.1f} µs/request")
+    print(f"saving         {per_uncached - per_cached:9.1f} µs/request ({per_uncached / per_cached:.1f}x)")
+    print(f"cache stats    {principal_cache.stats()}")
+
+if __name__ == "__main__":
+    main()
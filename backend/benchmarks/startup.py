@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark.
+
+Measures, in fresh interpreter processes:
+  * import time of `main` (what every worker and test import pays)
+  * time to build the app with create_app()
+  * time-to-first-request: spawning uvicorn until GET / answers
+
+Run from the backend directory:
+    python benchmarks/startup.py --runs 5
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+IMPORT_SNIPPET = """
+import time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+main.create_app()
+t2 = time.perf_counter()
+print(t1 - t0, t2 - t1)
+"""
+
+def measure_import():
+    output = subprocess.check_output(
+        [sys.executable, "-c", IMPORT_SNIPPET], cwd=BACKEND_DIR, text=True
+    )
+    import_s, build_s = (float(value) for value in output.split()[-2:])
+    return import_s, build_s
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def measure_first_request(timeout: float = 30.0) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:create_app", "--factory",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError("Server did not answer within the timeout")
+    finally:
+        server.terminate()
+        server.wait()
+
+def report(label: str, samples):
+    ms = [sample * 1000 for sample in samples]
+    print(f"{label:<24} median {statistics.median(ms):8.1f} ms   min {min(ms):8.1f} ms   max {max(ms):8.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure backend startup time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--skip-server", action="store_true", help="Only measure import and app build time")
+    args = parser.parse_args()
+
+    imports, builds, first_requests = [], [], []
+    for _ in range(args.runs):
+        import_s, build_s = measure_import()
+        imports.append(import_s)
+        builds.append(build_s)
+        if not args.skip_server:
+            first_requests.append(measure_first_request())
+
+    print(f"🔧 Startup benchmark ({args.runs} runs)\n")
+    report("import main", imports)
+    report("create_app()", builds)
+    if first_requests:
+        report("time to first request", first_requests)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+ConnectionManager scaling benchmark.
+
+Joins N connections to ticket rooms (two per room, like a user and an
+agent) plus N global connections, broadcasts once to every room, then
+leaves again. Sockets are in-memory fakes, so the numbers are the
+manager's own bookkeeping cost. Per-op times should stay flat as N grows.
+"bcast" is what the broadcaster pays (enqueueing); delivery happens in the
+per-connection writer tasks. Memory per connection (record, send queue and
+writer task) is measured with tracemalloc.
+
+Run from the backend directory:
+    python benchmarks/websocket_manager.py --sizes 1000 10000 50000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+class FakeWebSocket:
+    __slots__ = ()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data):
+        pass
+
+    async def send_json(self, data):
+        pass
+
+    async def close(self, code=1000, reason=None):
+        pass
+
+async def run(size: int) -> dict:
+    from app.websocket_manager import ConnectionManager
+
+    manager = ConnectionManager()
+    room_sockets = [FakeWebSocket() for _ in range(size)]
+    global_sockets = [FakeWebSocket() for _ in range(size)]
+    rooms = size // 2
+
+    started = time.perf_counter()
+    for i, ws in enumerate(room_sockets):
+        await manager.join_ticket_room(ws, i % rooms, i, f"user{i}", "user")
+    join_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for i, ws in enumerate(global_sockets):
+        await manager.connect_global(ws, i, f"user{i}", "user")
+    connect_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for ticket_id in range(rooms):
+        await manager.broadcast_to_ticket_room(ticket_id, {"type": "message", "content": "hi"})
+    broadcast_s = time.perf_counter() - started
+
+    # Let the writer tasks deliver
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    for i, ws in enumerate(room_sockets):
+        manager.leave_ticket_room(ws, i % rooms)
+    leave_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for ws in global_sockets:
+        manager.disconnect_global(ws)
+    disconnect_s = time.perf_counter() - started
+
+    # Let the scheduled "user_left" notifications finish
+    await asyncio.sleep(0)
+
+    # Memory is measured on a separate pass; tracemalloc would skew the timings
+    manager = ConnectionManager()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for i, ws in enumerate(room_sockets):
+        await manager.join_ticket_room(ws, i % rooms, i, f"user{i}", "user")
+    for i, ws in enumerate(global_sockets):
+        await manager.connect_global(ws, i, f"user{i}", "user")
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+    return {
+        "join": join_s / size * 1e6,
+        "connect_global": connect_s / size * 1e6,
+        "room_broadcast": broadcast_s / rooms * 1e6,
+        "leave": leave_s / size * 1e6,
+        "disconnect_global": disconnect_s / size * 1e6,
+        "bytes_per_connection": allocated / (2 * size),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the WebSocket ConnectionManager")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        results.append((size, asyncio.run(run(size))))
+
+    print("🔧 ConnectionManager, µs per operation\n")
+    print(f"{'connections':>11} {'join':>8} {'global':>8} {'bcast':>8} {'leave':>8} {'discon':>8} {'bytes/conn':>11}")
+    for size, r in results:
+        print(
+            f"{size:>11} {r['join']:>8.2f} {r['connect_global']:>8.2f} {r['room_broadcast']:>8.2f} "
+            f"{r['leave']:>8.2f} {r['disconnect_global']:>8.2f} {r['bytes_per_connection']:>11.0f}"
+        )
+
+if __name__ == "__main__":
+    main()
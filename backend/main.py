@@ -1,90 +1,119 @@
 import os
 import sys
-from typing import Union
+import inspect
+import logging
+import importlib
+from contextlib import asynccontextmanager
 from datetime import datetime
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from sqlalchemy.exc import SQLAlchemyError
 
 # Add current directory to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app.routers import user
-from app.database import Base, engine, get_db
-from app.auth import router as auth
-from app.routers import ticket
-from app.routers import ticket_transfer
-from app.routers import category
-from app.routers import message_ws
-from app.routers import call_ws
-from app.routers import notification
-from app.core.seed_category import seed_categories
-
-# Test database connection before starting
-try:
-    connection = engine.connect()
-    connection.close()
-    print("✅ Database connection successful!")
-except Exception as e:
-    print(f"❌ Database connection failed: {e}")
-    print("Please check your DATABASE_URL in .env file")
-    sys.exit(1)
-
-# Create all tables (development only)
-try:
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created/verified")
-except Exception as e:
-    print(f"❌ Failed to create database tables: {e}")
-    sys.exit(1)
-
-app = FastAPI(
-    title="Help Desk System API",
-    description="A comprehensive help desk system with ticket management, real-time messaging, and user management",
-    version="1.0.0",
-    docs_url="/swagger",
-    redoc_url="/redoc"
-)
-
-# Configure CORS for frontend applications
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",    # Common React dev port
-        "http://localhost:5173",    # Admin frontend (Vite default)
-        "http://localhost:5174",    # User frontend 
-        "http://127.0.0.1:3000",
-        "http://127.0.0.1:5173",
-        "http://127.0.0.1:5174",
-        "http://127.0.0.1:5175",
-    ],
-    allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
-    allow_headers=["*"],
-)
-@app.on_event("startup")
-def on_startup():
+from app.core.slow_query import current_route
+from app.core.constants import SLOW_QUERY_LOG_ENABLED
+from app.core.shutdown import shutdown
+from app.core.password_pool import PasswordHasherBusy, password_pool
+from app.core.revocation import revocation_list
+from app.core.backplane import backplane
+from app.core.call_sessions import call_sessions
+from app.core.events import event_bus
+from app.core.notification_counters import notification_counters
+from app.core.notification_retention import notification_retention
+from app.core.notification_versions import notification_versions
+from app.core.ticket_routes import ticket_routes
+
+logger = logging.getLogger(__name__)
+
+# Routers are imported inside create_app so importing this module stays cheap.
+# (module path, tag) pairs, included in this order.
+ROUTERS = [
+    ("app.auth", "Authentication"),
+    ("app.routers.user", "Users"),
+    ("app.routers.ticket", "Tickets"),
+    ("app.routers.ticket_transfer", "Ticket Transfers"),
+    ("app.routers.category", "Categories"),
+    ("app.routers.message_ws", "Messages"),
+    ("app.routers.call_ws", "Calls"),
+    ("app.routers.notification", "Notifications"),
+    ("app.routers.diagnostics", "Diagnostics"),
+]
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan.
+    Nothing here touches the database: schema is managed by Alembic
+    (`alembic upgrade head`) and seed data by `python -m app.cli.seed_categories`.
+    The token revocation list is refreshed in the background, the backplane
+    carries chat fan-out and call signaling between workers, and the event bus
+    runs side effects (notifications) off the request path. Notification
+    counters are reconciled and expired notifications purged periodically.
+    On shutdown, open WebSockets are drained with a randomized reconnect hint.
+    """
+    from app.websocket_manager import manager
+    from app.operations import notification  # noqa: F401 - subscribes the notification handlers
+
+    shutdown.install_signal_handlers()
+    password_pool.start()
+    await revocation_list.start()
+    await backplane.start()
+    manager.start()
+    notification_versions.start()
+    ticket_routes.start()
+    call_sessions.start()
+    event_bus.start()
+    notification_counters.start()
+    notification_retention.start()
+    yield
+    await stop_all(
+        shutdown.drain,
+        notification_retention.stop,
+        notification_counters.stop,
+        event_bus.stop,
+        call_sessions.stop,
+        manager.stop,
+        # After the drain, so this worker's "node down" presence update still goes out
+        backplane.stop,
+        revocation_list.stop,
+        password_pool.shutdown,
+    )
+
+async def stop_all(*steps):
+    """Run the shutdown steps in order; one failing never skips the ones after it"""
+    for step in steps:
+        try:
+            result = step()
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            logger.exception(f"Shutdown step {step.__qualname__} failed")
+
+# Tag each request with its route so the slow-query log can attribute statements
+async def tag_route_for_slow_query_log(request, call_next):
+    token = current_route.set(f"{request.method} {request.url.path}")
     try:
-        seed_categories()
-        print("✅ Categories seeded successfully")
-    except Exception as e:
-        print(f"⚠️ Warning: Could not seed categories: {e}")
+        return await call_next(request)
+    finally:
+        current_route.reset(token)
 
-# Health check endpoint
-@app.get("/")
+# Health check endpoints
 def read_root():
     return {"message": "Help Desk API is running", "status": "healthy", "timestamp": datetime.now()}
 
-@app.get("/health")
 def health_check():
+    from sqlalchemy import text
+    from sqlalchemy.exc import SQLAlchemyError
+    from app.database import SessionLocal
+
+    db = SessionLocal()
     try:
         # Test database connection
-        db = next(get_db())
-        db.execute("SELECT 1")
-        db.close()
-        
+        db.execute(text("SELECT 1"))
+
         return {
             "status": "healthy",
             "database": "connected",
@@ -95,25 +124,24 @@ def health_check():
         return JSONResponse(
             status_code=503,
             content={
-                "status": "unhealthy", 
+                "status": "unhealthy",
                 "database": "disconnected",
                 "error": str(e),
-                "timestamp": datetime.now()
+                "timestamp": datetime.now().isoformat()
             }
         )
+    finally:
+        db.close()
 
-# Include all routers
-app.include_router(auth,  tags=["Authentication"])
-app.include_router(user.router, tags=["Users"])
-app.include_router(ticket.router, tags=["Tickets"])
-app.include_router(ticket_transfer.router, tags=["Ticket Transfers"])
-app.include_router(category.router, tags=["Categories"])
-app.include_router(message_ws.router, tags=["Messages"])
-app.include_router(call_ws.router, tags=["Calls"])
-app.include_router(notification.router, tags=["Notifications"])
+# Password hashing pool is saturated: fail fast and tell the client when to retry
+async def password_hasher_busy_handler(request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
 # Global exception handler
-@app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     return JSONResponse(
         status_code=500,
@@ -123,10 +151,61 @@ async def global_exception_handler(request, exc):
         }
     )
 
+def create_app() -> FastAPI:
+    """Build the FastAPI application. Used by `uvicorn main:create_app --factory`."""
+    app = FastAPI(
+        title="Help Desk System API",
+        description="A comprehensive help desk system with ticket management, real-time messaging, and user management",
+        version="1.0.0",
+        docs_url="/swagger",
+        redoc_url="/redoc",
+        lifespan=lifespan
+    )
+
+    # Configure CORS for frontend applications
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[
+            "http://localhost:3000",    # Common React dev port
+            "http://localhost:5173",    # Admin frontend (Vite default)
+            "http://localhost:5174",    # User frontend
+            "http://127.0.0.1:3000",
+            "http://127.0.0.1:5173",
+            "http://127.0.0.1:5174",
+            "http://127.0.0.1:5175",
+        ],
+        allow_credentials=True,
+        allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+        allow_headers=["*"],
+    )
+
+    if SLOW_QUERY_LOG_ENABLED:
+        app.middleware("http")(tag_route_for_slow_query_log)
+
+    app.get("/")(read_root)
+    app.get("/health")(health_check)
+
+    # Include all routers
+    for module_path, tag in ROUTERS:
+        module = importlib.import_module(module_path)
+        app.include_router(module.router, tags=[tag])
+
+    app.add_exception_handler(PasswordHasherBusy, password_hasher_busy_handler)
+    app.add_exception_handler(Exception, global_exception_handler)
+    return app
+
+def __getattr__(name):
+    # `main:app` is built on first access so plain imports of this module
+    # (tests, tooling, the start.py preflight) don't pay for the routers.
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 if __name__ == "__main__":
     import uvicorn
     print("🚀 Starting Help Desk API server...")
     print("📖 API Documentation: http://localhost:8000/swagger")
     print("🏥 Health Check: http://localhost:8000/health")
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
-
+    uvicorn.run("main:create_app", factory=True, host="0.0.0.0", port=8000, reload=True)
@@ -70,6 +70,10 @@ if errorlevel 1 (
     exit /b 1
 )
 
+:: Seed default categories (idempotent)
+echo 🌱 Seeding default categories...
+python -m app.cli.seed_categories
+
 :: Check if admin user exists, create if not
 echo 👤 Checking for admin user...
 python -c "
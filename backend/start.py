@@ -2,8 +2,14 @@
 """
 Help Desk Backend Startup Script
 This script provides an easy way to start the backend with proper checks.
+
+    python start.py                         # development: checks + single reloading process
+    python start.py --prod                  # production: N workers, no reload
+    python start.py --prod --preflight      # production, run the startup checks first
 """
 
+import argparse
+import importlib.util
 import os
 import sys
 import subprocess
@@ -100,7 +106,7 @@ def run_migrations():
         return False
 
 def start_server():
-    """Start the FastAPI server"""
+    """Start the FastAPI development server (single process, auto-reload)"""
     print("\n🚀 Starting Help Desk API server...")
     print("📖 API Documentation will be available at: http://localhost:8000/swagger")
     print("🏥 Health Check: http://localhost:8000/health")
@@ -116,8 +122,131 @@ def start_server():
     except KeyboardInterrupt:
         print("\n👋 Server stopped")
 
+def production_command(args):
+    """
+    Build the production server command.
+    Prefers gunicorn with uvicorn workers (preloaded app, request-based worker
+    recycling). Falls back to uvicorn's own process manager where gunicorn is
+    not available (e.g. Windows), which cannot preload the app.
+    """
+    if importlib.util.find_spec("gunicorn") is not None:
+        return [
+            sys.executable, '-m', 'gunicorn', 'main:create_app()',
+            '--worker-class', 'uvicorn.workers.UvicornWorker',
+            '--workers', str(args.workers),
+            '--bind', f'{args.host}:{args.port}',
+            '--preload',
+            '--max-requests', str(args.max_requests),
+            '--max-requests-jitter', str(args.max_requests_jitter),
+            '--keep-alive', str(args.keep_alive),
+            '--backlog', str(args.backlog),
+            '--graceful-timeout', str(args.graceful_timeout),
+            '--timeout', str(args.worker_timeout),
+        ]
+
+    print("⚠️ gunicorn not installed, using uvicorn's process manager (no app preload)")
+    command = [
+        sys.executable, '-m', 'uvicorn', 'main:create_app', '--factory',
+        '--host', args.host,
+        '--port', str(args.port),
+        '--workers', str(args.workers),
+        '--limit-max-requests', str(args.max_requests),
+        '--timeout-keep-alive', str(args.keep_alive),
+        '--backlog', str(args.backlog),
+        '--timeout-graceful-shutdown', str(args.graceful_timeout),
+        '--no-access-log',
+    ]
+    if importlib.util.find_spec("uvloop") is not None:
+        command += ['--loop', 'uvloop']
+    if importlib.util.find_spec("httptools") is not None:
+        command += ['--http', 'httptools']
+    return command
+
+def check_backplane(args) -> bool:
+    """Several workers need the postgres backplane, or real-time delivery stays inside one process"""
+    from app.core.constants import BACKPLANE
+    if args.workers > 1 and BACKPLANE != "postgres":
+        print(f"❌ {args.workers} workers need BACKPLANE=postgres (currently {BACKPLANE!r})")
+        print("With the memory backplane chat, presence, call signaling and notification pushes")
+        print("only reach users connected to the same worker.")
+        print("Set BACKPLANE=postgres in .env, or run a single worker with --workers 1")
+        return False
+    return True
+
+def start_production_server(args):
+    """Start the API with multiple worker processes and no auto-reload"""
+    print(f"\n🚀 Starting Help Desk API in production mode with {args.workers} workers...")
+    # Workers size their bcrypt pools from this, so the host isn't oversubscribed
+    os.environ['WEB_CONCURRENCY'] = str(args.workers)
+    try:
+        subprocess.run(production_command(args))
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped")
+
+def run_checks(checks) -> bool:
+    for check_name, check_func in checks:
+        print(f"Checking {check_name}...")
+        if not check_func():
+            return False
+        print()
+    return True
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Start the Help Desk backend")
+    parser.add_argument('--prod', action='store_true', help="Run multiple workers without auto-reload")
+    parser.add_argument('--preflight', action='store_true', help="Run the startup checks before a production start")
+    parser.add_argument('--host', default=os.getenv('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', '8000')))
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes (default: WEB_CONCURRENCY, else the CPU count with "
+                             "BACKPLANE=postgres and 1 with the memory backplane)")
+    parser.add_argument('--max-requests', type=int, default=int(os.getenv('MAX_REQUESTS', '10000')),
+                        help="Recycle a worker after this many requests")
+    parser.add_argument('--max-requests-jitter', type=int, default=int(os.getenv('MAX_REQUESTS_JITTER', '1000')),
+                        help="Random extra requests per worker so they don't all recycle at once")
+    parser.add_argument('--keep-alive', type=int, default=int(os.getenv('KEEP_ALIVE', '5')),
+                        help="Seconds to keep idle HTTP connections open")
+    parser.add_argument('--backlog', type=int, default=int(os.getenv('BACKLOG', '2048')),
+                        help="Maximum number of pending connections")
+    parser.add_argument('--graceful-timeout', type=int, default=int(os.getenv('GRACEFUL_TIMEOUT', '30')),
+                        help="Seconds a worker gets to finish in-flight work on restart/shutdown")
+    parser.add_argument('--worker-timeout', type=int, default=int(os.getenv('WORKER_TIMEOUT', '60')),
+                        help="Seconds of silence before gunicorn restarts a worker")
+    args = parser.parse_args()
+    if args.workers is None:
+        args.workers = default_workers()
+    return args
+
+def default_workers() -> int:
+    """One worker per CPU when they can share real-time traffic, else a single worker"""
+    from app.core.constants import BACKPLANE
+    if os.getenv('WEB_CONCURRENCY'):
+        return int(os.getenv('WEB_CONCURRENCY'))
+    return (os.cpu_count() or 1) if BACKPLANE == "postgres" else 1
+
 def main():
     """Main startup routine"""
+    args = parse_args()
+
+    if args.prod:
+        if not check_backplane(args):
+            sys.exit(1)
+        if args.preflight:
+            print("🔧 Help Desk Backend Preflight Check\n")
+            # A production host usually has no venv to check
+            checks = [
+                ("Python Version", check_python_version),
+                ("Dependencies", check_dependencies),
+                ("Database Connection", check_database_connection),
+                ("Database Migrations", run_migrations)
+            ]
+            if not run_checks(checks):
+                print("\n❌ Preflight failed. Please fix the issues above and try again.")
+                sys.exit(1)
+            print("✅ Preflight passed!")
+        start_production_server(args)
+        return
+
     print("🔧 Help Desk Backend Startup Check\n")
     
     # Run all checks
@@ -130,15 +259,7 @@ def main():
         ("Database Migrations", run_migrations)
     ]
     
-    all_passed = True
-    for check_name, check_func in checks:
-        print(f"Checking {check_name}...")
-        if not check_func():
-            all_passed = False
-            break
-        print()
-    
-    if all_passed:
+    if run_checks(checks):
         print("✅ All checks passed! Starting server...\n")
         start_server()
     else:
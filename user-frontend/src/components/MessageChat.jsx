@@ -82,6 +82,9 @@ const MessageChat = ({ ticketId, initialMessages = [] }) => {
             messages={messages.messages}
             loadingMessages={messages.loadingMessages}
             currentUserId={user?.id}
+            hasOlderMessages={messages.hasOlderMessages}
+            loadingOlderMessages={messages.loadingOlderMessages}
+            onLoadOlder={messages.loadOlderMessages}
           />
         </div>
 
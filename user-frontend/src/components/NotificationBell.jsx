@@ -1,4 +1,5 @@
 import React, { useState, useEffect } from 'react';
+import useWebSocket, { ReadyState } from 'react-use-websocket';
 import { Bell, X, Check } from 'lucide-react';
 import { notificationService } from '../services/notificationService';
 import { useAuth } from '../context/AuthContext';
@@ -8,22 +9,63 @@ const NotificationBell = () => {
   const [unreadCount, setUnreadCount] = useState(0);
   const [isOpen, setIsOpen] = useState(false);
   const [loading, setLoading] = useState(false);
-  const { user } = useAuth();
+  const { user, token } = useAuth();
+
+  // New notifications are pushed over this socket; polling is only the fallback
+  const { lastJsonMessage, readyState } = useWebSocket(
+    user && token ? `ws://localhost:8000/notifications/ws?token=${token}` : null,
+    {
+      shouldReconnect: (closeEvent) => closeEvent.code !== 1000 && closeEvent.code !== 1008,
+      reconnectAttempts: 10,
+      reconnectInterval: 3000,
+    }
+  );
+  const isLive = readyState === ReadyState.OPEN;
 
   useEffect(() => {
     if (user) {
       fetchNotifications();
       fetchStats();
-      
-      // Poll for new notifications every 30 seconds
-      const interval = setInterval(() => {
-        fetchStats();
-      }, 30000);
-      
-      return () => clearInterval(interval);
     }
   }, [user]);
 
+  useEffect(() => {
+    if (!user || isLive) return;
+    
+    // Poll for new notifications every 30 seconds while the socket is down
+    const interval = setInterval(() => {
+      fetchStats();
+    }, 30000);
+    
+    return () => clearInterval(interval);
+  }, [user, isLive]);
+
+  useEffect(() => {
+    if (!lastJsonMessage) return;
+    switch (lastJsonMessage.type) {
+      case 'notification_count':
+        setUnreadCount(lastJsonMessage.unread_notifications);
+        break;
+      case 'notification':
+        setNotifications(prev => [lastJsonMessage.notification, ...prev]);
+        setUnreadCount(prev => prev + lastJsonMessage.unread_delta);
+        break;
+      case 'notification_updated':
+        // Coalesced into an unread notification the list may already show
+        setNotifications(prev => [
+          lastJsonMessage.notification,
+          ...prev.filter(n => n.id !== lastJsonMessage.notification.id),
+        ]);
+        break;
+      case 'notifications_changed':
+        setUnreadCount(prev => prev + lastJsonMessage.unread_delta);
+        if (isOpen) fetchNotifications();
+        break;
+      default:
+        break;
+    }
+  }, [lastJsonMessage]);
+
   const fetchNotifications = async () => {
     try {
       setLoading(true);
@@ -180,7 +222,7 @@ const NotificationBell = () => {
                             {getNotificationIcon(notification.notification_type)}
                           </span>
                           <span className="text-sm font-medium text-gray-800">
-                            {notification.title}
+                            {notification.title}{notification.count > 1 && ` (${notification.count})`}
                           </span>
                           {!notification.is_read && (
                             <span className="w-2 h-2 bg-blue-500 rounded-full"></span>
@@ -1,15 +1,23 @@
 import React, { useEffect, useRef } from 'react';
 import { RefreshCw, User } from 'lucide-react';
 
-const MessageList = ({ messages, loadingMessages, currentUserId }) => {
+const MessageList = ({
+  messages,
+  loadingMessages,
+  currentUserId,
+  hasOlderMessages = false,
+  loadingOlderMessages = false,
+  onLoadOlder
+}) => {
   const messagesEndRef = useRef(null);
+  const lastMessageId = messages.length > 0 ? messages[messages.length - 1].id : null;
 
-  // Auto-scroll to bottom when new messages arrive
+  // Auto-scroll to bottom when new messages arrive (not when older ones are prepended)
   useEffect(() => {
-    if (messages.length > 0) {
+    if (lastMessageId !== null) {
       messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
     }
-  }, [messages]);
+  }, [lastMessageId]);
 
   const formatDate = (dateString) => {
     const date = new Date(dateString);
@@ -51,6 +59,18 @@ const MessageList = ({ messages, loadingMessages, currentUserId }) => {
 
   return (
     <>
+      {hasOlderMessages && onLoadOlder && (
+        <div className="flex justify-center">
+          <button
+            type="button"
+            onClick={onLoadOlder}
+            disabled={loadingOlderMessages}
+            className="text-xs text-blue-600 hover:text-blue-800 disabled:text-gray-400"
+          >
+            {loadingOlderMessages ? 'Loading...' : 'Load earlier messages'}
+          </button>
+        </div>
+      )}
       {messages.map((message, index) => {
         const isCurrentUser = message.sender?.id === currentUserId || message.sender_id === currentUserId;
         return (
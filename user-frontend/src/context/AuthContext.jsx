@@ -171,6 +171,12 @@ export const AuthProvider = ({ children }) => {
     localStorage.setItem('user', JSON.stringify(updatedUser));
   };
 
+  // Swap in a token issued after the old ones were revoked (e.g. on password change)
+  const replaceToken = (token) => {
+    localStorage.setItem('token', token);
+    dispatch({ type: 'LOGIN_SUCCESS', payload: { user: state.user, token } });
+  };
+
   const isUser = () => state.user?.role === 'user';
 
   // Memoize the context value to prevent unnecessary re-renders
@@ -180,8 +186,9 @@ export const AuthProvider = ({ children }) => {
     logout,
     clearError,
     updateUser,
+    replaceToken,
     isUser,
-  }), [state, login, logout, clearError, updateUser, isUser]);
+  }), [state, login, logout, clearError, updateUser, replaceToken, isUser]);
 
   return (
     <AuthContext.Provider value={value}>
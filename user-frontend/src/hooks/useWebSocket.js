@@ -9,6 +9,8 @@ export const useWebSocket = (ticketId, user, token, ticket) => {
   const reconnectTimeoutRef = useRef(null);
   const intentionalDisconnect = useRef(false);
   const lastConnectionAttempt = useRef(0);
+  // Backoff hint sent by the server before a restart
+  const reconnectAfterMs = useRef(null);
   const messageListeners = useRef([]);
 
   const MAX_RECONNECT_ATTEMPTS = 3;
@@ -80,6 +82,10 @@ export const useWebSocket = (ticketId, user, token, ticket) => {
       wsRef.current.onmessage = (event) => {
         try {
           const data = JSON.parse(event.data);
+          if (data.type === 'reconnect') {
+            reconnectAfterMs.current = data.reconnect_after_ms;
+            return;
+          }
           console.log('Raw WebSocket message received:', data);
           console.log('Number of message listeners:', messageListeners.current.length);
           
@@ -101,6 +107,16 @@ export const useWebSocket = (ticketId, user, token, ticket) => {
           intentionalDisconnect.current = false;
           return;
         }
+
+        // Server restart: come back after the server's randomized hint
+        if (event.code === 1012) {
+          const delay = reconnectAfterMs.current ?? RECONNECT_DELAY;
+          reconnectAfterMs.current = null;
+          reconnectTimeoutRef.current = setTimeout(() => {
+            connect();
+          }, delay);
+          return;
+        }
         
         // Only auto-reconnect for specific error codes
         const shouldReconnect = event.code !== 1000 && // Not normal closure
@@ -3,6 +3,7 @@ import { useNavigate } from 'react-router-dom';
 import { Eye, EyeOff, Lock, Shield, CheckCircle, AlertCircle } from 'lucide-react';
 import toast from 'react-hot-toast';
 import { authService } from '../services';
+import { useAuth } from '../context/AuthContext';
 import { validatePassword } from '../utils/validation';
 
 const ChangePassword = () => {
@@ -18,6 +19,7 @@ const ChangePassword = () => {
   });
   const [isLoading, setIsLoading] = useState(false);
   const [passwordStrength, setPasswordStrength] = useState(0);
+  const { replaceToken } = useAuth();
   const navigate = useNavigate();
 
   const checkPasswordStrength = (password) => {
@@ -96,11 +98,16 @@ const ChangePassword = () => {
     setIsLoading(true);
 
     try {
-      await authService.changePassword({
+      const result = await authService.changePassword({
         current_password: formData.currentPassword,
         new_password: formData.newPassword
       });
 
+      // The old token was revoked with the old password
+      if (result.access_token) {
+        replaceToken(result.access_token);
+      }
+
       toast.success('Password changed successfully!');
       
       // Clear form
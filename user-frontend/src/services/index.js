@@ -132,9 +132,9 @@ export const categoryService = {
 };
 
 export const messageService = {
-  // Get messages for a ticket
-  getMessages: async (ticketId) => {
-    const response = await api.get(`/messages/${ticketId}`);
+  // Get the latest page of a ticket's messages (params: before_id, after_id, limit)
+  getMessages: async (ticketId, params = {}) => {
+    const response = await api.get(`/messages/${ticketId}`, { params });
     return response.data;
   },
 